@@ -1,19 +1,73 @@
+################################################################################
+# modules
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
 import os
 import importlib
 
-# Get the current directory
-current_dir = os.path.dirname(__file__)
-
-# Recursively import all Python files in subdirectories
-for root, dirs, files in os.walk(current_dir):
-    for file in files:
-        if file.endswith(".py") and file != "__init__.py":
-            # Construct the module name relative to the package
-            relative_path = os.path.relpath(os.path.join(root, file), current_dir)
-            module_name = relative_path.replace(os.sep, ".")[:-3]  # Remove ".py" extension
-
-            try:
-                # Import the module dynamically
-                importlib.import_module(f".{module_name}", package=__name__)
-            except ImportError as e:
-                print(f"Failed to import {module_name}: {e}")
\ No newline at end of file
+################################################################################
+# Cosim registry
+################################################################################
+# Testbench name -> (module, function) of its cosim model, relative to this
+# package. Models are only imported when a config of their testbench runs.
+COSIM_REGISTRY = {
+    "fix_dsp_mac_vunit_tb"               : ("fix_dsp_mac.vunit_tb.fix_dsp_mac",                             "cosim"),
+    "fix_dot_product_vunit_tb"           : ("fix_dot_product.vunit_tb.fix_dot_product",                     "cosim"),
+    "fix_matrix_vector_product_vunit_tb" : ("fix_matrix_vector_product.vunit_tb.fix_matrix_vector_product", "cosim"),
+}
+
+################################################################################
+# Classes
+################################################################################
+class LazyCosim:
+    """
+    Cosim function that imports its model on the first call
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self, module : str, function : str):
+        """
+        Constructor of the LazyCosim class
+        :param module:   Model module, relative to the modules package
+        :param function: Name of the cosim function in the module
+        """
+        self.module = module
+        self.function = function
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    @property
+    def source_file(self) -> str:
+        """
+        Path of the model source, available without importing it
+        """
+        return os.path.join(os.path.dirname(__file__), *self.module.split(".")) + ".py"
+
+    def load(self):
+        """
+        Import the model
+        :return: The cosim function
+        """
+        return getattr(importlib.import_module(f".{self.module}", package=__name__), self.function)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+################################################################################
+# Functions
+################################################################################
+def cosim(tb_name : str) -> LazyCosim:
+    """
+    Get the cosim function of a testbench
+    :param tb_name: Name of the VUnit testbench
+    :return:        Cosim function, the model is imported on the first call
+    """
+    if tb_name not in COSIM_REGISTRY:
+        raise ValueError(f"No cosim registered for '{tb_name}'. Expected one of: {list(COSIM_REGISTRY)}.")
+    return LazyCosim(*COSIM_REGISTRY[tb_name])
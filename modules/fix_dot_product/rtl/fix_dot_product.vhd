@@ -11,6 +11,7 @@ use ieee.numeric_std.all;
 
 library olo;
 use olo.olo_base_pkg_array.all;
+use olo.olo_base_pkg_math.all;
 use olo.en_cl_fix_pkg.all;
 use olo.olo_fix_pkg.all;
 
@@ -20,6 +21,12 @@ use olo.olo_fix_pkg.all;
 entity fix_dot_product is
     generic (
         DIMENSION_WIDTH_G : natural;
+        STREAMING_G       : boolean  := false;
+        NUM_LANES_G       : positive := 1;
+        SKIP_ZEROS_G      : boolean  := false;
+        MAC_PIPELINE_G    : positive := 1;
+        DOUBLE_PUMP_G     : boolean  := false;
+        PACKED_G          : boolean  := false;
 
         FMT_IN_ELEMENT_A_G : string;
         FMT_IN_ELEMENT_B_G : string;
@@ -29,6 +36,10 @@ entity fix_dot_product is
         clk_i : in std_logic;
         rst_i : in std_logic;
 
+        -- Only used with DOUBLE_PUMP_G: twice the frequency of clk_i, rising
+        -- edges aligned (same MMCM/PLL)
+        clk2x_i : in std_logic := '0';
+
         ------------------------------------------------------------------------
         -- In Interface
         ------------------------------------------------------------------------
@@ -36,20 +47,91 @@ entity fix_dot_product is
         in_ready_o    : out std_logic;
         in_vector_a_i : in  StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0);
         in_vector_b_i : in  StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_B_G) - 1 downto 0);
+        -- Only used with PACKED_G: second vector a, out_result_c_o = c * b
+        in_vector_c_i : in  StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0) := (others => (others => '0'));
 
         ------------------------------------------------------------------------
         -- Out Interface
         ------------------------------------------------------------------------
         out_valid_o  : out std_logic;
-        out_result_o : out std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0)
+        out_result_o   : out std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+        out_result_c_o : out std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0)
     );
 end entity fix_dot_product;
 
 architecture rtl of fix_dot_product is
 
+    ----------------------------------------------------------------------------
+    -- Constants
+    ----------------------------------------------------------------------------
+    -- Every lane accumulates LANE_LENGTH_C consecutive elements, the vectors
+    -- are padded with zeros to a multiple of NUM_LANES_G elements.
+    constant LANE_LENGTH_C   : positive := (DIMENSION_WIDTH_G + NUM_LANES_G - 1) / NUM_LANES_G;
+    constant PADDED_WIDTH_C  : positive := NUM_LANES_G * LANE_LENGTH_C;
+    constant RESULT_WIDTH_C  : positive := fixFmtWidthFromString(FMT_OUT_RESULT_G);
+
+    -- With MAC_PIPELINE_G > 1 the multiplier output is registered and the
+    -- accumulator loop has MAC_PIPELINE_G registers. Every lane then holds
+    -- MAC_PIPELINE_G interleaved partial sums, element n of the feed order
+    -- belongs to partial sum n mod MAC_PIPELINE_G.
+    constant MULT_REGS_C     : natural  := minimum(1, MAC_PIPELINE_G - 1);
+
+    -- With DOUBLE_PUMP_G two lanes share a MAC on clk2x_i, their results are
+    -- back in the clk_i domain three clk_i cycles later (see Double Pump)
+    constant NUM_MACS_C      : positive := (NUM_LANES_G + 1) / 2;
+    constant PUMP_DELAY_C    : natural  := 3 * boolean'pos(DOUBLE_PUMP_G);
+
+    constant MAC_DELAY_C     : natural  := MULT_REGS_C + MAC_PIPELINE_G - 1 + PUMP_DELAY_C;
+
+    -- With PACKED_G every lane computes the products of a and c in one
+    -- multiplier (see fix_dsp_mac_packed), both results have their own
+    -- partial sums and adder tree
+    constant NUM_RESULTS_C   : positive := 1 + boolean'pos(PACKED_G);
+
+    -- The adder tree combines the partial sums of all lanes
+    constant NUM_LEAVES_C    : positive := NUM_LANES_G * MAC_PIPELINE_G;
+    constant TREE_LEVELS_C   : natural  := log2ceil(NUM_LEAVES_C);
+
+    ----------------------------------------------------------------------------
+    -- Functions
+    ----------------------------------------------------------------------------
+    -- Number of adder tree nodes on a level, level 0 are the partial sums
+    function tree_nodes(level : natural) return positive is
+    begin
+        return (NUM_LEAVES_C + 2**level - 1) / 2**level;
+    end function;
+
+    -- Lane elements with a nonzero element a in at least one lane
+    function nonzero_elements(vector_a : StlvArray_t) return std_logic_vector is
+        variable result_v : std_logic_vector(LANE_LENGTH_C - 1 downto 0) := (others => '0');
+    begin
+        for lane in 0 to NUM_LANES_G - 1 loop
+            for idx in 0 to LANE_LENGTH_C - 1 loop
+                if vector_a(lane * LANE_LENGTH_C + idx) /= (vector_a(lane * LANE_LENGTH_C + idx)'range => '0') then
+                    result_v(idx) := '1';
+                end if;
+            end loop;
+        end loop;
+        return result_v;
+    end function;
+
+    -- Next lane element after idx to multiply, 0 if there is none. Element 0
+    -- is multiplied last (in FINISHED_S) and never skipped.
+    function next_nonzero(nonzero : std_logic_vector; idx : natural) return natural is
+    begin
+        for next_idx in 1 to LANE_LENGTH_C - 1 loop
+            if next_idx > idx and nonzero(next_idx) = '1' then
+                return next_idx;
+            end if;
+        end loop;
+        return 0;
+    end function;
+
     ----------------------------------------------------------------------------
     -- Types
     ----------------------------------------------------------------------------
+    type TreeLevel_t is array (natural range <>) of StlvArray_t;
+
     type state_t is (
             IDLE_S,
             CALCULATE_S,
@@ -57,12 +139,15 @@ architecture rtl of fix_dot_product is
         );
 
     type two_process_r is record
-        vector_a         : StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0);
-        vector_b         : StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_B_G) - 1 downto 0);
+        vector_a         : StlvArray_t(PADDED_WIDTH_C - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0);
+        vector_b         : StlvArray_t(PADDED_WIDTH_C - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_B_G) - 1 downto 0);
+        vector_c         : StlvArray_t(PADDED_WIDTH_C - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0);
         in_ready         : std_logic;
         out_valid        : std_logic;
         feedback_mux_sel : std_logic;
-        idx              : natural range 0 to DIMENSION_WIDTH_G;
+        feeds            : natural range 0 to MAC_PIPELINE_G;
+        idx              : natural range 0 to LANE_LENGTH_C;
+        nonzero          : std_logic_vector(LANE_LENGTH_C - 1 downto 0);
         --
         state : state_t;
     end record;
@@ -76,39 +161,374 @@ architecture rtl of fix_dot_product is
     ----------------------------------------------------------------------------
     -- MAC (Multiply and ACcumulate) signals
     ----------------------------------------------------------------------------
-    signal mac_accumulator : std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
-    signal mac_result      : std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+    -- Lane results, result * NUM_LANES_G + lane
+    signal mac_accumulator : StlvArray_t(NUM_RESULTS_C * NUM_LANES_G - 1 downto 0)(RESULT_WIDTH_C - 1 downto 0);
+    signal mac_result      : StlvArray_t(NUM_RESULTS_C * NUM_LANES_G - 1 downto 0)(RESULT_WIDTH_C - 1 downto 0);
+
+    -- feedback_mux_sel and out_valid delayed to the adder and to the last partial sum
+    signal mac_feedback_sel : std_logic;
+    signal mac_valid        : std_logic;
+    signal feedback_pipe    : std_logic_vector(MULT_REGS_C downto 0);
+    signal valid_pipe       : std_logic_vector(MAC_DELAY_C downto 0);
+
+    -- Final partial sums of all lanes, (result * NUM_LANES_G + lane) * MAC_PIPELINE_G + k
+    signal partial_sums : StlvArray_t(NUM_RESULTS_C * NUM_LEAVES_C - 1 downto 0)(RESULT_WIDTH_C - 1 downto 0);
+
+    ----------------------------------------------------------------------------
+    -- Adder tree signals
+    ----------------------------------------------------------------------------
+    signal results       : StlvArray_t(NUM_RESULTS_C - 1 downto 0)(RESULT_WIDTH_C - 1 downto 0);
+    signal results_valid : std_logic;
 
 begin
 
+    assert LANE_LENGTH_C >= 2
+        report "fix_dot_product: every lane needs at least 2 elements, reduce NUM_LANES_G"
+        severity failure;
+
+    assert LANE_LENGTH_C >= MAC_PIPELINE_G
+        report "fix_dot_product: every lane needs at least MAC_PIPELINE_G elements"
+        severity failure;
+
+    assert MAC_PIPELINE_G = 1 or not SKIP_ZEROS_G
+        report "fix_dot_product: MAC_PIPELINE_G > 1 is not supported with SKIP_ZEROS_G"
+        severity failure;
+
+    assert MAC_PIPELINE_G = 1 or not DOUBLE_PUMP_G
+        report "fix_dot_product: MAC_PIPELINE_G > 1 is not supported with DOUBLE_PUMP_G"
+        severity failure;
+
+    assert not (PACKED_G and (DOUBLE_PUMP_G or SKIP_ZEROS_G))
+        report "fix_dot_product: PACKED_G is not supported with DOUBLE_PUMP_G or SKIP_ZEROS_G"
+        severity failure;
+
+    g_lane : for lane in 0 to NUM_LANES_G - 1 generate
+
+        -- With DOUBLE_PUMP_G the lane results come from the shared MACs
+        g_mac : if not DOUBLE_PUMP_G and not PACKED_G generate
+
+            --------------------------------------------------------------------
+            -- MAC (Multiply and ACcumulate)
+            --------------------------------------------------------------------
+            u_fix_dsp_mac : entity work.fix_dsp_mac
+                generic map (
+                    FMT_MULT_A_G => FMT_IN_ELEMENT_A_G,
+                    FMT_MULT_B_G => FMT_IN_ELEMENT_B_G,
+                    FMT_ADD_G    => FMT_OUT_RESULT_G,
+                    FMT_RESULT_G => FMT_OUT_RESULT_G,
+
+                    MULT_OP_REGS_G => MULT_REGS_C,
+                    ADD_OP_REGS_G  => MAC_PIPELINE_G
+                )
+                port map (
+                    clk_i => clk_i,
+                    rst_i => rst_i,
+
+                    in_valid_i  => '1',
+                    in_mult_a_i => r.vector_a(lane * LANE_LENGTH_C + r.idx),
+                    in_mult_b_i => r.vector_b(lane * LANE_LENGTH_C + r.idx),
+                    in_add_i    => mac_accumulator(lane),
+
+                    out_valid_o  => open,
+                    out_result_o => mac_result(lane)
+                );
+
+        end generate;
+
+        g_packed_mac : if PACKED_G generate
+
+            --------------------------------------------------------------------
+            -- Packed MAC (a * b and c * b in one multiplier)
+            --------------------------------------------------------------------
+            u_fix_dsp_mac_packed : entity work.fix_dsp_mac_packed
+                generic map (
+                    FMT_MULT_A_G => FMT_IN_ELEMENT_A_G,
+                    FMT_MULT_B_G => FMT_IN_ELEMENT_B_G,
+                    FMT_ADD_G    => FMT_OUT_RESULT_G,
+                    FMT_RESULT_G => FMT_OUT_RESULT_G,
+
+                    MULT_OP_REGS_G => MULT_REGS_C,
+                    ADD_OP_REGS_G  => MAC_PIPELINE_G
+                )
+                port map (
+                    clk_i => clk_i,
+                    rst_i => rst_i,
+
+                    in_valid_i   => '1',
+                    in_mult_a0_i => r.vector_a(lane * LANE_LENGTH_C + r.idx),
+                    in_mult_a1_i => r.vector_c(lane * LANE_LENGTH_C + r.idx),
+                    in_mult_b_i  => r.vector_b(lane * LANE_LENGTH_C + r.idx),
+                    in_add0_i    => mac_accumulator(lane),
+                    in_add1_i    => mac_accumulator(NUM_LANES_G + lane),
+
+                    out_valid_o   => open,
+                    out_result0_o => mac_result(lane),
+                    out_result1_o => mac_result(NUM_LANES_G + lane)
+                );
+
+        end generate;
+
+    end generate;
+
+    g_sum : for sum in 0 to NUM_RESULTS_C * NUM_LANES_G - 1 generate
+        -- Final partial sums of the lane, the oldest at index 0
+        signal lane_sums : StlvArray_t(MAC_PIPELINE_G - 1 downto 0)(RESULT_WIDTH_C - 1 downto 0);
+    begin
+
+        ------------------------------------------------------------------------
+        -- Feedback MUX
+        ------------------------------------------------------------------------
+        -- The MAC result is the partial sum MAC_PIPELINE_G elements back
+        mac_accumulator(sum) <= mac_result(sum) when mac_feedback_sel = '1' else (others => '0');
+
+        ------------------------------------------------------------------------
+        -- Partial Sums
+        ------------------------------------------------------------------------
+        -- The final partial sums leave the MAC on MAC_PIPELINE_G consecutive
+        -- cycles, the last one is the MAC result itself.
+        lane_sums(MAC_PIPELINE_G - 1) <= mac_result(sum);
+
+        g_partial : if MAC_PIPELINE_G > 1 generate
+            p_partial : process(clk_i) is
+            begin
+                if rising_edge(clk_i) then
+                    lane_sums(MAC_PIPELINE_G - 2 downto 0) <= lane_sums(MAC_PIPELINE_G - 1 downto 1);
+                end if;
+            end process;
+        end generate;
+
+        partial_sums((sum + 1) * MAC_PIPELINE_G - 1 downto sum * MAC_PIPELINE_G) <= lane_sums;
+
+    end generate;
+
     ----------------------------------------------------------------------------
-    -- MAC (Multiply and ACcumulate)
+    -- Double Pump
     ----------------------------------------------------------------------------
-    u_fix_dsp_mac : entity work.fix_dsp_mac
-        generic map (
-            FMT_MULT_A_G => FMT_IN_ELEMENT_A_G,
-            FMT_MULT_B_G => FMT_IN_ELEMENT_B_G,
-            FMT_ADD_G    => FMT_OUT_RESULT_G,
-            FMT_RESULT_G => FMT_OUT_RESULT_G
-        )
-        port map (
-            clk_i => clk_i,
-            rst_i => rst_i,
+    -- Lanes 2 * m and 2 * m + 1 share MAC m, which runs on clk2x_i and
+    -- alternates between them: the first clk2x_i cycle of a clk_i cycle
+    -- multiplies the element of the even lane, the second one of the odd
+    -- lane. The accumulator loop has two registers, so the MAC result is
+    -- always the sum of the same lane. All crossings are register to
+    -- register between the aligned clocks:
+    --   clk_i -> clk2x_i : operands and feedback select, sampled on both
+    --                      clk2x_i edges of a clk_i cycle
+    --   clk2x_i -> clk_i : lane results, updated on the clk2x_i edges that
+    --                      coincide with clk_i edges and held for a clk_i cycle
+    g_pump : if DOUBLE_PUMP_G generate
+        -- pump_toggle flips every clk_i cycle, its clk2x_i copy lags by one
+        -- clk2x_i cycle, they differ in the first clk2x_i cycle
+        signal pump_toggle    : std_logic := '0';
+        signal pump_toggle_2x : std_logic := '0';
+        signal pump_first     : std_logic;
+        -- feedback_mux_sel aligned with the operand and product registers
+        signal pump_feedback  : std_logic_vector(1 downto 0);
+    begin
 
-            in_valid_i  => '1',
-            in_mult_a_i => r.vector_a(r.idx),
-            in_mult_b_i => r.vector_b(r.idx),
-            in_add_i    => mac_accumulator,
+        p_toggle : process(clk_i) is
+        begin
+            if rising_edge(clk_i) then
+                pump_toggle <= not pump_toggle;
+            end if;
+        end process;
 
-            out_valid_o  => open,
-            out_result_o => mac_result
-        );
+        p_toggle_2x : process(clk2x_i) is
+        begin
+            if rising_edge(clk2x_i) then
+                pump_toggle_2x <= pump_toggle;
+                pump_feedback  <= pump_feedback(0) & r.feedback_mux_sel;
+            end if;
+        end process;
+
+        pump_first <= pump_toggle xor pump_toggle_2x;
+
+        g_shared : for mac in 0 to NUM_MACS_C - 1 generate
+            -- An odd last lane uses both cycles of its MAC, its result is taken from the even one
+            constant LANE_A_C : natural := 2 * mac;
+            constant LANE_B_C : natural := minimum(2 * mac + 1, NUM_LANES_G - 1);
+
+            signal pump_a      : std_logic_vector(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0);
+            signal pump_b      : std_logic_vector(fixFmtWidthFromString(FMT_IN_ELEMENT_B_G) - 1 downto 0);
+            signal accumulator : std_logic_vector(RESULT_WIDTH_C - 1 downto 0);
+            signal result      : std_logic_vector(RESULT_WIDTH_C - 1 downto 0);
+            -- Lane results in the clk2x_i domain, result_a_early until the odd lane is ready
+            signal result_a_early : std_logic_vector(RESULT_WIDTH_C - 1 downto 0);
+            signal result_a       : std_logic_vector(RESULT_WIDTH_C - 1 downto 0);
+            signal result_b       : std_logic_vector(RESULT_WIDTH_C - 1 downto 0);
+        begin
+
+            p_pump : process(clk2x_i) is
+            begin
+                if rising_edge(clk2x_i) then
+                    -- Operands of the lane of this clk2x_i cycle
+                    if (pump_first = '1') then
+                        pump_a <= r.vector_a(LANE_A_C * LANE_LENGTH_C + r.idx);
+                        pump_b <= r.vector_b(LANE_A_C * LANE_LENGTH_C + r.idx);
+                    else
+                        pump_a <= r.vector_a(LANE_B_C * LANE_LENGTH_C + r.idx);
+                        pump_b <= r.vector_b(LANE_B_C * LANE_LENGTH_C + r.idx);
+                    end if;
+
+                    -- The even lane result leaves the MAC in the first
+                    -- clk2x_i cycle, the odd one in the second
+                    if (pump_first = '1') then
+                        result_a_early <= result;
+                    else
+                        result_a <= result_a_early;
+                        result_b <= result;
+                    end if;
+                end if;
+            end process;
+
+            u_fix_dsp_mac : entity work.fix_dsp_mac
+                generic map (
+                    FMT_MULT_A_G => FMT_IN_ELEMENT_A_G,
+                    FMT_MULT_B_G => FMT_IN_ELEMENT_B_G,
+                    FMT_ADD_G    => FMT_OUT_RESULT_G,
+                    FMT_RESULT_G => FMT_OUT_RESULT_G,
+
+                    MULT_OP_REGS_G => 1,
+                    ADD_OP_REGS_G  => 2
+                )
+                port map (
+                    clk_i => clk2x_i,
+                    rst_i => rst_i,
+
+                    in_valid_i  => '1',
+                    in_mult_a_i => pump_a,
+                    in_mult_b_i => pump_b,
+                    in_add_i    => accumulator,
+
+                    out_valid_o  => open,
+                    out_result_o => result
+                );
+
+            -- The MAC result is the sum of the same lane one clk_i cycle back
+            accumulator <= result when pump_feedback(1) = '1' else (others => '0');
+
+            -- Back to the clk_i domain
+            p_result : process(clk_i) is
+            begin
+                if rising_edge(clk_i) then
+                    mac_result(LANE_A_C) <= result_a;
+                    if (LANE_B_C /= LANE_A_C) then
+                        mac_result(LANE_B_C) <= result_b;
+                    end if;
+                end if;
+            end process;
+
+        end generate;
+    end generate;
+
+    ----------------------------------------------------------------------------
+    -- MAC Pipeline
+    ----------------------------------------------------------------------------
+    -- Align the feedback select with the registered products and the valid
+    -- with the last partial sum. Both are wires with MAC_PIPELINE_G = 1 and
+    -- without DOUBLE_PUMP_G.
+    feedback_pipe(0) <= r.feedback_mux_sel;
+    valid_pipe(0)    <= r.out_valid;
+
+    g_feedback_pipeline : if MULT_REGS_C > 0 generate
+        p_feedback_pipeline : process(clk_i) is
+        begin
+            if rising_edge(clk_i) then
+                feedback_pipe(MULT_REGS_C downto 1) <= feedback_pipe(MULT_REGS_C - 1 downto 0);
+            end if;
+        end process;
+    end generate;
+
+    g_valid_pipeline : if MAC_DELAY_C > 0 generate
+        p_valid_pipeline : process(clk_i) is
+        begin
+            if rising_edge(clk_i) then
+                valid_pipe(MAC_DELAY_C downto 1) <= valid_pipe(MAC_DELAY_C - 1 downto 0);
+                if (rst_i = '1') then
+                    valid_pipe(MAC_DELAY_C downto 1) <= (others => '0');
+                end if;
+            end if;
+        end process;
+    end generate;
+
+    mac_feedback_sel <= feedback_pipe(MULT_REGS_C);
+    mac_valid        <= valid_pipe(MAC_DELAY_C);
 
     ----------------------------------------------------------------------------
-    -- Feedback MUX
+    -- Adder Tree
     ----------------------------------------------------------------------------
-    mac_accumulator <= mac_result when r.feedback_mux_sel = '1' else (others => '0');
-    out_result_o    <= mac_result;
+    -- Registered pairwise sums of the partial sums in the result format, an
+    -- odd last node is delayed to the next level. With a single lane and
+    -- MAC_PIPELINE_G = 1 the MAC result is the output as before. With
+    -- PACKED_G the results of a and c have their own tree.
+    g_result : for result in 0 to NUM_RESULTS_C - 1 generate
+        signal tree       : TreeLevel_t(0 to TREE_LEVELS_C)(NUM_LEAVES_C - 1 downto 0)(RESULT_WIDTH_C - 1 downto 0);
+        signal tree_valid : std_logic_vector(0 to TREE_LEVELS_C);
+    begin
+
+        tree(0)       <= partial_sums((result + 1) * NUM_LEAVES_C - 1 downto result * NUM_LEAVES_C);
+        tree_valid(0) <= mac_valid;
+
+        g_tree : for level in 1 to TREE_LEVELS_C generate
+            g_node : for node in 0 to tree_nodes(level) - 1 generate
+
+                g_add : if 2 * node + 1 < tree_nodes(level - 1) generate
+                    signal node_valid : std_logic;
+                begin
+                    u_olo_fix_add : entity olo.olo_fix_add
+                        generic map (
+                            AFmt_g      => FMT_OUT_RESULT_G,
+                            BFmt_g      => FMT_OUT_RESULT_G,
+                            ResultFmt_g => FMT_OUT_RESULT_G,
+                            Round_g     => FixRound_Trunc_c,
+                            Saturate_g  => FixSaturate_Warn_c,
+                            OpRegs_g    => 1,
+                            RoundReg_g  => "NO",
+                            SatReg_g    => "NO"
+                        )
+                        port map (
+                            Clk => clk_i,
+                            Rst => rst_i,
+
+                            In_Valid => tree_valid(level - 1),
+                            In_A     => tree(level - 1)(2 * node),
+                            In_B     => tree(level - 1)(2 * node + 1),
+
+                            Out_Valid  => node_valid,
+                            Out_Result => tree(level)(node)
+                        );
+
+                    -- All nodes of a level are valid together
+                    g_valid : if node = 0 generate
+                        tree_valid(level) <= node_valid;
+                    end generate;
+                end generate;
+
+                g_pass : if 2 * node + 1 >= tree_nodes(level - 1) generate
+                    p_pass : process(clk_i) is
+                    begin
+                        if rising_edge(clk_i) then
+                            tree(level)(node) <= tree(level - 1)(2 * node);
+                        end if;
+                    end process;
+                end generate;
+
+            end generate;
+
+            -- Unused nodes
+            g_unused : if tree_nodes(level) < NUM_LEAVES_C generate
+                tree(level)(NUM_LEAVES_C - 1 downto tree_nodes(level)) <= (others => (others => '0'));
+            end generate;
+        end generate;
+
+        results(result) <= tree(TREE_LEVELS_C)(0);
+
+        -- Both trees are valid together
+        g_valid : if result = 0 generate
+            results_valid <= tree_valid(TREE_LEVELS_C);
+        end generate;
+    end generate;
+
+    out_result_o   <= results(0);
+    out_result_c_o <= results(NUM_RESULTS_C - 1);
 
     ----------------------------------------------------------------------------
     -- Combinatorial process
@@ -130,38 +550,100 @@ begin
             --------------------------------------------------------------------
             when IDLE_S =>
                 v.feedback_mux_sel := '0';
+                v.feeds            := 0;
                 v.idx              := 0;
 
                 v.in_ready := '1';
                 if in_valid_i = '1' and r.in_ready = '1' then
                     v.in_ready := '0';
 
-                    -- Register Vectors
-                    v.vector_a := in_vector_a_i;
-                    v.vector_b := in_vector_b_i;
+                    -- Register Vectors, padding elements are zero
+                    v.vector_a := (others => (others => '0'));
+                    v.vector_b := (others => (others => '0'));
+                    v.vector_a(DIMENSION_WIDTH_G - 1 downto 0) := in_vector_a_i;
+                    v.vector_b(DIMENSION_WIDTH_G - 1 downto 0) := in_vector_b_i;
+                    if PACKED_G then
+                        v.vector_c := (others => (others => '0'));
+                        v.vector_c(DIMENSION_WIDTH_G - 1 downto 0) := in_vector_c_i;
+                    end if;
 
                     v.idx   := r.idx + 1;
                     v.state := CALCULATE_S;
+
+                    -- Skip zero elements, without nonzero elements after
+                    -- element 0 CALCULATE_S is skipped entirely.
+                    if SKIP_ZEROS_G then
+                        v.nonzero := nonzero_elements(v.vector_a);
+                        v.idx     := next_nonzero(v.nonzero, 0);
+                        if (v.idx = 0) then
+                            v.state := FINISHED_S;
+                            if STREAMING_G then
+                                v.in_ready := '1';
+                            end if;
+                        end if;
+                    end if;
                 end if;
 
             --------------------------------------------------------------------
             when CALCULATE_S =>
-                v.feedback_mux_sel := '1';
-                v.idx              := r.idx + 1;
+                -- The first MAC_PIPELINE_G elements start the partial sums
+                v.feeds := minimum(r.feeds + 1, MAC_PIPELINE_G);
+                if (v.feeds = MAC_PIPELINE_G) then
+                    v.feedback_mux_sel := '1';
+                end if;
+                v.idx := r.idx + 1;
+                if SKIP_ZEROS_G then
+                    v.idx := next_nonzero(r.nonzero, r.idx);
+                end if;
 
-                if (r.idx = DIMENSION_WIDTH_G - 1) then
+                if (r.idx = LANE_LENGTH_C - 1) or (SKIP_ZEROS_G and v.idx = 0) then
                     v.idx   := 0;
                     v.state := FINISHED_S;
+
+                    -- Streaming: accept the next vectors already in FINISHED_S
+                    if STREAMING_G then
+                        v.in_ready := '1';
+                    end if;
                 end if;
 
             --------------------------------------------------------------------
             when FINISHED_S =>
                 v.feedback_mux_sel := '0';
+                v.feeds            := 0;
                 v.out_valid        := '1';
                 v.in_ready         := '1';
 
                 v.state := IDLE_S;
 
+                -- Streaming: the last element is multiplied in this cycle,
+                -- the next vectors start without passing IDLE_S.
+                if STREAMING_G and in_valid_i = '1' and r.in_ready = '1' then
+                    v.in_ready := '0';
+
+                    -- Register Vectors, padding elements are zero
+                    v.vector_a := (others => (others => '0'));
+                    v.vector_b := (others => (others => '0'));
+                    v.vector_a(DIMENSION_WIDTH_G - 1 downto 0) := in_vector_a_i;
+                    v.vector_b(DIMENSION_WIDTH_G - 1 downto 0) := in_vector_b_i;
+                    if PACKED_G then
+                        v.vector_c := (others => (others => '0'));
+                        v.vector_c(DIMENSION_WIDTH_G - 1 downto 0) := in_vector_c_i;
+                    end if;
+
+                    v.idx   := 1;
+                    v.state := CALCULATE_S;
+
+                    -- Skip zero elements, see IDLE_S
+                    if SKIP_ZEROS_G then
+                        v.nonzero := nonzero_elements(v.vector_a);
+                        v.idx     := next_nonzero(v.nonzero, 0);
+                        if (v.idx = 0) then
+                            v.state    := FINISHED_S;
+                            v.in_ready := '1';
+                        end if;
+                    end if;
+                end if;
+
             --------------------------------------------------------------------
             when others =>
                 null;
@@ -179,7 +661,7 @@ begin
     -- In Interface
     in_ready_o <= r.in_ready;
     -- Out Interface
-    out_valid_o <= r.out_valid;
+    out_valid_o <= results_valid;
 
     ----------------------------------------------------------------------------
     -- Sequential Process
@@ -192,7 +674,9 @@ begin
                 r.in_ready         <= '1';
                 r.out_valid        <= '0';
                 r.feedback_mux_sel <= '0';
+                r.feeds            <= 0;
                 r.idx              <= 0;
+                r.nonzero          <= (others => '0');
                 r.state            <= IDLE_S;
             end if;
         end if;
@@ -12,10 +12,16 @@ import numpy as np
 
 #Import olo_fix
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../submodules/open-logic/src/fix/python")))
-from olo_fix import olo_fix_cosim, olo_fix_utils, olo_fix_plots
+from olo_fix import olo_fix_cosim, olo_fix_utils
 from olo_fix import olo_fix_mult, olo_fix_add
 from en_cl_fix_pkg import *
 
+#Import fixed point kernels
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../fix_model/python")))
+from fix_kernel import FixDotKernel
+from fix_stimuli import FixStimuli, quantize
+import fix_profile
+
 ################################################################################
 # Functions
 ################################################################################
@@ -24,7 +30,11 @@ def cosim(output_path : str = None,
           cosim_mode : bool = True):
 
     #Parse Generics
+    fix_profile.mark("parse_generics")
     DIMENSION_WIDTH_G = generics["DIMENSION_WIDTH_G"]
+    NUM_LANES_G = generics.get("NUM_LANES_G", 1)
+    MAC_PIPELINE_G = generics.get("MAC_PIPELINE_G", 1)
+    PACKED_G = generics.get("PACKED_G", False)
 
     FMT_IN_ELEMENT_A_G = olo_fix_utils.fix_format_from_string(generics["FMT_IN_ELEMENT_A_G"])
     FMT_IN_ELEMENT_B_G = olo_fix_utils.fix_format_from_string(generics["FMT_IN_ELEMENT_B_G"])
@@ -33,71 +43,41 @@ def cosim(output_path : str = None,
     Round = FixRound.Trunc_s
     Saturate = FixSaturate.Warn_s
 
-    np.random.seed(42)  # Set the seed for reproducibility
-    # Generate N vectors
-    NUM_RANDOM_A = 3
-    #in_vector_a_i = np.array()
-    vector_a_seed = []
-    vector_a_seed.append(np.full(DIMENSION_WIDTH_G ,cl_fix_max_value(FMT_IN_ELEMENT_A_G)))
-    vector_a_seed.append(np.full(DIMENSION_WIDTH_G ,cl_fix_min_value(FMT_IN_ELEMENT_A_G)))
-    for i in range(NUM_RANDOM_A):
-        vector_a_seed.append(np.random.uniform(cl_fix_min_value(FMT_IN_ELEMENT_A_G), cl_fix_max_value(FMT_IN_ELEMENT_A_G), DIMENSION_WIDTH_G))
-
-    vector_a_seed = np.stack(vector_a_seed)
-    vector_a_seed = cl_fix_from_real(vector_a_seed, FMT_IN_ELEMENT_A_G)
-
-    NUM_RANDOM_B = 3
-    vector_b_seed = []
-    vector_b_seed.append(np.full(DIMENSION_WIDTH_G ,cl_fix_max_value(FMT_IN_ELEMENT_B_G)))
-    vector_b_seed.append(np.full(DIMENSION_WIDTH_G ,cl_fix_min_value(FMT_IN_ELEMENT_B_G)))
-    for i in range(NUM_RANDOM_B):
-        vector_b_seed.append(np.random.uniform(cl_fix_min_value(FMT_IN_ELEMENT_B_G), cl_fix_max_value(FMT_IN_ELEMENT_B_G), DIMENSION_WIDTH_G))
+    fix_profile.mark("stimuli")
+    # Seed vectors: max, min, uniform and heavy-tailed. Every seed vector a
+    # is paired with every seed vector b.
+    stimuli = FixStimuli.for_config(generics)
+    vector_a_seed = stimuli.draw_real("vector_a", FMT_IN_ELEMENT_A_G, DIMENSION_WIDTH_G, corners=True, uniform=2, heavy=1)
+    vector_b_seed = stimuli.draw_real("vector_b", FMT_IN_ELEMENT_B_G, DIMENSION_WIDTH_G, corners=True, uniform=2, heavy=1)
 
-    vector_b_seed = np.stack(vector_b_seed)
-    vector_b_seed = cl_fix_from_real(vector_b_seed, FMT_IN_ELEMENT_B_G)
-
-    vector_a = []
-    vector_b = []
-    n_a = len(vector_a_seed)
-    n_b = len(vector_b_seed)
-    for a_i in range(n_a):
-        for b_i in range(n_b):
-            vector_a.append(vector_a_seed[a_i])
-            vector_b.append(vector_b_seed[b_i])
-
-    vector_a = np.stack(vector_a)
-    vector_b = np.stack(vector_b)
+    vector_a = quantize(np.repeat(vector_a_seed, len(vector_b_seed), axis=0), FMT_IN_ELEMENT_A_G)
+    vector_b = quantize(np.tile(vector_b_seed, (len(vector_a_seed), 1)), FMT_IN_ELEMENT_B_G)
 
     #Calculation
+    fix_profile.mark("model")
 
-    MultClass = olo_fix_mult(FMT_IN_ELEMENT_A_G, FMT_IN_ELEMENT_B_G, FMT_OUT_RESULT_G, Round, Saturate)
-
-    mult_result = []
-
-    for a,b in zip(vector_a, vector_b):
-        mult_result.append(MultClass.process(a, b))
-    
-    mult_result = np.stack(mult_result)
-
-    AddClass = olo_fix_add(FMT_OUT_RESULT_G, FMT_OUT_RESULT_G, FMT_OUT_RESULT_G, Round, Saturate)
-
-    from functools import reduce
-
-    result = []
-    for mr in mult_result:
-        result.append(reduce(AddClass.process, mr))
+    DotKernel = FixDotKernel(FMT_IN_ELEMENT_A_G, FMT_IN_ELEMENT_B_G, FMT_OUT_RESULT_G, Round, Saturate, num_lanes=NUM_LANES_G,
+                             mac_pipeline=MAC_PIPELINE_G)
+    result = DotKernel.process(vector_a, vector_b)
 
-    result = np.stack(result)
+    # PACKED_G: the second vector a shares b, the vectors in reverse order
+    if PACKED_G:
+        vector_c = vector_a[::-1]
+        result_c = DotKernel.process(vector_c, vector_b)
 
     if not cosim_mode:
         pass
 
     #Write Files
+    fix_profile.mark("write")
     if cosim_mode:
         writer = olo_fix_cosim(output_path)
         writer.write_cosim_file(vector_a, FMT_IN_ELEMENT_A_G, "vector_a.fix", dim=DIMENSION_WIDTH_G)
         writer.write_cosim_file(vector_b, FMT_IN_ELEMENT_B_G, "vector_b.fix", dim=DIMENSION_WIDTH_G)
         writer.write_cosim_file(result, FMT_OUT_RESULT_G, "result.fix")
+        if PACKED_G:
+            writer.write_cosim_file(vector_c, FMT_IN_ELEMENT_A_G, "vector_c.fix", dim=DIMENSION_WIDTH_G)
+            writer.write_cosim_file(result_c, FMT_OUT_RESULT_G, "result_c.fix")
     return True
 
 ################################################################################
@@ -33,6 +33,12 @@ use work.olo_test_fix_checker_pkg.all;
 entity fix_dot_product_vunit_tb is
     generic (
         DIMENSION_WIDTH_G : natural := 32;
+        STREAMING_G       : boolean  := false;
+        NUM_LANES_G       : positive := 1;
+        SKIP_ZEROS_G      : boolean  := false;
+        MAC_PIPELINE_G    : positive := 1;
+        DOUBLE_PUMP_G     : boolean  := false;
+        PACKED_G          : boolean  := false;
 
         FMT_IN_ELEMENT_A_G : string := "(0,4,4)";
         FMT_IN_ELEMENT_B_G : string := "(0,4,4)";
@@ -53,16 +59,19 @@ architecture sim of fix_dot_product_vunit_tb is
     -----------------------------------------------------------------------------------------------
     -- Interface Signals
     -----------------------------------------------------------------------------------------------
-    signal clk_i : std_logic := '0';
-    signal rst_i : std_logic := '0';
+    signal clk_i   : std_logic := '0';
+    signal rst_i   : std_logic := '0';
+    signal clk2x_i : std_logic := '1';
 
     signal in_valid_i    : std_logic;
     signal in_ready_o    : std_logic;
     signal in_vector_a_i : StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0);
     signal in_vector_b_i : StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_B_G) - 1 downto 0);
+    signal in_vector_c_i : StlvArray_t(DIMENSION_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_ELEMENT_A_G) - 1 downto 0) := (others => (others => '0'));
 
-    signal out_valid_o  : std_logic;
-    signal out_result_o : std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+    signal out_valid_o    : std_logic;
+    signal out_result_o   : std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+    signal out_result_c_o : std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
 
     -----------------------------------------------------------------------------------------------
     -- TB Definitions
@@ -71,13 +80,18 @@ architecture sim of fix_dot_product_vunit_tb is
     -- *** Verification Components ***
     constant STIMULI_VECTOR_A_C : olo_test_fix_stimuli_t := new_olo_test_fix_stimuli;
     constant STIMULI_VECTOR_B_C : olo_test_fix_stimuli_t := new_olo_test_fix_stimuli;
+    constant STIMULI_VECTOR_C_C : olo_test_fix_stimuli_t := new_olo_test_fix_stimuli;
 
-    constant CHECKER_RESULT_C : olo_test_fix_checker_t := new_olo_test_fix_checker;
+    constant CHECKER_RESULT_C   : olo_test_fix_checker_t := new_olo_test_fix_checker;
+    constant CHECKER_RESULT_C_C : olo_test_fix_checker_t := new_olo_test_fix_checker;
 
     -- *** Constants ***
     constant VECTOR_A_FILE_C : string := output_path(runner_cfg) & "vector_a.fix";
     constant VECTOR_B_FILE_C : string := output_path(runner_cfg) & "vector_b.fix";
     constant RESULT_FILE_C   : string := output_path(runner_cfg) & "result.fix";
+    -- Only used with PACKED_G
+    constant VECTOR_C_FILE_C : string := output_path(runner_cfg) & "vector_c.fix";
+    constant RESULT_C_FILE_C : string := output_path(runner_cfg) & "result_c.fix";
 
 begin
 
@@ -104,6 +118,10 @@ begin
             if run("FullSpeed") then
                 fix_stimuli_play_file (net, STIMULI_VECTOR_A_C, VECTOR_A_FILE_C);
                 fix_stimuli_play_file (net, STIMULI_VECTOR_B_C, VECTOR_B_FILE_C);
+                if PACKED_G then
+                    fix_stimuli_play_file (net, STIMULI_VECTOR_C_C, VECTOR_C_FILE_C);
+                    fix_checker_check_file (net, CHECKER_RESULT_C_C, RESULT_C_FILE_C);
+                end if;
 
                 fix_checker_check_file (net, CHECKER_RESULT_C, RESULT_FILE_C);
             end if;
@@ -112,6 +130,10 @@ begin
             if run("Throttled") then
                 fix_stimuli_play_file (net, STIMULI_VECTOR_A_C, VECTOR_A_FILE_C, stall_probability => 0.5, stall_max_cycles => 10);
                 fix_stimuli_play_file (net, STIMULI_VECTOR_B_C, VECTOR_B_FILE_C);
+                if PACKED_G then
+                    fix_stimuli_play_file (net, STIMULI_VECTOR_C_C, VECTOR_C_FILE_C);
+                    fix_checker_check_file (net, CHECKER_RESULT_C_C, RESULT_C_FILE_C);
+                end if;
 
                 fix_checker_check_file (net, CHECKER_RESULT_C, RESULT_FILE_C);
             end if;
@@ -120,6 +142,10 @@ begin
             wait_until_idle(net, as_sync(STIMULI_VECTOR_A_C));
             wait_until_idle(net, as_sync(STIMULI_VECTOR_B_C));
             wait_until_idle(net, as_sync(CHECKER_RESULT_C));
+            if PACKED_G then
+                wait_until_idle(net, as_sync(STIMULI_VECTOR_C_C));
+                wait_until_idle(net, as_sync(CHECKER_RESULT_C_C));
+            end if;
             wait for 1 us;
 
         end loop;
@@ -132,25 +158,36 @@ begin
     -- Clock
     -----------------------------------------------------------------------------------------------
     clk_i <= not clk_i after 0.5*CLK_PERIOD_C;
+    -- Rising edges aligned with clk_i (starts high)
+    clk2x_i <= not clk2x_i after 0.25*CLK_PERIOD_C;
 
     dut : entity work.fix_dot_product
         generic map (
             DIMENSION_WIDTH_G  => DIMENSION_WIDTH_G,
+            STREAMING_G        => STREAMING_G,
+            NUM_LANES_G        => NUM_LANES_G,
+            SKIP_ZEROS_G       => SKIP_ZEROS_G,
+            MAC_PIPELINE_G     => MAC_PIPELINE_G,
+            DOUBLE_PUMP_G      => DOUBLE_PUMP_G,
+            PACKED_G           => PACKED_G,
             FMT_IN_ELEMENT_A_G => FMT_IN_ELEMENT_A_G,
             FMT_IN_ELEMENT_B_G => FMT_IN_ELEMENT_B_G,
             FMT_OUT_RESULT_G   => FMT_OUT_RESULT_G
         )
         port map (
-            clk_i => clk_i,
-            rst_i => rst_i,
+            clk_i   => clk_i,
+            rst_i   => rst_i,
+            clk2x_i => clk2x_i,
 
             in_valid_i    => in_valid_i,
             in_ready_o    => in_ready_o,
             in_vector_a_i => in_vector_a_i,
             in_vector_b_i => in_vector_b_i,
+            in_vector_c_i => in_vector_c_i,
 
-            out_valid_o  => out_valid_o,
-            out_result_o => out_result_o
+            out_valid_o    => out_valid_o,
+            out_result_o   => out_result_o,
+            out_result_c_o => out_result_c_o
         );
 
     -----------------------------------------------------------------------------------------------
@@ -187,6 +224,38 @@ begin
             Data  => in_vector_b_i
         );
 
+    g_packed : if PACKED_G generate
+
+        vc_stimuli_vector_c : entity work.olo_test_fix_stimuli_array_vc
+            generic map (
+                Instance => STIMULI_VECTOR_C_C,
+                Dim      => DIMENSION_WIDTH_G,
+                Fmt      => cl_fix_format_from_string(FMT_IN_ELEMENT_A_G),
+                Is_Timing_Master => false
+            )
+            port map (
+                Clk => clk_i,
+                Rst => rst_i,
+
+                Valid => in_valid_i,
+                Ready => in_ready_o,
+                Data  => in_vector_c_i
+            );
+
+        vc_checker_result_c : entity work.olo_test_fix_checker_vc
+            generic map (
+                Instance => CHECKER_RESULT_C_C,
+                Fmt      => cl_fix_format_from_string(FMT_OUT_RESULT_G)
+            )
+            port map (
+                Clk => clk_i,
+
+                Valid => out_valid_o,
+                Data  => out_result_c_o
+            );
+
+    end generate;
+
     vc_checker_result : entity work.olo_test_fix_checker_vc
         generic map (
             Instance => CHECKER_RESULT_C,
@@ -0,0 +1,222 @@
+--------------------------------------------------------------------------------
+-- fix_dsp_mac_packed
+--------------------------------------------------------------------------------
+
+--------------------------------------------------------------------------------
+-- Libraries
+--------------------------------------------------------------------------------
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+use ieee.math_real.all;
+
+library olo;
+use olo.en_cl_fix_pkg.all;
+use olo.olo_fix_pkg.all;
+
+--------------------------------------------------------------------------------
+-- Entity
+--------------------------------------------------------------------------------
+-- Two MACs sharing the operand b and a single multiplier:
+--   out_result0_o = in_mult_a0_i * in_mult_b_i + in_add0_i
+--   out_result1_o = in_mult_a1_i * in_mult_b_i + in_add1_i
+entity fix_dsp_mac_packed is
+    generic(
+        FMT_MULT_A_G : string;
+        FMT_MULT_B_G : string;
+        FMT_ADD_G    : string;
+        FMT_RESULT_G : string;
+
+        MULT_OP_REGS_G : natural := 0;
+
+        ADD_ROUND_G     : string  := FixRound_Trunc_c;
+        ADD_SATURATE_G  : string  := FixSaturate_Warn_c;
+        ADD_OP_REGS_G   : natural := 1;
+        ADD_ROUND_REG_G : string  := "NO";
+        ADD_SAT_REG_G   : string  := "NO"
+    );
+    port (
+        clk_i : in std_logic;
+        rst_i : in std_logic;
+
+        ------------------------------------------------------------------------
+        -- Input Interface
+        ------------------------------------------------------------------------
+        in_valid_i   : in std_logic := '1';
+        in_mult_a0_i : in std_logic_vector(fixFmtWidthFromString(FMT_MULT_A_G) - 1 downto 0);
+        in_mult_a1_i : in std_logic_vector(fixFmtWidthFromString(FMT_MULT_A_G) - 1 downto 0);
+        in_mult_b_i  : in std_logic_vector(fixFmtWidthFromString(FMT_MULT_B_G) - 1 downto 0);
+        in_add0_i    : in std_logic_vector(fixFmtWidthFromString(FMT_ADD_G) - 1 downto 0);
+        in_add1_i    : in std_logic_vector(fixFmtWidthFromString(FMT_ADD_G) - 1 downto 0);
+
+        ------------------------------------------------------------------------
+        -- Output Interface
+        ------------------------------------------------------------------------
+        out_valid_o   : out std_logic;
+        out_result0_o : out std_logic_vector(fixFmtWidthFromString(FMT_RESULT_G) - 1 downto 0);
+        out_result1_o : out std_logic_vector(fixFmtWidthFromString(FMT_RESULT_G) - 1 downto 0)
+    );
+end entity fix_dsp_mac_packed;
+
+architecture rtl of fix_dsp_mac_packed is
+
+    ----------------------------------------------------------------------------
+    -- Constants
+    ----------------------------------------------------------------------------
+    constant FIX_FMT_MULT_A_C : FixFormat_t := cl_fix_format_from_string(FMT_MULT_A_G);
+    constant FIX_FMT_MULT_B_C : FixFormat_t := cl_fix_format_from_string(FMT_MULT_B_G);
+
+    constant FIX_FMT_PRODUCT_C : FixFormat_t := cl_fix_mult_fmt(FIX_FMT_MULT_A_C, FIX_FMT_MULT_B_C);
+    constant FMT_PRODUCT_C     : string      := to_string(FIX_FMT_PRODUCT_C);
+    constant PRODUCT_WIDTH_C   : positive    := cl_fix_width(FIX_FMT_PRODUCT_C);
+
+    -- Packed operand a0 * 2**PRODUCT_WIDTH_C + a1, the product a1 * b fits
+    -- into the PRODUCT_WIDTH_C guard bits below a0 * b. A signed a1 can
+    -- borrow from a0, which needs one more bit.
+    constant FIX_FMT_PACKED_A_C : FixFormat_t := (FIX_FMT_MULT_A_C.S,
+                                                  FIX_FMT_MULT_A_C.I + PRODUCT_WIDTH_C + FIX_FMT_MULT_A_C.S,
+                                                  FIX_FMT_MULT_A_C.F);
+    constant FMT_PACKED_A_C     : string      := to_string(FIX_FMT_PACKED_A_C);
+    constant PACKED_A_WIDTH_C   : positive    := cl_fix_width(FIX_FMT_PACKED_A_C);
+
+    constant FMT_PACKED_RESULT_C   : string   := to_string(cl_fix_mult_fmt(FIX_FMT_PACKED_A_C, FIX_FMT_MULT_B_C));
+    constant PACKED_RESULT_WIDTH_C : positive := fixFmtWidthFromString(FMT_PACKED_RESULT_C);
+
+    -- Operand widths of the DSP48E1 multiplier (signed)
+    constant DSP_WIDTH_A_C : positive := 25;
+    constant DSP_WIDTH_B_C : positive := 18;
+
+    ----------------------------------------------------------------------------
+    -- Functions
+    ----------------------------------------------------------------------------
+    -- a0 * 2**PRODUCT_WIDTH_C + a1
+    function pack(a0 : std_logic_vector; a1 : std_logic_vector) return std_logic_vector is
+    begin
+        if FIX_FMT_MULT_A_C.S = 1 then
+            return std_logic_vector(shift_left(resize(signed(a0), PACKED_A_WIDTH_C), PRODUCT_WIDTH_C)
+                                    + resize(signed(a1), PACKED_A_WIDTH_C));
+        end if;
+        return std_logic_vector(shift_left(resize(unsigned(a0), PACKED_A_WIDTH_C), PRODUCT_WIDTH_C)
+                                + resize(unsigned(a1), PACKED_A_WIDTH_C));
+    end function;
+
+    -- Width of an operand in the signed DSP multiplier
+    function dsp_width(fmt : FixFormat_t) return positive is
+    begin
+        return cl_fix_width(fmt) + 1 - fmt.S;
+    end function;
+
+    ----------------------------------------------------------------------------
+    -- Instantiation signals
+    ----------------------------------------------------------------------------
+    signal packed_a     : std_logic_vector(PACKED_A_WIDTH_C - 1 downto 0);
+    signal packed_valid : std_logic;
+    signal packed_mult  : std_logic_vector(PACKED_RESULT_WIDTH_C - 1 downto 0);
+
+    signal mult_result0 : std_logic_vector(PRODUCT_WIDTH_C - 1 downto 0);
+    signal mult_result1 : std_logic_vector(PRODUCT_WIDTH_C - 1 downto 0);
+
+begin
+
+    assert (dsp_width(FIX_FMT_PACKED_A_C) <= DSP_WIDTH_A_C and dsp_width(FIX_FMT_MULT_B_C) <= DSP_WIDTH_B_C) or
+           (dsp_width(FIX_FMT_PACKED_A_C) <= DSP_WIDTH_B_C and dsp_width(FIX_FMT_MULT_B_C) <= DSP_WIDTH_A_C)
+        report "fix_dsp_mac_packed: the packed multiplication " & FMT_PACKED_A_C & " * " & FMT_MULT_B_G &
+               " does not fit a single DSP48E1"
+        severity warning;
+
+    ----------------------------------------------------------------------------
+    -- Multiplication Stage
+    ----------------------------------------------------------------------------
+    packed_a <= pack(in_mult_a0_i, in_mult_a1_i);
+
+    -- (a0 * 2**PRODUCT_WIDTH_C + a1) * b = a0 * b * 2**PRODUCT_WIDTH_C + a1 * b
+    u_olo_fix_mult : entity olo.olo_fix_mult
+        generic map (
+            AFmt_g      => FMT_PACKED_A_C,
+            BFmt_g      => FMT_MULT_B_G,
+            ResultFmt_g => FMT_PACKED_RESULT_C,
+            Round_g     => FixRound_Trunc_c,
+            Saturate_g  => FixSaturate_Warn_c,
+            OpRegs_g    => MULT_OP_REGS_G,
+            RoundReg_g  => "NO",
+            SatReg_g    => "NO"
+        )
+        port map (
+            Clk => clk_i,
+            Rst => rst_i,
+
+            In_Valid => in_valid_i,
+            In_A     => packed_a,
+            In_B     => in_mult_b_i,
+
+            Out_Valid  => packed_valid,
+            Out_Result => packed_mult
+        );
+
+    ----------------------------------------------------------------------------
+    -- Unpacking
+    ----------------------------------------------------------------------------
+    -- The low bits are a1 * b. A negative a1 * b borrowed one from the high
+    -- bits, adding its sign bit back is the correction term of a0 * b.
+    mult_result1 <= packed_mult(PRODUCT_WIDTH_C - 1 downto 0);
+
+    g_signed : if FIX_FMT_PRODUCT_C.S = 1 generate
+        mult_result0 <= std_logic_vector(resize(signed(packed_mult(PACKED_RESULT_WIDTH_C - 1 downto PRODUCT_WIDTH_C))
+                                                + signed('0' & packed_mult(PRODUCT_WIDTH_C - 1 downto PRODUCT_WIDTH_C - 1)),
+                                                PRODUCT_WIDTH_C));
+    end generate;
+
+    g_unsigned : if FIX_FMT_PRODUCT_C.S = 0 generate
+        mult_result0 <= packed_mult(PRODUCT_WIDTH_C * 2 - 1 downto PRODUCT_WIDTH_C);
+    end generate;
+
+    ----------------------------------------------------------------------------
+    -- Addition Stage
+    ----------------------------------------------------------------------------
+    u_olo_fix_add0 : entity olo.olo_fix_add
+        generic map (
+            AFmt_g      => FMT_PRODUCT_C,
+            BFmt_g      => FMT_ADD_G,
+            ResultFmt_g => FMT_RESULT_G,
+            Round_g     => ADD_ROUND_G,
+            Saturate_g  => ADD_SATURATE_G,
+            OpRegs_g    => ADD_OP_REGS_G,
+            RoundReg_g  => ADD_ROUND_REG_G,
+            SatReg_g    => ADD_SAT_REG_G
+        )
+        port map (
+            Clk => clk_i,
+            Rst => rst_i,
+
+            In_Valid => packed_valid,
+            In_A     => mult_result0,
+            In_B     => in_add0_i,
+
+            Out_Valid  => out_valid_o,
+            Out_Result => out_result0_o
+        );
+
+    u_olo_fix_add1 : entity olo.olo_fix_add
+        generic map (
+            AFmt_g      => FMT_PRODUCT_C,
+            BFmt_g      => FMT_ADD_G,
+            ResultFmt_g => FMT_RESULT_G,
+            Round_g     => ADD_ROUND_G,
+            Saturate_g  => ADD_SATURATE_G,
+            OpRegs_g    => ADD_OP_REGS_G,
+            RoundReg_g  => ADD_ROUND_REG_G,
+            SatReg_g    => ADD_SAT_REG_G
+        )
+        port map (
+            Clk => clk_i,
+            Rst => rst_i,
+
+            In_Valid => packed_valid,
+            In_A     => mult_result1,
+            In_B     => in_add1_i,
+
+            Out_Valid  => open,
+            Out_Result => out_result1_o
+        );
+
+end architecture rtl;
@@ -12,10 +12,16 @@ import numpy as np
 
 #Import olo_fix
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../submodules/open-logic/src/fix/python")))
-from olo_fix import olo_fix_cosim, olo_fix_utils, olo_fix_plots
+from olo_fix import olo_fix_cosim, olo_fix_utils
 from olo_fix import olo_fix_mult, olo_fix_add
 from en_cl_fix_pkg import *
 
+#Import fixed point kernels
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../fix_model/python")))
+from fix_kernel import FixMacKernel
+from fix_stimuli import FixStimuli
+import fix_profile
+
 ################################################################################
 # Functions
 ################################################################################
@@ -24,6 +30,7 @@ def cosim(output_path : str = None,
           cosim_mode : bool = True):
 
     #Parse Generics
+    fix_profile.mark("parse_generics")
     FMT_MULT_A_G = olo_fix_utils.fix_format_from_string(generics["FMT_MULT_A_G"])
     FMT_MULT_B_G = olo_fix_utils.fix_format_from_string(generics["FMT_MULT_B_G"])
     FMT_ADD_G = olo_fix_utils.fix_format_from_string(generics["FMT_ADD_G"])
@@ -35,37 +42,22 @@ def cosim(output_path : str = None,
     Saturate = FixSaturate.Warn_s
 
     #Calculation
-    np.random.seed(42)  # Set the seed for reproducibility
-    in_mult_a_i = np.linspace(cl_fix_min_value(FMT_MULT_A_G), cl_fix_max_value(FMT_MULT_A_G), 100)
-    in_mult_a_i = np.concatenate([
-        np.linspace(cl_fix_min_value(FMT_MULT_A_G), cl_fix_max_value(FMT_MULT_A_G), 100, endpoint=False),
-        np.random.uniform(low=cl_fix_min_value(FMT_MULT_A_G), high=cl_fix_max_value(FMT_MULT_A_G), size = 100)
-    ])
-    in_mult_a_i = cl_fix_from_real(in_mult_a_i, FMT_MULT_A_G)
-
-    in_mult_b_i = np.concatenate([
-        np.linspace(cl_fix_min_value(FMT_MULT_B_G), cl_fix_max_value(FMT_MULT_B_G), 50, endpoint=False),
-        np.linspace(cl_fix_max_value(FMT_MULT_B_G), cl_fix_min_value(FMT_MULT_B_G), 50),
-        np.random.uniform(low=cl_fix_min_value(FMT_MULT_B_G), high=cl_fix_max_value(FMT_MULT_B_G), size = 100)
-    ])
-    in_mult_b_i = cl_fix_from_real(in_mult_b_i, FMT_MULT_B_G)
-
-    in_add_i = np.concatenate([
-        np.linspace(cl_fix_min_value(FMT_ADD_G), cl_fix_max_value(FMT_ADD_G), 50, endpoint=False),
-        np.linspace(cl_fix_max_value(FMT_ADD_G), cl_fix_min_value(FMT_ADD_G), 50),
-        np.random.uniform(low=cl_fix_min_value(FMT_ADD_G), high=cl_fix_max_value(FMT_ADD_G), size = 100)
-    ])
-
-    in_add_i = cl_fix_from_real(in_add_i, FMT_ADD_G)
-
-    MultClass = olo_fix_mult(FMT_MULT_A_G, FMT_MULT_B_G, FMT_MULT_RESULT, Round, Saturate)
-    mult_result = MultClass.process(in_mult_a_i, in_mult_b_i)
+    fix_profile.mark("stimuli")
+    stimuli = FixStimuli.for_config(generics)
+    in_mult_a_i = stimuli.draw("in_mult_a_i", FMT_MULT_A_G, ramp=100, uniform=100)
+    in_mult_b_i = stimuli.draw("in_mult_b_i", FMT_MULT_B_G, ramp=50, ramp_down=50, uniform=100)
+    in_add_i = stimuli.draw("in_add_i", FMT_ADD_G, ramp=50, ramp_down=50, uniform=100)
 
-    AddClass = olo_fix_add(FMT_MULT_RESULT, FMT_ADD_G, FMT_RESULT_G, Round, Saturate)
-    out_result_o = AddClass.process(mult_result, in_add_i)
+    fix_profile.mark("model")
+    MacKernel = FixMacKernel(FMT_MULT_A_G, FMT_MULT_B_G, FMT_ADD_G, FMT_RESULT_G, Round, Saturate)
+    out_result_o = MacKernel.process(in_mult_a_i, in_mult_b_i, in_add_i)
 
     # Plot if enabled
     if not cosim_mode:
+        # Plotting pulls in matplotlib, only import it when needed
+        from olo_fix import olo_fix_plots
+        MultClass = olo_fix_mult(FMT_MULT_A_G, FMT_MULT_B_G, FMT_MULT_RESULT, Round, Saturate)
+        mult_result = MultClass.process(in_mult_a_i, in_mult_b_i)
         py_out = in_mult_a_i * in_mult_b_i + in_add_i
         olo_fix_plots.plot_subplots({
                                     "Multiplication Stage" : {"in_mult_a_i" : in_mult_a_i, "in_mult_b_i" : in_mult_b_i},
@@ -74,6 +66,7 @@ def cosim(output_path : str = None,
         })
 
     #Write Files
+    fix_profile.mark("write")
     if cosim_mode:
         writer = olo_fix_cosim(output_path)
         writer.write_cosim_file(in_mult_a_i, FMT_MULT_A_G, "in_mult_a_i.fix")
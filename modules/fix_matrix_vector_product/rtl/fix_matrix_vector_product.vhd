@@ -12,6 +12,7 @@ use ieee.math_real.all;
 
 library olo;
 use olo.olo_base_pkg_array.all;
+use olo.olo_base_pkg_math.all;
 use olo.en_cl_fix_pkg.all;
 use olo.olo_fix_pkg.all;
 
@@ -28,26 +29,54 @@ entity fix_matrix_vector_product is
         MATRIX_COLUMN_WIDTH_G   : natural;
         FMT_IN_MATRIX_ELEMENT_G : string;
         FMT_IN_VECTOR_ELEMENT_G : string;
-        FMT_OUT_RESULT_G        : string
+        FMT_OUT_RESULT_G        : string;
+        STREAMING_G             : boolean  := false;
+        MATRIX_LOAD_G           : boolean  := false;
+        NUM_LANES_G             : positive := 1;
+        SKIP_ZEROS_G            : boolean  := false;
+        BATCH_SIZE_G            : positive := 1;
+        MAC_PIPELINE_G          : positive := 1;
+        DOUBLE_PUMP_G           : boolean  := false;
+        PACKED_G                : boolean  := false;
+        OUT_STREAM_G            : boolean  := false
     );
     port (
         clk_i : in std_logic;
         rst_i : in std_logic;
 
+        -- Only used with DOUBLE_PUMP_G: twice the frequency of clk_i, rising
+        -- edges aligned (same MMCM/PLL)
+        clk2x_i : in std_logic := '0';
+
         ------------------------------------------------------------------------
         -- In Interface
         ------------------------------------------------------------------------
         in_valid_i  : in  std_logic := '1';
         in_ready_o  : out std_logic;
-        in_matrix_i : in  StlvVectorArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G) - 1 downto 0);
+        in_matrix_i : in  StlvVectorArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G) - 1 downto 0) := (others => (others => (others => '0')));
         in_vector_i : in  StlvArray_t(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_VECTOR_ELEMENT_G) - 1 downto 0);
 
+        ------------------------------------------------------------------------
+        -- Matrix Load Interface (MATRIX_LOAD_G)
+        ------------------------------------------------------------------------
+        in_load_valid_i : in  std_logic := '0';
+        in_load_ready_o : out std_logic;
+        in_load_row_i   : in  StlvArray_t(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G) - 1 downto 0) := (others => (others => '0'));
+
         ------------------------------------------------------------------------
         -- Out Interface
         ------------------------------------------------------------------------
         out_valid_o  : out std_logic;
         out_error_o  : out std_logic;
-        out_result_o : out StlvArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0)
+        out_result_o : out StlvArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+
+        ------------------------------------------------------------------------
+        -- Stage Out Interface (OUT_STREAM_G)
+        ------------------------------------------------------------------------
+        out_stream_valid_o  : out std_logic;
+        out_stream_ready_i  : in  std_logic := '1';
+        out_stream_last_o   : out std_logic;
+        out_stream_result_o : out StlvArray_t(NUM_DOT_PRODUCTS_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0)
     );
 end entity fix_matrix_vector_product;
 
@@ -59,24 +88,54 @@ architecture rtl of fix_matrix_vector_product is
     -- Number of fix_dot_product stages needed to compute the final out_result.
     constant NUM_STAGES_C : positive := integer(ceil(real(MATRIX_ROW_WIDTH_G) / real(NUM_DOT_PRODUCTS_G)));
 
+    -- With PACKED_G every fix_dot_product unit computes two rows of a stage.
+    constant NUM_UNITS_C : positive := (NUM_DOT_PRODUCTS_G + boolean'pos(PACKED_G)) / (1 + boolean'pos(PACKED_G));
+
+    -- Lane length and output delay (adder tree, MAC pipeline and clock domain
+    -- crossings) of the fix_dot_product units
+    constant LANE_LENGTH_C : positive := (MATRIX_COLUMN_WIDTH_G + NUM_LANES_G - 1) / NUM_LANES_G;
+    constant DOT_DELAY_C   : natural  := log2ceil(NUM_LANES_G * MAC_PIPELINE_G) + minimum(1, MAC_PIPELINE_G - 1) +
+                                         MAC_PIPELINE_G - 1 + 3 * boolean'pos(DOUBLE_PUMP_G);
+
+    -- Entries of the stage output FIFO (OUT_STREAM_G). Without STREAMING_G two
+    -- entries let the next stage start while the results of the last one wait
+    -- for out_stream_ready_i. With STREAMING_G a stage is fed every
+    -- LANE_LENGTH_C cycles and its entry is free DOT_DELAY_C + 3 cycles after
+    -- its last element, more entries keep the feed at full speed.
+    constant STREAM_DEPTH_C : positive := 2 + boolean'pos(STREAMING_G) * ((DOT_DELAY_C + 2) / LANE_LENGTH_C);
+
     ----------------------------------------------------------------------------
     -- Types
     ----------------------------------------------------------------------------
     type state_t is (
             IDLE_S,
             FEED_DOT_PRODUCT_S,
-            COLLECT_DOT_PRODUCT_S
+            COLLECT_DOT_PRODUCT_S,
+            OUTPUT_S
         );
 
     type two_process_r is record
         in_ready        : std_logic;
         out_valid       : std_logic;
         out_error       : std_logic;
-        out_result      : StlvArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+        out_idx         : natural range 0 to BATCH_SIZE_G - 1;
+        results         : StlvVectorArray_t(BATCH_SIZE_G - 1 downto 0)(MATRIX_ROW_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
         in_dot_valid    : std_logic;
         matrix_extended : StlvVectorArray_t(NUM_DOT_PRODUCTS_G*NUM_STAGES_C - 1 downto 0)(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G) - 1 downto 0);
-        vector          : StlvArray_t(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_VECTOR_ELEMENT_G) - 1 downto 0);
+        vectors         : StlvVectorArray_t(BATCH_SIZE_G - 1 downto 0)(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_VECTOR_ELEMENT_G) - 1 downto 0);
+        batch_idx       : natural range 0 to BATCH_SIZE_G - 1;
         stage_idx       : natural range 0 to NUM_STAGES_C;
+        collect_idx     : natural range 0 to NUM_STAGES_C;
+        collect_batch   : natural range 0 to BATCH_SIZE_G - 1;
+        collected       : std_logic_vector(NUM_DOT_PRODUCTS_G - 1 downto 0);
+        load_ready      : std_logic;
+        load_idx        : natural range 0 to MATRIX_ROW_WIDTH_G - 1;
+        stream_results  : StlvVectorArray_t(STREAM_DEPTH_C - 1 downto 0)(NUM_DOT_PRODUCTS_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+        stream_last     : std_logic_vector(STREAM_DEPTH_C - 1 downto 0);
+        stream_wr       : natural range 0 to STREAM_DEPTH_C - 1;
+        stream_rd       : natural range 0 to STREAM_DEPTH_C - 1;
+        stream_count    : natural range 0 to STREAM_DEPTH_C;
+        stream_used     : natural range 0 to STREAM_DEPTH_C;
         --
         state : state_t;
     end record;
@@ -90,6 +149,7 @@ architecture rtl of fix_matrix_vector_product is
     ----------------------------------------------------------------------------
     -- Fix Dot Product signals
     ----------------------------------------------------------------------------
+    signal in_dot_valid : std_logic;
     signal in_dot_ready : std_logic_vector(NUM_DOT_PRODUCTS_G - 1 downto 0);
 
     signal out_dot_valid  : std_logic_vector(NUM_DOT_PRODUCTS_G - 1 downto 0);
@@ -97,37 +157,89 @@ architecture rtl of fix_matrix_vector_product is
 
 begin
 
+    assert not (SKIP_ZEROS_G and STREAMING_G)
+        report "fix_matrix_vector_product: SKIP_ZEROS_G is not supported with STREAMING_G"
+        severity failure;
+
+    assert BATCH_SIZE_G = 1 or not (STREAMING_G or SKIP_ZEROS_G)
+        report "fix_matrix_vector_product: BATCH_SIZE_G > 1 is not supported with STREAMING_G or SKIP_ZEROS_G"
+        severity failure;
+
+    assert MAC_PIPELINE_G = 1 or not SKIP_ZEROS_G
+        report "fix_matrix_vector_product: MAC_PIPELINE_G > 1 is not supported with SKIP_ZEROS_G"
+        severity failure;
+
+    assert not (PACKED_G and (DOUBLE_PUMP_G or SKIP_ZEROS_G))
+        report "fix_matrix_vector_product: PACKED_G is not supported with DOUBLE_PUMP_G or SKIP_ZEROS_G"
+        severity failure;
+
+    assert BATCH_SIZE_G = 1 or not OUT_STREAM_G
+        report "fix_matrix_vector_product: BATCH_SIZE_G > 1 is not supported with OUT_STREAM_G"
+        severity failure;
+
+    -- OUT_STREAM_G: a stage is only fed if the stage output FIFO has an entry
+    -- for its results
+    in_dot_valid <= r.in_dot_valid when (not OUT_STREAM_G) or r.stream_used < STREAM_DEPTH_C else '0';
+
     ----------------------------------------------------------------------------
     -- Dot Product
     ----------------------------------------------------------------------------
-    GEN_DOT_PRODUCT : for i in 0 to NUM_DOT_PRODUCTS_G - 1 generate
+    -- With PACKED_G unit i computes the rows 2 * i and 2 * i + 1 of a stage
+    -- in one multiplier per lane. An odd last row is computed twice, the
+    -- copy is dropped.
+    GEN_DOT_PRODUCT : for i in 0 to NUM_UNITS_C - 1 generate
+        constant ROW_A_C : natural := i * (1 + boolean'pos(PACKED_G));
+        constant ROW_C_C : natural := minimum(ROW_A_C + 1, NUM_DOT_PRODUCTS_G - 1);
+
+        signal out_result_c : std_logic_vector(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+    begin
         u_fix_dot_product : entity work.fix_dot_product
             generic map (
                 DIMENSION_WIDTH_G => MATRIX_COLUMN_WIDTH_G,
+                -- Batches feed the vectors back to back, with STREAMING_G the
+                -- units accept the next one in FINISHED_S
+                STREAMING_G       => STREAMING_G or BATCH_SIZE_G > 1,
+                NUM_LANES_G       => NUM_LANES_G,
+                SKIP_ZEROS_G      => SKIP_ZEROS_G,
+                MAC_PIPELINE_G    => MAC_PIPELINE_G,
+                DOUBLE_PUMP_G     => DOUBLE_PUMP_G,
+                PACKED_G          => PACKED_G,
 
                 FMT_IN_ELEMENT_A_G => FMT_IN_MATRIX_ELEMENT_G,
                 FMT_IN_ELEMENT_B_G => FMT_IN_VECTOR_ELEMENT_G,
                 FMT_OUT_RESULT_G   => FMT_OUT_RESULT_G
             )
             port map (
-                clk_i => clk_i,
-                rst_i => rst_i,
-
-                in_valid_i    => r.in_dot_valid,
-                in_ready_o    => in_dot_ready(i),
-                in_vector_a_i => r.matrix_extended(i + r.stage_idx * NUM_DOT_PRODUCTS_G),
-                in_vector_b_i => r.vector,
-
-                out_valid_o  => out_dot_valid(i),
-                out_result_o => out_dot_result(i)
+                clk_i   => clk_i,
+                rst_i   => rst_i,
+                clk2x_i => clk2x_i,
+
+                in_valid_i    => in_dot_valid,
+                in_ready_o    => in_dot_ready(ROW_A_C),
+                in_vector_a_i => r.matrix_extended(ROW_A_C + r.stage_idx * NUM_DOT_PRODUCTS_G),
+                in_vector_b_i => r.vectors(r.batch_idx),
+                in_vector_c_i => r.matrix_extended(ROW_C_C + r.stage_idx * NUM_DOT_PRODUCTS_G),
+
+                out_valid_o    => out_dot_valid(ROW_A_C),
+                out_result_o   => out_dot_result(ROW_A_C),
+                out_result_c_o => out_result_c
             );
+
+        g_packed_row : if PACKED_G and ROW_C_C /= ROW_A_C generate
+            in_dot_ready(ROW_C_C)   <= in_dot_ready(ROW_A_C);
+            out_dot_valid(ROW_C_C)  <= out_dot_valid(ROW_A_C);
+            out_dot_result(ROW_C_C) <= out_result_c;
+        end generate;
     end generate GEN_DOT_PRODUCT;
 
     ----------------------------------------------------------------------------
     -- Combinatorial process
     ----------------------------------------------------------------------------
     p_comb : process(all) is
-        variable v : two_process_r;
+        variable v             : two_process_r;
+        variable collect_stage : natural range 0 to NUM_STAGES_C;
+        variable stream_push   : boolean;
+        variable stream_drop   : boolean;
     begin
 
         -- Hold variables stable
@@ -137,87 +249,301 @@ begin
         v.out_valid := '0';
         v.out_error := '0';
 
-        ------------------------------------------------------------------------
-        -- FSM
-        ------------------------------------------------------------------------
-        case (r.state) is
-            --------------------------------------------------------------------
-            when IDLE_S =>
-                v.stage_idx := 0;
+        stream_push := false;
+        stream_drop := false;
 
-                v.in_ready := '1';
-                if in_valid_i = '1' and r.in_ready = '1' then
-                    v.in_ready := '0';
+        if STREAMING_G then
+            --------------------------------------------------------------------
+            -- Streaming: feeding and collecting stages overlap
+            --------------------------------------------------------------------
+            -- A new matrix and vector are accepted as soon as the last stage
+            -- of the previous ones has been fed to the fix_dot_product units.
+            if in_valid_i = '1' and r.in_ready = '1' then
+                v.in_ready := '0';
 
-                    -- Register Vector and Matrix
+                -- Register Vector and Matrix
+                if not MATRIX_LOAD_G then
                     v.matrix_extended(MATRIX_ROW_WIDTH_G - 1 downto 0) := in_matrix_i;
-                    v.vector                                           := in_vector_i;
-
-                    v.in_dot_valid := '1';
-                    v.state        := FEED_DOT_PRODUCT_S;
                 end if;
+                v.vectors(0) := in_vector_i;
 
-            --------------------------------------------------------------------
-            when FEED_DOT_PRODUCT_S =>
+                v.stage_idx    := 0;
                 v.in_dot_valid := '1';
-                -- Check if in_dot_valid is set and at least one of the
-                -- NUM_DOT_PRODUCTS_G fix_dot_product units is ready.
-                if (r.in_dot_valid = '1' and in_dot_ready /= (in_dot_ready'range => '0')) then
+            end if;
+
+            -- Feed: the fix_dot_product units accept the next stage in
+            -- FINISHED_S of the current one.
+            if (in_dot_valid = '1' and in_dot_ready /= (in_dot_ready'range => '0')) then
+                if (in_dot_ready /= (in_dot_ready'range => '1')) then
+                    -- ERROR:
+                    -- All fix_dot_product units must be ready when in_dot_valid is set.
+                    v.out_error    := '1';
                     v.in_dot_valid := '0';
+                    v.in_ready     := '1';
 
-                    if (in_dot_ready /= (in_dot_ready'range => '1')) then
-                        -- ERROR: 
-                        -- All fix_dot_product units must be ready when in_dot_valid is set.
-                        v.out_error := '1';
-                        v.state     := IDLE_S;
-                    else
-                        -- Wait for fix_dot_product units to finish computing the dot products.
-                        v.state := COLLECT_DOT_PRODUCT_S;
+                elsif (r.stage_idx < NUM_STAGES_C - 1) then
+                    v.stage_idx := r.stage_idx + 1;
+
+                else
+                    -- All stages are fed, the matrix and vector registers are free.
+                    v.in_dot_valid := '0';
+                    v.in_ready     := '1';
+                end if;
+            end if;
+
+            -- Collect: results arrive one stage after the feed, independent
+            -- of the stage currently being fed.
+            if (out_dot_valid /= (out_dot_valid'range => '0')) then
+
+                for i in 0 to NUM_DOT_PRODUCTS_G - 1 loop
+                    if (i + r.collect_idx * NUM_DOT_PRODUCTS_G < MATRIX_ROW_WIDTH_G) then
+                        v.results(0)(i + r.collect_idx * NUM_DOT_PRODUCTS_G) := out_dot_result(i);
                     end if;
+                end loop;
+
+                if (out_dot_valid /= (out_dot_valid'range => '1')) then
+                    -- ERROR:
+                    -- All fix_dot_product units must set out_dot_valid simultaneously.
+                    v.out_error   := '1';
+                    v.collect_idx := 0;
+                    stream_drop   := true;
+
+                elsif (r.collect_idx < NUM_STAGES_C - 1) then
+                    v.collect_idx := r.collect_idx + 1;
+                    stream_push   := true;
+
+                else
+                    v.out_valid   := '1';
+                    v.collect_idx := 0;
+                    stream_push   := true;
                 end if;
+            end if;
 
+        else
+            --------------------------------------------------------------------
+            -- FSM
             --------------------------------------------------------------------
-            when COLLECT_DOT_PRODUCT_S =>
+            -- Store the results of the current stage. With BATCH_SIZE_G > 1 the
+            -- results of the first vectors of a batch arrive while the last
+            -- ones are still fed.
+            for i in 0 to NUM_DOT_PRODUCTS_G - 1 loop
+                if (out_dot_valid(i) = '1' and i + r.stage_idx * NUM_DOT_PRODUCTS_G < MATRIX_ROW_WIDTH_G) then
+                    v.results(r.collect_batch)(i + r.stage_idx * NUM_DOT_PRODUCTS_G) := out_dot_result(i);
+                end if;
+            end loop;
+
+            case (r.state) is
+                ----------------------------------------------------------------
+                when IDLE_S =>
+                    v.stage_idx := 0;
+                    v.collected := (others => '0');
 
-                -- Check if at least one of the NUM_DOT_PRODUCTS_G
-                -- fix_dot_product units has out_dot_valid set.
-                if (out_dot_valid /= (out_dot_valid'range => '0')) then
+                    v.in_ready := '1';
+                    if in_valid_i = '1' and r.in_ready = '1' then
 
-                    -- In this stage, populate up to NUM_DOT_PRODUCTS_G elements
-                    -- of the result vector with computed dot_product results.
-                    for i in 0 to NUM_DOT_PRODUCTS_G - 1 loop
-                        if (i + r.stage_idx * NUM_DOT_PRODUCTS_G < MATRIX_ROW_WIDTH_G) then
-                            v.out_result(i + r.stage_idx * NUM_DOT_PRODUCTS_G) := out_dot_result(i);
+                        -- Register Vector and Matrix, the matrix of a batch is
+                        -- the one of its first vector
+                        if not MATRIX_LOAD_G and r.batch_idx = 0 then
+                            v.matrix_extended(MATRIX_ROW_WIDTH_G - 1 downto 0) := in_matrix_i;
                         end if;
-                    end loop;
+                        v.vectors(r.batch_idx) := in_vector_i;
+
+                        if (r.batch_idx < BATCH_SIZE_G - 1) then
+                            -- Buffer the next vector of the batch
+                            v.batch_idx := r.batch_idx + 1;
+                        else
+                            v.in_ready     := '0';
+                            v.batch_idx    := 0;
+                            v.in_dot_valid := '1';
+                            v.state        := FEED_DOT_PRODUCT_S;
+                        end if;
+                    end if;
 
-                    if (out_dot_valid /= (out_dot_valid'range => '1')) then
-                        -- ERROR: 
-                        -- All fix_dot_product units must set out_dot_valid simultaneously.
-                        v.out_error := '1';
-                        v.state     := IDLE_S;
+                ----------------------------------------------------------------
+                when FEED_DOT_PRODUCT_S =>
+                    v.in_dot_valid := '1';
+                    -- Check if in_dot_valid is set and at least one of the
+                    -- NUM_DOT_PRODUCTS_G fix_dot_product units is ready.
+                    if (in_dot_valid = '1' and in_dot_ready /= (in_dot_ready'range => '0')) then
+                        v.in_dot_valid := '0';
+
+                        if (in_dot_ready /= (in_dot_ready'range => '1')) then
+                            -- ERROR: 
+                            -- All fix_dot_product units must be ready when in_dot_valid is set.
+                            v.out_error := '1';
+                            v.state     := IDLE_S;
+                        elsif (r.batch_idx < BATCH_SIZE_G - 1) then
+                            -- Reuse the matrix rows of the stage for the next vector of the batch
+                            v.batch_idx    := r.batch_idx + 1;
+                            v.in_dot_valid := '1';
+                        else
+                            -- Wait for fix_dot_product units to finish computing the dot products.
+                            v.batch_idx := 0;
+                            v.state     := COLLECT_DOT_PRODUCT_S;
+                        end if;
+                    end if;
 
-                    elsif (r.stage_idx < NUM_STAGES_C - 1) then
-                        -- Start a new stage of dot_product calculation
-                        v.stage_idx    := r.stage_idx + 1;
-                        v.in_dot_valid := '1';
-                        v.state        := FEED_DOT_PRODUCT_S;
+                    -- Results of the first vectors of a batch (BATCH_SIZE_G > 1)
+                    if (out_dot_valid /= (out_dot_valid'range => '0')) then
+                        if (out_dot_valid /= (out_dot_valid'range => '1')) then
+                            -- ERROR: 
+                            -- All fix_dot_product units must set out_dot_valid simultaneously.
+                            v.out_error    := '1';
+                            v.in_dot_valid := '0';
+                            v.state        := IDLE_S;
+                        else
+                            v.collect_batch := r.collect_batch + 1;
+                        end if;
+                    end if;
 
+                ----------------------------------------------------------------
+                when COLLECT_DOT_PRODUCT_S =>
+
+                    -- Check if at least one of the NUM_DOT_PRODUCTS_G
+                    -- fix_dot_product units has out_dot_valid set.
+                    if (out_dot_valid /= (out_dot_valid'range => '0')) then
+
+                        -- With SKIP_ZEROS_G every unit finishes after its own number of
+                        -- nonzero elements, the stage is done once all of them were valid.
+                        v.collected := r.collected or out_dot_valid;
+
+                        if SKIP_ZEROS_G and (v.collected /= (v.collected'range => '1')) then
+                            -- Wait for the remaining fix_dot_product units
+                            null;
+
+                        elsif (not SKIP_ZEROS_G) and (out_dot_valid /= (out_dot_valid'range => '1')) then
+                            -- ERROR: 
+                            -- All fix_dot_product units must set out_dot_valid simultaneously.
+                            v.out_error := '1';
+                            v.state     := IDLE_S;
+                            stream_drop := true;
+
+                        elsif (r.collect_batch < BATCH_SIZE_G - 1) then
+                            -- Wait for the results of the next vector of the batch
+                            v.collect_batch := r.collect_batch + 1;
+
+                        elsif (r.stage_idx < NUM_STAGES_C - 1) then
+                            -- Start a new stage of dot_product calculation
+                            v.stage_idx     := r.stage_idx + 1;
+                            v.collect_batch := 0;
+                            v.collected     := (others => '0');
+                            v.in_dot_valid  := '1';
+                            v.state         := FEED_DOT_PRODUCT_S;
+                            stream_push     := true;
+
+                        else
+                            -- All stages (NUM_STAGES_C) of the dot_product calculation are done. 
+                            -- The results contain the complete result vectors.
+                            v.out_valid     := '1';
+                            v.out_idx       := 0;
+                            v.stage_idx     := 0;
+                            v.collect_batch := 0;
+                            v.collected     := (others => '0');
+                            stream_push     := true;
+                            if (BATCH_SIZE_G > 1) then
+                                v.state := OUTPUT_S;
+                            else
+                                v.in_ready := '1';
+                                v.state    := IDLE_S;
+                            end if;
+                        end if;
+                    end if;
+
+                ----------------------------------------------------------------
+                when OUTPUT_S =>
+                    -- Output the remaining result vectors of the batch, one per
+                    -- clock cycle, the next batch is accepted with the last one.
+                    v.out_valid := '1';
+                    v.out_idx   := r.out_idx + 1;
+                    if (r.out_idx = BATCH_SIZE_G - 2) then
+                        v.in_ready := '1';
+                        v.state    := IDLE_S;
+                    end if;
+
+                ----------------------------------------------------------------
+                when others =>
+                    null;
+            --------------------------------------------------------------------
+            end case;
+        end if;
+
+        ------------------------------------------------------------------------
+        -- Stage Output (OUT_STREAM_G)
+        ------------------------------------------------------------------------
+        -- Every stage fed reserves an entry of the output FIFO. The results
+        -- are written to the entry as they arrive, it is pushed once the stage
+        -- is complete.
+        if OUT_STREAM_G then
+            if STREAMING_G then
+                collect_stage := r.collect_idx;
+            else
+                collect_stage := r.stage_idx;
+            end if;
+
+            for i in 0 to NUM_DOT_PRODUCTS_G - 1 loop
+                if (out_dot_valid(i) = '1') then
+                    if (i + collect_stage * NUM_DOT_PRODUCTS_G < MATRIX_ROW_WIDTH_G) then
+                        v.stream_results(r.stream_wr)(i) := out_dot_result(i);
                     else
-                        -- All stages (NUM_STAGES_C) of the dot_product calculation are done. 
-                        -- out_result vector contains the complete result.
-                        v.out_valid := '1';
-                        v.in_ready  := '1';
-                        v.stage_idx := 0;
-                        v.state     := IDLE_S;
+                        -- Rows beyond MATRIX_ROW_WIDTH_G in the last stage
+                        v.stream_results(r.stream_wr)(i) := (others => '0');
                     end if;
                 end if;
+            end loop;
 
-            --------------------------------------------------------------------
-            when others =>
-                null;
+            -- Pop
+            if (r.stream_count /= 0 and out_stream_ready_i = '1') then
+                v.stream_rd    := (r.stream_rd + 1) mod STREAM_DEPTH_C;
+                v.stream_count := v.stream_count - 1;
+                v.stream_used  := v.stream_used - 1;
+            end if;
+
+            -- Reserve
+            if (in_dot_valid = '1' and in_dot_ready = (in_dot_ready'range => '1')) then
+                v.stream_used := v.stream_used + 1;
+            end if;
+
+            -- Push, the results of a failed stage are dropped
+            if stream_push then
+                v.stream_last(r.stream_wr) := '0';
+                if (collect_stage = NUM_STAGES_C - 1) then
+                    v.stream_last(r.stream_wr) := '1';
+                end if;
+                v.stream_wr    := (r.stream_wr + 1) mod STREAM_DEPTH_C;
+                v.stream_count := v.stream_count + 1;
+            elsif stream_drop then
+                v.stream_used := v.stream_used - 1;
+            end if;
+        end if;
+
+        ------------------------------------------------------------------------
+        -- Matrix Load
         ------------------------------------------------------------------------
-        end case;
+        -- The matrix is loaded row by row and kept for all following vectors.
+        -- Vectors and rows are never accepted at the same time.
+        if MATRIX_LOAD_G then
+            if r.load_ready = '1' then
+                v.in_ready := '0';
+
+                if in_load_valid_i = '1' then
+                    v.matrix_extended(r.load_idx) := in_load_row_i;
+
+                    if (r.load_idx = MATRIX_ROW_WIDTH_G - 1) then
+                        -- Matrix complete, accept vectors
+                        v.load_idx   := 0;
+                        v.load_ready := '0';
+                        v.in_ready   := '1';
+                    else
+                        v.load_idx := r.load_idx + 1;
+                    end if;
+                end if;
+
+            elsif (r.in_ready = '1' and in_valid_i = '0' and in_load_valid_i = '1') then
+                -- Reload: no vector is in progress, switch to the load interface
+                v.in_ready   := '0';
+                v.load_ready := '1';
+            end if;
+        end if;
 
         -- Apply to record
         r_next <= v;
@@ -229,10 +555,29 @@ begin
     ----------------------------------------------------------------------------
     -- In Interface
     in_ready_o <= r.in_ready;
+    -- Matrix Load Interface
+    in_load_ready_o <= r.load_ready;
     -- Out Interface
-    out_valid_o  <= r.out_valid;
-    out_error_o  <= r.out_error;
-    out_result_o <= r.out_result;
+    out_error_o <= r.out_error;
+
+    g_out_vector : if not OUT_STREAM_G generate
+        out_valid_o  <= r.out_valid;
+        out_result_o <= r.results(r.out_idx);
+
+        out_stream_valid_o  <= '0';
+        out_stream_last_o   <= '0';
+        out_stream_result_o <= (others => (others => '0'));
+    end generate;
+
+    -- Stage Out Interface, the result registers of the whole vector are unused
+    g_out_stream : if OUT_STREAM_G generate
+        out_valid_o  <= '0';
+        out_result_o <= (others => (others => '0'));
+
+        out_stream_valid_o  <= '1' when r.stream_count /= 0 else '0';
+        out_stream_last_o   <= r.stream_last(r.stream_rd);
+        out_stream_result_o <= r.stream_results(r.stream_rd);
+    end generate;
 
     ----------------------------------------------------------------------------
     -- Sequential Process
@@ -242,12 +587,35 @@ begin
         if rising_edge(clk_i) then
             r <= r_next;
             if (rst_i = '1') then
-                r.in_ready        <= '1';
+                -- With MATRIX_LOAD_G a matrix must be loaded before the first vector
+                if MATRIX_LOAD_G then
+                    r.in_ready   <= '0';
+                    r.load_ready <= '1';
+                else
+                    r.in_ready   <= '1';
+                    r.load_ready <= '0';
+                end if;
+                r.load_idx        <= 0;
                 r.out_valid       <= '0';
                 r.out_error       <= '0';
                 r.in_dot_valid    <= '0';
                 r.stage_idx       <= 0;
-                r.matrix_extended <= (others => (others => (others => 'X')));
+                r.collect_idx     <= 0;
+                r.batch_idx       <= 0;
+                r.collect_batch   <= 0;
+                r.out_idx         <= 0;
+                r.collected       <= (others => '0');
+                r.stream_wr       <= 0;
+                r.stream_rd       <= 0;
+                r.stream_count    <= 0;
+                r.stream_used     <= 0;
+                -- With SKIP_ZEROS_G the padding rows of the last stage must be
+                -- zero, otherwise their units never skip an element
+                if SKIP_ZEROS_G then
+                    r.matrix_extended <= (others => (others => (others => '0')));
+                else
+                    r.matrix_extended <= (others => (others => (others => 'X')));
+                end if;
                 r.state           <= IDLE_S;
             end if;
         end if;
@@ -8,14 +8,38 @@
 # Import python packages
 import sys
 import os
+import warnings
 import numpy as np
 
 #Import olo_fix
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../submodules/open-logic/src/fix/python")))
-from olo_fix import olo_fix_cosim, olo_fix_utils, olo_fix_plots
+from olo_fix import olo_fix_cosim, olo_fix_utils
 from olo_fix import olo_fix_mult, olo_fix_add
 from en_cl_fix_pkg import *
 
+#Import fixed point kernels
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../fix_model/python")))
+from fix_kernel import FixDotKernel, to_mantissa, from_mantissa
+from fix_cosim_stream import FixCosimStreamWriter
+from fix_timing import MatrixVectorProductTiming
+from fix_sparse import CsrMatrix, band_mask, block_mask
+from fix_stimuli import FixStimuli
+import fix_format_analysis
+import fix_profile
+
+################################################################################
+# Constants
+################################################################################
+# Upper bound for the number of products the batch engine materializes at once.
+BATCH_MAX_ELEMENTS = 2**22
+
+# Upper bound for the number of vector and result elements cosim() holds at once.
+COSIM_CHUNK_ELEMENTS = 2**20
+
+# Values of COSIM_MATRIX_TYPE_G, the structured ones are mostly zero
+MATRIX_TYPES = ["ASCENDING", "DESCENDING", "BANDED", "SPARSE"]
+SPARSE_MATRIX_TYPES = ["BANDED", "SPARSE"]
+
 ################################################################################
 # Classes
 ################################################################################
@@ -28,19 +52,23 @@ class FixDotProduct:
     # Constructor
     # --------------------------------------------------------------------------
     def __init__(self,
-                 fmt_a      : FixFormat,
-                 fmt_b      : FixFormat,
-                 fmt_result : FixFormat,
-                 round      : FixRound    = FixRound.Trunc_s,
-                 saturate   : FixSaturate = FixSaturate.Warn_s
+                 fmt_a        : FixFormat,
+                 fmt_b        : FixFormat,
+                 fmt_result   : FixFormat,
+                 round        : FixRound    = FixRound.Trunc_s,
+                 saturate     : FixSaturate = FixSaturate.Warn_s,
+                 num_lanes    : int         = 1,
+                 mac_pipeline : int         = 1
         ):
         """
         Constructor of the FixDotProduct class
-        :param fmt_a:      Format of the a input
-        :param fmt_b:      Format of the b input
-        :param fmt_result: Format of the result
-        :param round:      Rounding mode
-        :param saturate:   Saturation mode
+        :param fmt_a:        Format of the a input
+        :param fmt_b:        Format of the b input
+        :param fmt_result:   Format of the result
+        :param round:        Rounding mode
+        :param saturate:     Saturation mode
+        :param num_lanes:    NUM_LANES_G of calc_batch(), calc() is always sequential
+        :param mac_pipeline: MAC_PIPELINE_G of calc_batch()
         """
         self._fmt_a = fmt_a
         self._fmt_b = fmt_b
@@ -52,6 +80,10 @@ class FixDotProduct:
         self._fix_mult = olo_fix_mult(self._fmt_a, self._fmt_b, self._fmt_result, self._round, self._saturate)
         self._fix_add = olo_fix_add(self._fmt_result, self._fmt_result, self._fmt_result, self._round, self._saturate)
 
+        # Integer kernel for batched calculation
+        self._kernel = FixDotKernel(self._fmt_a, self._fmt_b, self._fmt_result, self._round, self._saturate,
+                                    num_lanes=num_lanes, mac_pipeline=mac_pipeline)
+
     def calc(self, vector_a, vector_b):
         """
         Calculate dot product
@@ -76,6 +108,24 @@ class FixDotProduct:
     
         return result
 
+    def calc_batch(self, vectors_a, vectors_b):
+        """
+        Calculate dot products of a stack of vector pairs
+        :param vectors_a: Input a, shape [..., dimension]
+        :param vectors_b: Input b, broadcastable against vectors_a
+        :return:          Results, shape [...]
+        """
+        # Products and accumulation run on integer mantissas. Every addition
+        # rounds and saturates like the MAC feedback loop, so the result is
+        # bit-exact with calc(). With several lanes or MAC_PIPELINE_G > 1 this
+        # only holds for wrapping, saturation depends on the order of the
+        # additions.
+        return self._kernel.process(vectors_a, vectors_b)
+
+    @property
+    def kernel(self) -> FixDotKernel:
+        return self._kernel
+
 class MatrixVectorProduct:
     """
     Fixed Point Matrix Vector Product
@@ -84,30 +134,45 @@ class MatrixVectorProduct:
     # Constructor
     # --------------------------------------------------------------------------
     def __init__(self,
-                 fmt_matrix : FixFormat,
-                 fmt_vector : FixFormat,
-                 fmt_result : FixFormat,
-                 round      : FixRound    = FixRound.Trunc_s,
-                 saturate   : FixSaturate = FixSaturate.Warn_s
+                 fmt_matrix   : FixFormat,
+                 fmt_vector   : FixFormat,
+                 fmt_result   : FixFormat,
+                 round        : FixRound    = FixRound.Trunc_s,
+                 saturate     : FixSaturate = FixSaturate.Warn_s,
+                 num_lanes    : int         = 1,
+                 mac_pipeline : int         = 1,
+                 packed       : bool        = False
         ):
         """
         Constructor of the MatrixVectorProduct class
-        :param fmt_matrix: Format of the matrix input
-        :param fmt_vector: Format of the vector input
-        :param fmt_result: Format of the result
-        :param round:      Rounding mode
-        :param saturate:   Saturation mode
+        :param fmt_matrix:   Format of the matrix input
+        :param fmt_vector:   Format of the vector input
+        :param fmt_result:   Format of the result
+        :param round:        Rounding mode
+        :param saturate:     Saturation mode
+        :param num_lanes:    NUM_LANES_G of the fix_dot_product units
+        :param mac_pipeline: MAC_PIPELINE_G of the fix_dot_product units
+        :param packed:       PACKED_G, pairs of rows share a packed multiplier
         """
         self._fmt_matrix = fmt_matrix
         self._fmt_vector = fmt_vector
         self._fmt_result = fmt_result
         self._round = round
         self._saturate = saturate
+        self._num_lanes = num_lanes
+        self._packed = packed
 
         # Initialize fixed point dot product
-        self._fix_dot_product = FixDotProduct(self._fmt_matrix, self._fmt_vector, self._fmt_result, self._round, self._saturate)
+        self._fix_dot_product = FixDotProduct(self._fmt_matrix, self._fmt_vector, self._fmt_result, self._round, self._saturate,
+                                              num_lanes, mac_pipeline)
+
+        # Matrix of the load interface, see load_matrix()
+        self._loaded_matrix = None
     
     def calc(self, matrix, vector):
+        if isinstance(matrix, CsrMatrix):
+            matrix = matrix.to_dense()
+
         # Basic validation
         if len(matrix[0]) != len(vector):
             raise ValueError(
@@ -122,6 +187,234 @@ class MatrixVectorProduct:
     
         return result
 
+    def calc_batch(self, matrix, vectors):
+        """
+        Calculate matrix vector products for a stack of vectors
+        :param matrix:  Input matrix, shape [rows, cols], or CsrMatrix
+        :param vectors: Input vectors, shape [num_vectors, cols]
+        :return:        Results, shape [num_vectors, rows]
+        """
+        return self._calc_prepared(self._prepare_matrix(matrix), vectors)
+
+    def calc_matrix(self, matrix, block):
+        """
+        Calculate the matrix product with a block of column vectors (A @ V),
+        like BATCH_SIZE_G of the RTL every matrix row is reused for all
+        columns. The matrix is converted once and the whole block is computed
+        in one vectorized pass.
+        :param matrix: Input matrix, shape [rows, cols], or CsrMatrix
+        :param block:  Input vectors as columns, shape [cols, batch]
+        :return:       Results as columns, shape [rows, batch]
+        """
+        block = np.asarray(block)
+        if block.ndim != 2:
+            raise ValueError(f"Vector block must be two-dimensional (got shape {block.shape}).")
+        return self._calc_prepared(self._prepare_matrix(matrix), block.T, columns=True)
+
+    def load_matrix(self, matrix):
+        """
+        Load a matrix for calc_stream(), like the matrix load interface of the
+        RTL (MATRIX_LOAD_G). The matrix is validated and converted to integer
+        mantissas once. A CsrMatrix is kept sparse, only its nonzero elements
+        are multiplied.
+        :param matrix: Input matrix, shape [rows, cols], or CsrMatrix
+        """
+        self._loaded_matrix = self._prepare_matrix(matrix)
+
+    def calc_stream(self, vectors):
+        """
+        Calculate matrix vector products of the loaded matrix
+        :param vectors: Input vectors, shape [num_vectors, cols]
+        :return:        Results, shape [num_vectors, rows]
+        """
+        if self._loaded_matrix is None:
+            raise RuntimeError("No matrix loaded, call load_matrix() first.")
+        return self._calc_prepared(self._loaded_matrix, vectors)
+
+    def self_check(self, rows : int = 5, cols : int = 7, num_vectors : int = 9, seed : int = 42):
+        """
+        Prove that the chunked calculation of calc_batch() and calc_matrix()
+        is bit-exact with a single kernel call, with one vector per chunk
+        :param rows:        Number of matrix rows
+        :param cols:        Number of matrix columns
+        :param num_vectors: Number of vectors
+        :param seed:        Seed of the sampled inputs
+        """
+        rng = np.random.default_rng(seed)
+        matrix = cl_fix_from_real(rng.uniform(cl_fix_min_value(self._fmt_matrix), cl_fix_max_value(self._fmt_matrix),
+                                              (rows, cols)), self._fmt_matrix)
+        vectors = cl_fix_from_real(rng.uniform(cl_fix_min_value(self._fmt_vector), cl_fix_max_value(self._fmt_vector),
+                                               (num_vectors, cols)), self._fmt_vector)
+
+        kernel = self._fix_dot_product.kernel
+        wide = kernel.is_wide(cols)
+        prepared = self._prepare_matrix(matrix)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            reference = to_mantissa(self._calc_prepared(prepared, vectors), self._fmt_result, wide=True)
+            batch = self._calc_prepared(prepared, vectors, max_elements=1)
+            block = self._calc_prepared(prepared, vectors, columns=True, max_elements=1)
+
+        if not np.array_equal(to_mantissa(batch, self._fmt_result, wide=True), reference) or \
+           not np.array_equal(to_mantissa(block, self._fmt_result, wide=True), reference.T):
+            raise RuntimeError("MatrixVectorProduct self-check failed: chunked results differ.")
+
+    # --------------------------------------------------------------------------
+    # Private Methods
+    # --------------------------------------------------------------------------
+    def _prepare_matrix(self, matrix):
+        if isinstance(matrix, CsrMatrix):
+            # Packed rows share the vector elements, their zeros differ
+            if not self._packed:
+                return self._prepare_sparse(matrix)
+            matrix = matrix.to_dense()
+
+        matrix = np.asarray(matrix)
+        if matrix.ndim != 2:
+            raise ValueError(f"Matrix must be two-dimensional (got shape {matrix.shape}).")
+
+        # Mantissas of shape [1, rows, cols] broadcast against [chunk, 1, cols]
+        wide = self._fix_dot_product.kernel.is_wide(matrix.shape[1])
+        return to_mantissa(matrix, self._fmt_matrix, wide)[np.newaxis, :, :]
+
+    def _prepare_sparse(self, matrix : CsrMatrix):
+        # Nonzero mantissas of shape [1, rows, lanes, width] and the columns
+        # of the vector elements they are multiplied with
+        values, columns = matrix.lane_gather(self._num_lanes)
+        wide = self._fix_dot_product.kernel.is_wide(matrix.shape[1])
+        return _SparseMantissas(to_mantissa(values, self._fmt_matrix, wide)[np.newaxis], columns, matrix.shape[1])
+
+    def _calc_prepared(self, matrix, vectors, columns : bool = False, max_elements : int = BATCH_MAX_ELEMENTS):
+        # With columns the results are returned as [rows, num_vectors]
+        vectors = np.atleast_2d(np.asarray(vectors))
+
+        # Basic validation
+        cols = matrix.cols if isinstance(matrix, _SparseMantissas) else matrix.shape[-1]
+        if cols != vectors.shape[-1]:
+            raise ValueError(
+                f"Matrix column count ({cols}) must match vector length ({vectors.shape[-1]})."
+            )
+
+        # The vectors are processed in chunks to keep the product array within
+        # max_elements. The kernels return mantissas, they are converted once
+        # after concatenation (wide results are en_cl_fix objects).
+        chunk = max(1, max_elements // max(1, int(np.prod(matrix.shape[1:]))))
+        wide = matrix.dtype == object
+
+        kernel = self._fix_dot_product.kernel
+        result = []
+        for start in range(0, len(vectors), chunk):
+            block = to_mantissa(vectors[start:start + chunk], self._fmt_vector, wide)
+            if isinstance(matrix, _SparseMantissas):
+                values, block = matrix.values, block[:, matrix.columns]
+                if columns:
+                    # [rows, 1, lanes, width] against [rows, chunk, lanes, width]
+                    values, block = values[0][:, np.newaxis], np.moveaxis(block, 0, 1)
+                result.append(kernel.process_lanes_mantissa(values, block))
+            elif self._packed:
+                # Pairs of rows share a packed multiplier (PACKED_G)
+                if columns:
+                    result.append(kernel.process_packed_mantissa(matrix[0][:, np.newaxis, :], block[np.newaxis], axis=-3))
+                else:
+                    result.append(kernel.process_packed_mantissa(matrix, block[:, np.newaxis, :], axis=-2))
+            elif columns:
+                # [rows, 1, cols] against [1, chunk, cols]
+                result.append(kernel.process_mantissa(matrix[0][:, np.newaxis, :], block[np.newaxis]))
+            else:
+                result.append(kernel.process_mantissa(matrix, block[:, np.newaxis, :]))
+
+        return from_mantissa(np.concatenate(result, axis=1 if columns else 0), self._fmt_result)
+
+class _SparseMantissas:
+    # Prepared CsrMatrix, see MatrixVectorProduct._prepare_sparse()
+
+    def __init__(self, values, columns, cols : int):
+        self.values = values
+        self.columns = columns
+        self.cols = cols
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+################################################################################
+# Schedule
+################################################################################
+def num_stages(rows, num_dot_products):
+    """
+    Number of fix_dot_product stages (NUM_STAGES_C), works element-wise on arrays
+    :param rows:             MATRIX_ROW_WIDTH_G
+    :param num_dot_products: NUM_DOT_PRODUCTS_G
+    :return:                 ceil(rows / num_dot_products)
+    """
+    return MatrixVectorProductTiming(num_dot_products, rows, 1).num_stages
+
+def stage_stream(results, fmt_result : FixFormat, num_dot_products : int):
+    """
+    Split result vectors into the stage output stream of OUT_STREAM_G: every
+    stage emits the results of its NUM_DOT_PRODUCTS_G rows, the rows beyond
+    MATRIX_ROW_WIDTH_G in the last stage are zero
+    :param results:          Result vectors, shape [num_vectors, rows]
+    :param fmt_result:       Format of the results
+    :param num_dot_products: NUM_DOT_PRODUCTS_G
+    :return:                 Tuple of (stage results, last), shape [num_vectors * NUM_STAGES_C, num_dot_products]
+                             and [num_vectors * NUM_STAGES_C], last is set for the last stage of a vector
+    """
+    # Wide results are en_cl_fix objects, their mantissas are padded instead
+    wide = not isinstance(results, np.ndarray)
+    mantissa = to_mantissa(results, fmt_result, wide)
+    num_vectors, rows = mantissa.shape
+    stages = int(num_stages(rows, num_dot_products))
+
+    padded = np.zeros((num_vectors, stages * num_dot_products), dtype=mantissa.dtype)
+    padded[:, :rows] = mantissa
+    last = np.tile(np.arange(stages) == stages - 1, num_vectors)
+    return from_mantissa(padded.reshape(-1, num_dot_products), fmt_result), last
+
+def cycles_per_product(rows, cols, num_dot_products, streaming : bool = False, num_lanes = 1, matrix_mask = None,
+                       batch_size : int = 1, mac_pipeline = 1, double_pump : bool = False):
+    """
+    Clock cycles between two accepted inputs at full speed (see fix_timing.py),
+    averaged over a batch with BATCH_SIZE_G. Without STREAMING_G and
+    BATCH_SIZE_G this is also the latency. Works element-wise on arrays
+    unless matrix_mask is given.
+    :param rows:             MATRIX_ROW_WIDTH_G
+    :param cols:             MATRIX_COLUMN_WIDTH_G
+    :param num_dot_products: NUM_DOT_PRODUCTS_G
+    :param streaming:        STREAMING_G
+    :param num_lanes:        NUM_LANES_G
+    :param matrix_mask:      Nonzero mask of the matrix with SKIP_ZEROS_G, shape [rows, cols]
+    :param batch_size:       BATCH_SIZE_G
+    :param mac_pipeline:     MAC_PIPELINE_G
+    :param double_pump:      DOUBLE_PUMP_G
+    :return:                 Cycles per matrix vector product
+    """
+    return MatrixVectorProductTiming(num_dot_products, rows, cols, streaming, num_lanes, matrix_mask, batch_size,
+                                     mac_pipeline, double_pump).period
+
+def dsps_per_mac(fmt_matrix : FixFormat, fmt_vector : FixFormat) -> int:
+    """
+    Number of DSP48E1 slices of one fix_dsp_mac multiplier (see fix_format_analysis.py)
+    :param fmt_matrix: Format of the matrix elements
+    :param fmt_vector: Format of the vector elements
+    :return:           Number of cascaded DSP slices
+    """
+    return fix_format_analysis.dsps_per_mac(fmt_matrix, fmt_vector)
+
+def packed_dsps(fmt_matrix : FixFormat, fmt_vector : FixFormat) -> int:
+    """
+    Number of DSP48E1 slices of one fix_dsp_mac_packed multiplier, which
+    computes the products of two rows (PACKED_G, see fix_format_analysis.py)
+    :param fmt_matrix: Format of the matrix elements
+    :param fmt_vector: Format of the vector elements
+    :return:           Number of cascaded DSP slices
+    """
+    return fix_format_analysis.packed_dsps(fmt_matrix, fmt_vector)
+
 ################################################################################
 # Functions
 ################################################################################
@@ -130,12 +423,24 @@ def cosim(output_path : str = None,
           cosim_mode : bool = True):
 
     #Parse Generics
+    fix_profile.mark("parse_generics")
 
     COSIM_NUM_TEST_VECTORS_G = generics["COSIM_NUM_TEST_VECTORS_G"]
     COSIM_MATRIX_TYPE_G = generics["COSIM_MATRIX_TYPE_G"]
 
     MATRIX_ROW_WIDTH_G =    generics["MATRIX_ROW_WIDTH_G"]
     MATRIX_COLUMN_WIDTH_G = generics["MATRIX_COLUMN_WIDTH_G"]
+    NUM_LANES_G =           generics.get("NUM_LANES_G", 1)
+    BATCH_SIZE_G =          generics.get("BATCH_SIZE_G", 1)
+    MAC_PIPELINE_G =        generics.get("MAC_PIPELINE_G", 1)
+    PACKED_G =              generics.get("PACKED_G", False)
+    OUT_STREAM_G =          generics.get("OUT_STREAM_G", False)
+    NUM_DOT_PRODUCTS_G =    generics["NUM_DOT_PRODUCTS_G"]
+
+    # The RTL only computes complete batches
+    if COSIM_NUM_TEST_VECTORS_G % BATCH_SIZE_G != 0:
+        raise ValueError(f"COSIM_NUM_TEST_VECTORS_G ({COSIM_NUM_TEST_VECTORS_G}) must be a multiple of "
+                         f"BATCH_SIZE_G ({BATCH_SIZE_G}).")
 
     FMT_IN_MATRIX_ELEMENT_G = olo_fix_utils.fix_format_from_string(generics["FMT_IN_MATRIX_ELEMENT_G"])
     FMT_IN_VECTOR_ELEMENT_G = olo_fix_utils.fix_format_from_string(generics["FMT_IN_VECTOR_ELEMENT_G"])
@@ -150,64 +455,112 @@ def cosim(output_path : str = None,
     Round = FixRound.Trunc_s
     Saturate = FixSaturate.Warn_s
 
-    np.random.seed(42)  # Set the seed for reproducibility
-
-    # Generate test vectors
-    if COSIM_NUM_TEST_VECTORS_G > 2:
-        NUM_RANDOM_VECTOR = COSIM_NUM_TEST_VECTORS_G - 2
-    else:
-        NUM_RANDOM_VECTOR = 0
-    in_vector = []
-    in_vector.append(np.full(MATRIX_COLUMN_WIDTH_G ,cl_fix_max_value(FMT_IN_VECTOR_ELEMENT_G)))
-    in_vector.append(np.full(MATRIX_COLUMN_WIDTH_G ,cl_fix_min_value(FMT_IN_VECTOR_ELEMENT_G)))
-    for i in range(NUM_RANDOM_VECTOR):
-        in_vector.append(np.random.uniform(cl_fix_min_value(FMT_IN_VECTOR_ELEMENT_G), cl_fix_max_value(FMT_IN_VECTOR_ELEMENT_G), MATRIX_COLUMN_WIDTH_G))
-
-    in_vector = np.stack(in_vector)
-    in_vector = cl_fix_from_real(in_vector, FMT_IN_VECTOR_ELEMENT_G)
-
-    matrix_bit_step = 2**(-FMT_IN_MATRIX_ELEMENT_G.F)
-    if COSIM_MATRIX_TYPE_G == "ASCENDING":
-        in_matrix = [[cl_fix_min_value(FMT_IN_MATRIX_ELEMENT_G) + (col + row*MATRIX_COLUMN_WIDTH_G) * matrix_bit_step for col in range(MATRIX_COLUMN_WIDTH_G)] for row in range(MATRIX_ROW_WIDTH_G)]
-        in_matrix = np.stack(in_matrix)
-    elif COSIM_MATRIX_TYPE_G == "DESCENDING":
-        in_matrix = [[cl_fix_max_value(FMT_IN_MATRIX_ELEMENT_G) - (col + row*MATRIX_COLUMN_WIDTH_G) * matrix_bit_step for col in range(MATRIX_COLUMN_WIDTH_G)] for row in range(MATRIX_ROW_WIDTH_G)]
-        in_matrix = np.stack(in_matrix)
-    else:
-        raise ValueError(
-            f"Invalid COSIM_MATRIX_TYPE_G='{COSIM_MATRIX_TYPE_G}'. "
-            f"Expected one of: ['ASCENDING', 'DESCENDING']."
-        )
-
-    matrix_vector_product = MatrixVectorProduct(FMT_IN_MATRIX_ELEMENT_G, FMT_IN_VECTOR_ELEMENT_G, FMT_OUT_RESULT_G);
+    fix_profile.mark("matrix")
+    in_matrix = cosim_matrix(COSIM_MATRIX_TYPE_G, MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G, FMT_IN_MATRIX_ELEMENT_G)
 
-    result = []
-    for v in in_vector:
-        result.append(matrix_vector_product.calc(in_matrix, v))
-
-    result = np.stack(result)
+    matrix_vector_product = MatrixVectorProduct(FMT_IN_MATRIX_ELEMENT_G, FMT_IN_VECTOR_ELEMENT_G, FMT_OUT_RESULT_G,
+                                                Round, Saturate, NUM_LANES_G, MAC_PIPELINE_G, PACKED_G);
 
     if not cosim_mode:
-        print()
-        print(f"in_vector\n {in_vector}\n")
         print()
         print(f"in_matrix\n {in_matrix}\n")
 
+    # Generate test vectors chunk by chunk, so memory does not grow with COSIM_NUM_TEST_VECTORS_G
+    chunk_size = max(1, COSIM_CHUNK_ELEMENTS // max(MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G))
+    chunks = vector_chunks(COSIM_NUM_TEST_VECTORS_G, MATRIX_COLUMN_WIDTH_G, FMT_IN_VECTOR_ELEMENT_G, chunk_size,
+                           FixStimuli.for_config(generics))
+
+    if not cosim_mode:
+        for in_vector in chunks:
+            print()
+            print(f"in_vector\n {in_vector}\n")
+        return True
+
+    # The matrix is fixed, only vectors are streamed. Structured matrices are
+    # kept sparse, the model then only multiplies nonzero elements.
+    if COSIM_MATRIX_TYPE_G in SPARSE_MATRIX_TYPES:
+        matrix_vector_product.load_matrix(CsrMatrix.from_dense(in_matrix))
+    else:
+        matrix_vector_product.load_matrix(in_matrix)
+
     #Write Files
-    if cosim_mode:
-        writer = olo_fix_cosim(output_path)
-        writer.write_cosim_file(in_vector, FMT_IN_VECTOR_ELEMENT_G, "in_vector.fix", dim=MATRIX_COLUMN_WIDTH_G)
-        writer.write_cosim_file(result, FMT_OUT_RESULT_G, "result.fix", dim=MATRIX_ROW_WIDTH_G)
+    # With OUT_STREAM_G the results are checked stage by stage, one line per
+    # stage. Vectors are generated lazily, their time is the stream phase
+    # outside model and write.
+    fix_profile.mark("stream")
+    result_dim = NUM_DOT_PRODUCTS_G if OUT_STREAM_G else MATRIX_ROW_WIDTH_G
+    with FixCosimStreamWriter(output_path, FMT_IN_VECTOR_ELEMENT_G, "in_vector.fix", dim=MATRIX_COLUMN_WIDTH_G) as vector_writer, \
+         FixCosimStreamWriter(output_path, FMT_OUT_RESULT_G, "result.fix", dim=result_dim) as result_writer:
+        for in_vector in chunks:
+            with fix_profile.phase("model"):
+                result = matrix_vector_product.calc_stream(in_vector)
+                if OUT_STREAM_G:
+                    result, _ = stage_stream(result, FMT_OUT_RESULT_G, NUM_DOT_PRODUCTS_G)
+            with fix_profile.phase("write"):
+                vector_writer.append(in_vector)
+                result_writer.append(result)
     return True
 
+def cosim_matrix(matrix_type : str, rows : int, cols : int, fmt : FixFormat):
+    """
+    Matrix of the testbench, see support_matrix_generator_pkg
+    :param matrix_type: COSIM_MATRIX_TYPE_G
+    :param rows:        MATRIX_ROW_WIDTH_G
+    :param cols:        MATRIX_COLUMN_WIDTH_G
+    :param fmt:         Format of the matrix elements
+    :return:            Matrix, shape [rows, cols]
+    """
+    # Elements count up (or down) by one LSB in row-major order
+    matrix_bit_step = 2**(-fmt.F)
+    steps = np.arange(rows * cols).reshape(rows, cols) * matrix_bit_step
+    ascending = cl_fix_min_value(fmt) + steps
+
+    if matrix_type == "ASCENDING":
+        return ascending
+    if matrix_type == "DESCENDING":
+        return cl_fix_max_value(fmt) - steps
+    # Structured matrices are ASCENDING inside their nonzero pattern
+    if matrix_type == "BANDED":
+        return np.where(band_mask(rows, cols), ascending, 0.0)
+    if matrix_type == "SPARSE":
+        return np.where(block_mask(rows, cols), ascending, 0.0)
+    raise ValueError(
+        f"Invalid COSIM_MATRIX_TYPE_G='{matrix_type}'. "
+        f"Expected one of: {MATRIX_TYPES}."
+    )
+
+def vector_chunks(num_vectors : int, dimension : int, fmt : FixFormat, chunk_size : int, stimuli : FixStimuli = None):
+    """
+    Generate the cosim test vectors in chunks
+    :param num_vectors: Total number of test vectors
+    :param dimension:   Number of elements per vector
+    :param fmt:         Format of the vector elements
+    :param chunk_size:  Maximum number of vectors per chunk
+    :param stimuli:     Random streams of the config, default seed if None
+    :return:            Generator of quantized vector chunks, shape [chunk, dimension]
+    """
+    if stimuli is None:
+        stimuli = FixStimuli()
+
+    # The first two test vectors hold the largest and smallest value, a quarter
+    # of the others is heavy-tailed. The vectors do not depend on chunk_size.
+    return stimuli.draw_chunks("in_vector", fmt, num_vectors, dimension, chunk_size, corners=True, heavy=0.25)
+
 ################################################################################
 # Main
 ################################################################################
 if __name__ == "__main__":
+    # Self-check the chunked calculation, (1, 45, 40) results are wide
+    MatrixVectorProduct(FixFormat(1, 3, 2), FixFormat(1, 5, 8), FixFormat(1, 13, 10)).self_check()
+    MatrixVectorProduct(FixFormat(1, 3, 2), FixFormat(1, 5, 8), FixFormat(1, 13, 10), packed=True).self_check()
+    MatrixVectorProduct(FixFormat(1, 20, 20), FixFormat(1, 20, 20), FixFormat(1, 45, 40)).self_check()
+    MatrixVectorProduct(FixFormat(1, 20, 20), FixFormat(1, 20, 20), FixFormat(1, 45, 40), num_lanes=3).self_check()
+
     # Example usage
     generics = {
         "COSIM_NUM_TEST_VECTORS_G"  : 5,
         "COSIM_MATRIX_TYPE_G"       : "ASCENDING",
+        "NUM_DOT_PRODUCTS_G"        : 2,
         "MATRIX_ROW_WIDTH_G"        : 4,
         "MATRIX_COLUMN_WIDTH_G"     : 4,
         "FMT_IN_MATRIX_ELEMENT_G"   : "(0,  4, 1)",
@@ -19,6 +19,7 @@ use vunit_lib.sync_pkg.all;
 
 library olo;
 use olo.olo_base_pkg_array.all;
+use olo.olo_base_pkg_math.all;
 use olo.en_cl_fix_pkg.all;
 use olo.olo_fix_pkg.all;
 
@@ -38,6 +39,15 @@ entity fix_matrix_vector_product_vunit_tb is
         COSIM_MATRIX_TYPE_G      : string  := "ASCENDING";
 
         NUM_DOT_PRODUCTS_G : positive := 11;
+        STREAMING_G        : boolean  := false;
+        MATRIX_LOAD_G      : boolean  := false;
+        NUM_LANES_G        : positive := 1;
+        SKIP_ZEROS_G       : boolean  := false;
+        BATCH_SIZE_G       : positive := 1;
+        MAC_PIPELINE_G     : positive := 1;
+        DOUBLE_PUMP_G      : boolean  := false;
+        PACKED_G           : boolean  := false;
+        OUT_STREAM_G       : boolean  := false;
 
         MATRIX_ROW_WIDTH_G    : natural := 32;
         MATRIX_COLUMN_WIDTH_G : natural := 32;
@@ -61,18 +71,28 @@ architecture sim of fix_matrix_vector_product_vunit_tb is
     -----------------------------------------------------------------------------------------------
     -- Interface Signals
     -----------------------------------------------------------------------------------------------
-    signal clk_i : std_logic := '0';
-    signal rst_i : std_logic := '0';
+    signal clk_i   : std_logic := '0';
+    signal rst_i   : std_logic := '0';
+    signal clk2x_i : std_logic := '1';
 
     signal in_valid_i  : std_logic;
     signal in_ready_o  : std_logic;
     signal in_matrix_i : StlvVectorArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G) - 1 downto 0);
     signal in_vector_i : StlvArray_t(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_VECTOR_ELEMENT_G) - 1 downto 0);
 
+    signal in_load_valid_i : std_logic := '0';
+    signal in_load_ready_o : std_logic;
+    signal in_load_row_i   : StlvArray_t(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G) - 1 downto 0);
+
     signal out_valid_o  : std_logic;
     signal out_error_o  : std_logic;
     signal out_result_o : StlvArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
 
+    signal out_stream_valid_o  : std_logic;
+    signal out_stream_ready_i  : std_logic := '1';
+    signal out_stream_last_o   : std_logic;
+    signal out_stream_result_o : StlvArray_t(NUM_DOT_PRODUCTS_G - 1 downto 0)(fixFmtWidthFromString(FMT_OUT_RESULT_G) - 1 downto 0);
+
     -----------------------------------------------------------------------------------------------
     -- TB Definitions
     -----------------------------------------------------------------------------------------------
@@ -85,6 +105,94 @@ architecture sim of fix_matrix_vector_product_vunit_tb is
     constant VECTOR_FILE_C : string := output_path(runner_cfg) & "in_vector.fix";
     constant RESULT_FILE_C : string := output_path(runner_cfg) & "result.fix";
 
+    -- Structure of the BANDED and SPARSE matrices, must match fix_sparse.py
+    constant COSIM_BAND_HALF_WIDTH_C : natural := 1;
+    constant COSIM_BLOCK_SIZE_C      : natural := 4;
+    constant COSIM_BLOCK_PERIOD_C    : natural := 4;
+
+    function cosim_matrix return StlvVectorArray_t is
+    begin
+        if (COSIM_MATRIX_TYPE_G = "DESCENDING") then
+            return descending_matrix(MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G, fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G));
+        elsif (COSIM_MATRIX_TYPE_G = "BANDED") then
+            return banded_matrix(MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G, fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G),
+                                 COSIM_BAND_HALF_WIDTH_C);
+        elsif (COSIM_MATRIX_TYPE_G = "SPARSE") then
+            return block_sparse_matrix(MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G, fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G),
+                                       COSIM_BLOCK_SIZE_C, COSIM_BLOCK_PERIOD_C);
+        end if;
+        return ascending_matrix(MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G, fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G));
+    end function;
+
+    constant MATRIX_C : StlvVectorArray_t(MATRIX_ROW_WIDTH_G - 1 downto 0)(MATRIX_COLUMN_WIDTH_G - 1 downto 0)(fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G) - 1 downto 0) := cosim_matrix;
+
+    -- Cycles between two out_valid_o pulses with back-to-back stimuli, with
+    -- BATCH_SIZE_G between the last result of a batch and the first of the next
+    constant NUM_STAGES_C  : positive := integer(ceil(real(MATRIX_ROW_WIDTH_G) / real(NUM_DOT_PRODUCTS_G)));
+    constant LANE_LENGTH_C : positive := integer(ceil(real(MATRIX_COLUMN_WIDTH_G) / real(NUM_LANES_G)));
+    constant TREE_LEVELS_C : natural  := log2ceil(NUM_LANES_G * MAC_PIPELINE_G);
+    -- Registered multiplier and accumulator loop with MAC_PIPELINE_G > 1,
+    -- clock domain crossings with DOUBLE_PUMP_G
+    constant MAC_DELAY_C   : natural  := minimum(1, MAC_PIPELINE_G - 1) + MAC_PIPELINE_G - 1 + 3 * boolean'pos(DOUBLE_PUMP_G);
+
+    -- Lane length of a stage with SKIP_ZEROS_G (see fix_timing.py): lane
+    -- element 0 plus the elements that are nonzero in any lane, maximum of
+    -- all rows of the stage
+    function skip_zeros_lane_length(stage : natural) return positive is
+        variable row_v    : natural;
+        variable col_v    : natural;
+        variable used_v   : boolean;
+        variable count_v  : positive;
+        variable length_v : positive := 1;
+    begin
+        for i in 0 to NUM_DOT_PRODUCTS_G - 1 loop
+            row_v := i + stage * NUM_DOT_PRODUCTS_G;
+            if row_v < MATRIX_ROW_WIDTH_G then
+                count_v := 1;
+                for idx in 1 to LANE_LENGTH_C - 1 loop
+                    used_v := false;
+                    for lane in 0 to NUM_LANES_G - 1 loop
+                        col_v := lane * LANE_LENGTH_C + idx;
+                        if col_v < MATRIX_COLUMN_WIDTH_G and unsigned(MATRIX_C(row_v)(col_v)) /= 0 then
+                            used_v := true;
+                        end if;
+                    end loop;
+                    if used_v then
+                        count_v := count_v + 1;
+                    end if;
+                end loop;
+                length_v := maximum(length_v, count_v);
+            end if;
+        end loop;
+        return length_v;
+    end function;
+
+    function out_period return positive is
+        variable cycles_v : natural := 1;
+    begin
+        if STREAMING_G then
+            return NUM_STAGES_C * LANE_LENGTH_C;
+        end if;
+        if SKIP_ZEROS_G then
+            for stage in 0 to NUM_STAGES_C - 1 loop
+                cycles_v := cycles_v + skip_zeros_lane_length(stage) + TREE_LEVELS_C + MAC_DELAY_C + 2;
+            end loop;
+            return cycles_v;
+        end if;
+        -- The results of a batch leave back to back, the next batch is
+        -- accepted with the last one
+        return NUM_STAGES_C * (BATCH_SIZE_G * LANE_LENGTH_C + TREE_LEVELS_C + MAC_DELAY_C + 2) + BATCH_SIZE_G;
+    end function;
+
+    constant OUT_PERIOD_C : positive := out_period;
+
+    signal check_out_period : boolean := false;
+
+    -- OUT_STREAM_G: out_stream_ready_i is throttled in the Throttled run, the
+    -- last stage of a result vector completes it
+    signal throttle_out_stream : boolean := false;
+    signal out_done            : std_logic;
+
 begin
 
     -----------------------------------------------------------------------------------------------
@@ -108,12 +216,14 @@ begin
 
             -- *** First Run ***
             if run("FullSpeed") then
+                check_out_period <= true;
                 fix_stimuli_play_file (net, STIMULI_VECTOR_C, VECTOR_FILE_C);
                 fix_checker_check_file (net, CHECKER_RESULT_C, RESULT_FILE_C);
             end if;
 
             -- *** Second run with delay ***
             if run("Throttled") then
+                throttle_out_stream <= true;
                 fix_stimuli_play_file (net, STIMULI_VECTOR_C, VECTOR_FILE_C, stall_probability => 0.5, stall_max_cycles => 10);
                 fix_checker_check_file (net, CHECKER_RESULT_C, RESULT_FILE_C);
             end if;
@@ -121,6 +231,8 @@ begin
             -- *** Wait until done ***
             wait_until_idle(net, as_sync(STIMULI_VECTOR_C));
             wait_until_idle(net, as_sync(CHECKER_RESULT_C));
+            check_out_period    <= false;
+            throttle_out_stream <= false;
             wait for 1 us;
 
         end loop;
@@ -133,6 +245,83 @@ begin
     -- Clock
     -----------------------------------------------------------------------------------------------
     clk_i <= not clk_i after 0.5*CLK_PERIOD_C;
+    -- Rising edges aligned with clk_i (starts high)
+    clk2x_i <= not clk2x_i after 0.25*CLK_PERIOD_C;
+
+    -----------------------------------------------------------------------------------------------
+    -- Throughput
+    -----------------------------------------------------------------------------------------------
+    out_done <= out_stream_valid_o and out_stream_ready_i and out_stream_last_o when OUT_STREAM_G else out_valid_o;
+
+    p_out_period : process(clk_i) is
+        variable cycles : natural := 0;
+        variable first  : boolean := true;
+        variable pulses : natural := 0;
+    begin
+        if rising_edge(clk_i) then
+            cycles := cycles + 1;
+            if rst_i = '1' then
+                first  := true;
+                pulses := 0;
+            elsif out_done = '1' then
+                if check_out_period and not first then
+                    if (pulses mod BATCH_SIZE_G /= 0) then
+                        check_equal(cycles, 1, "out_valid_o period within a batch");
+                    else
+                        check_equal(cycles, OUT_PERIOD_C, "out_valid_o period");
+                    end if;
+                end if;
+                first  := false;
+                cycles := 0;
+                pulses := pulses + 1;
+            end if;
+        end if;
+    end process;
+
+    -----------------------------------------------------------------------------------------------
+    -- Stage Output
+    -----------------------------------------------------------------------------------------------
+    p_out_stream : process(clk_i) is
+        variable seed1  : positive := 42;
+        variable seed2  : positive := 7;
+        variable rand   : real;
+        variable stages : natural  := 0;
+    begin
+        if rising_edge(clk_i) then
+            uniform(seed1, seed2, rand);
+            if throttle_out_stream and rand < 0.5 then
+                out_stream_ready_i <= '0';
+            else
+                out_stream_ready_i <= '1';
+            end if;
+
+            if rst_i = '1' then
+                stages := 0;
+            elsif out_stream_valid_o = '1' and out_stream_ready_i = '1' then
+                check_equal(out_stream_last_o, stages = NUM_STAGES_C - 1, "out_stream_last_o");
+                stages := (stages + 1) mod NUM_STAGES_C;
+            end if;
+        end if;
+    end process;
+
+    -----------------------------------------------------------------------------------------------
+    -- Matrix Load
+    -----------------------------------------------------------------------------------------------
+    -- Load the matrix row by row after every reset, vectors are held back by in_ready_o meanwhile
+    p_matrix_load : process is
+    begin
+        in_load_valid_i <= '0';
+        wait until falling_edge(rst_i);
+
+        if MATRIX_LOAD_G then
+            for row in 0 to MATRIX_ROW_WIDTH_G - 1 loop
+                in_load_valid_i <= '1';
+                in_load_row_i   <= in_matrix_i(row);
+                wait until rising_edge(clk_i) and in_load_ready_o = '1';
+            end loop;
+            in_load_valid_i <= '0';
+        end if;
+    end process;
 
     dut : entity work.fix_matrix_vector_product
         generic map (
@@ -141,27 +330,41 @@ begin
             MATRIX_COLUMN_WIDTH_G   => MATRIX_COLUMN_WIDTH_G,
             FMT_IN_MATRIX_ELEMENT_G => FMT_IN_MATRIX_ELEMENT_G,
             FMT_IN_VECTOR_ELEMENT_G => FMT_IN_VECTOR_ELEMENT_G,
-            FMT_OUT_RESULT_G        => FMT_OUT_RESULT_G
+            FMT_OUT_RESULT_G        => FMT_OUT_RESULT_G,
+            STREAMING_G             => STREAMING_G,
+            MATRIX_LOAD_G           => MATRIX_LOAD_G,
+            NUM_LANES_G             => NUM_LANES_G,
+            SKIP_ZEROS_G            => SKIP_ZEROS_G,
+            BATCH_SIZE_G            => BATCH_SIZE_G,
+            MAC_PIPELINE_G          => MAC_PIPELINE_G,
+            DOUBLE_PUMP_G           => DOUBLE_PUMP_G,
+            PACKED_G                => PACKED_G,
+            OUT_STREAM_G            => OUT_STREAM_G
         )
         port map (
             clk_i        => clk_i,
             rst_i        => rst_i,
+            clk2x_i      => clk2x_i,
             in_valid_i   => in_valid_i,
             in_ready_o   => in_ready_o,
             in_matrix_i  => in_matrix_i,
             in_vector_i  => in_vector_i,
+
+            in_load_valid_i => in_load_valid_i,
+            in_load_ready_o => in_load_ready_o,
+            in_load_row_i   => in_load_row_i,
+
             out_valid_o  => out_valid_o,
             out_error_o  => out_error_o,
-            out_result_o => out_result_o
-        );
+            out_result_o => out_result_o,
 
-    GEN_ASCENDING_MATRIX : if (COSIM_MATRIX_TYPE_G = "ASCENDING") generate
-        in_matrix_i <= ascending_matrix(MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G, fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G));
-    end generate GEN_ASCENDING_MATRIX;
+            out_stream_valid_o  => out_stream_valid_o,
+            out_stream_ready_i  => out_stream_ready_i,
+            out_stream_last_o   => out_stream_last_o,
+            out_stream_result_o => out_stream_result_o
+        );
 
-    GEN_DESCENDING_MATRIX : if (COSIM_MATRIX_TYPE_G = "DESCENDING") generate
-        in_matrix_i <= descending_matrix(MATRIX_ROW_WIDTH_G, MATRIX_COLUMN_WIDTH_G, fixFmtWidthFromString(FMT_IN_MATRIX_ELEMENT_G));
-    end generate GEN_DESCENDING_MATRIX;
+    in_matrix_i <= MATRIX_C;
 
     -----------------------------------------------------------------------------------------------
     -- Verification Components
@@ -181,17 +384,39 @@ begin
             Data  => in_vector_i
         );
 
-    vc_checker_result : entity work.olo_test_fix_checker_array_vc
-        generic map (
-            Instance => CHECKER_RESULT_C,
-            Dim      => MATRIX_ROW_WIDTH_G,
-            Fmt      => cl_fix_format_from_string(FMT_OUT_RESULT_G)
-        )
-        port map (
-            Clk => clk_i,
-
-            Valid => out_valid_o,
-            Data  => out_result_o
-        );
+    g_check_vector : if not OUT_STREAM_G generate
+        vc_checker_result : entity work.olo_test_fix_checker_array_vc
+            generic map (
+                Instance => CHECKER_RESULT_C,
+                Dim      => MATRIX_ROW_WIDTH_G,
+                Fmt      => cl_fix_format_from_string(FMT_OUT_RESULT_G)
+            )
+            port map (
+                Clk => clk_i,
+
+                Valid => out_valid_o,
+                Data  => out_result_o
+            );
+    end generate;
+
+    -- The result file holds one line per stage (see fix_matrix_vector_product.py)
+    g_check_stream : if OUT_STREAM_G generate
+        signal out_stream_handshake : std_logic;
+    begin
+        out_stream_handshake <= out_stream_valid_o and out_stream_ready_i;
+
+        vc_checker_result : entity work.olo_test_fix_checker_array_vc
+            generic map (
+                Instance => CHECKER_RESULT_C,
+                Dim      => NUM_DOT_PRODUCTS_G,
+                Fmt      => cl_fix_format_from_string(FMT_OUT_RESULT_G)
+            )
+            port map (
+                Clk => clk_i,
+
+                Valid => out_stream_handshake,
+                Data  => out_stream_result_o
+            );
+    end generate;
 
 end architecture;
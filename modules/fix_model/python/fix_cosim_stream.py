@@ -0,0 +1,228 @@
+################################################################################
+# fix_cosim_stream.py
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+# Import python packages
+import sys
+import os
+import tempfile
+import numpy as np
+from functools import lru_cache
+
+#Import olo_fix
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../submodules/open-logic/src/fix/python")))
+from olo_fix import olo_fix_cosim
+from en_cl_fix_pkg import *
+
+#Import fixed point model
+from fix_kernel import to_mantissa, from_mantissa
+
+################################################################################
+# Constants
+################################################################################
+# Samples of the first chunk compared against the detected line layout
+LAYOUT_CHECK_SAMPLES = 16
+
+# Element separators tried when detecting the line layout
+LAYOUT_SEPARATORS = (" ", ",", ", ", "\t", ";")
+
+################################################################################
+# Classes
+################################################################################
+class FixCosimStreamWriter:
+    """
+    Write a cosim file chunk by chunk
+
+    The first chunk is serialized by olo_fix_cosim.write_cosim_file including
+    the header. Later chunks are encoded directly into the file in the line
+    layout olo_fix_cosim uses for the format (see line_layout()), so the file
+    content is identical to writing all data at once, but only one chunk has to
+    be kept in memory. If the layout is not recognized, later chunks are
+    serialized by olo_fix_cosim into a scratch file and appended without header.
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self,
+                 output_path : str,
+                 fmt         : FixFormat,
+                 filename    : str,
+                 dim         : int = 1
+        ):
+        """
+        Constructor of the FixCosimStreamWriter class
+        :param output_path: Directory of the cosim file
+        :param fmt:         Format of the data
+        :param filename:    Name of the cosim file
+        :param dim:         Number of elements per sample
+        """
+        self._output_path = output_path
+        self._fmt = fmt
+        self._filename = filename
+        self._dim = dim
+
+        self._writer = olo_fix_cosim(output_path)
+        self._scratch = filename + ".chunk"
+        self._started = False
+        self._layout = None
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def append(self, data):
+        """
+        Append samples to the cosim file
+        :param data: Samples, shape [num_samples] or [num_samples, dim]
+        """
+        mantissas = to_mantissa(data, self._fmt, wide=True)
+        if len(mantissas) == 0:
+            return
+
+        # The first chunk creates the file including its header
+        if not self._started:
+            self._started = True
+            self._write(data, self._filename)
+            self._layout = self._checked_layout(mantissas)
+            return
+
+        with open(os.path.join(self._output_path, self._filename), "a") as dst:
+            if self._layout is not None:
+                dst.write(_encode(mantissas, self._fmt, self._layout))
+                return
+
+            # Fallback: serialize separately and append without header
+            self._write(data, self._scratch)
+            scratch_path = os.path.join(self._output_path, self._scratch)
+            with open(scratch_path, "r") as src:
+                for _ in range(header_lines(self._fmt, self._dim)):
+                    src.readline()
+                for line in src:
+                    dst.write(line)
+            os.remove(scratch_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        scratch_path = os.path.join(self._output_path, self._scratch)
+        if os.path.exists(scratch_path):
+            os.remove(scratch_path)
+
+    # --------------------------------------------------------------------------
+    # Private Methods
+    # --------------------------------------------------------------------------
+    def _write(self, data, filename : str):
+        self._writer.write_cosim_file(data, self._fmt, filename, dim=self._dim)
+
+    def _checked_layout(self, mantissas):
+        # The detected layout must reproduce the start of the first chunk
+        layout = line_layout(self._fmt, self._dim)
+        if layout is None:
+            return None
+        head = mantissas[:LAYOUT_CHECK_SAMPLES]
+        with open(os.path.join(self._output_path, self._filename), "r") as f:
+            for _ in range(header_lines(self._fmt, self._dim)):
+                f.readline()
+            written = "".join(f.readline() for _ in range(len(head)))
+        return layout if written == _encode(head, self._fmt, layout) else None
+
+################################################################################
+# Functions
+################################################################################
+def header_lines(fmt : FixFormat, dim : int = 1) -> int:
+    """
+    Number of header lines olo_fix_cosim writes for a format, computed once per
+    format from files with one and two zero samples
+    :param fmt: Format of the data
+    :param dim: Number of elements per sample
+    :return:    Number of lines before the first sample
+    """
+    return _probe(fmt.S, fmt.I, fmt.F, dim)[0]
+
+
+def line_layout(fmt : FixFormat, dim : int = 1):
+    """
+    Line layout olo_fix_cosim uses for the samples of a format, detected once
+    per format by matching the candidate encodings against a probe file with
+    corner values
+    :param fmt: Format of the data
+    :param dim: Number of elements per sample
+    :return:    (element encoding, separator), None if no candidate matches
+    """
+    return _probe(fmt.S, fmt.I, fmt.F, dim)[1]
+
+################################################################################
+# Helpers
+################################################################################
+def _width(fmt : FixFormat) -> int:
+    return fmt.S + fmt.I + fmt.F
+
+
+def _two_complement(m : int, fmt : FixFormat) -> int:
+    return m % (1 << _width(fmt))
+
+
+def _hex_digits(fmt : FixFormat) -> int:
+    return max(1, (_width(fmt) + 3) // 4)
+
+
+# Element encodings of a mantissa, by name
+_ELEMENT_ENCODINGS = {
+    "dec"              : lambda m, fmt: str(m),
+    "hex"              : lambda m, fmt: format(_two_complement(m, fmt), f"0{_hex_digits(fmt)}X"),
+    "hex_lower"        : lambda m, fmt: format(_two_complement(m, fmt), f"0{_hex_digits(fmt)}x"),
+    "hex_short"        : lambda m, fmt: format(_two_complement(m, fmt), "X"),
+    "hex_short_lower"  : lambda m, fmt: format(_two_complement(m, fmt), "x"),
+    "hex_signed"       : lambda m, fmt: format(m, "X"),
+    "hex_signed_lower" : lambda m, fmt: format(m, "x"),
+}
+
+
+def _encode(mantissas, fmt : FixFormat, layout) -> str:
+    encoding, separator = layout
+    element = _ELEMENT_ENCODINGS[encoding]
+    rows = np.asarray(mantissas, dtype=object).reshape(len(mantissas), -1)
+    return "".join(separator.join(element(int(m), fmt) for m in row) + "\n" for row in rows)
+
+
+def _probe_mantissas(fmt : FixFormat, dim : int):
+    # Corner values tell the candidate encodings apart: sign, padding, case and
+    # decimal vs. hexadecimal digits, limited to the range of the format
+    magnitude_bits = _width(fmt) - fmt.S
+    low = -(1 << magnitude_bits) if fmt.S else 0
+    high = (1 << magnitude_bits) - 1
+    values = sorted({min(max(v, low), high) for v in (low, high, -1, 0, 1, 10, 15, 0xAB)})
+    shape = (len(values),) if dim == 1 else (len(values), dim)
+    return np.array(np.broadcast_to(np.array(values, dtype=object).reshape((-1,) + (1,) * (len(shape) - 1)), shape))
+
+
+@lru_cache(maxsize=None)
+def _probe(s : int, i : int, f : int, dim : int):
+    fmt = FixFormat(s, i, f)
+    zeros = np.zeros((1,) if dim == 1 else (1, dim), dtype=object)
+    corners = _probe_mantissas(fmt, dim)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = olo_fix_cosim(tmp_dir)
+
+        def lines(mantissas):
+            writer.write_cosim_file(from_mantissa(mantissas, fmt), fmt, "probe.fix", dim=dim)
+            with open(os.path.join(tmp_dir, "probe.fix"), "r") as f:
+                return f.readlines()
+
+        # The header length follows from files with one and two samples
+        one = len(lines(zeros))
+        two = len(lines(np.concatenate([zeros, zeros])))
+        header = one - (two - one)
+
+        written = "".join(lines(corners)[header:])
+
+    for encoding in _ELEMENT_ENCODINGS:
+        for separator in LAYOUT_SEPARATORS:
+            if _encode(corners, fmt, (encoding, separator)) == written:
+                return header, (encoding, separator)
+    return header, None
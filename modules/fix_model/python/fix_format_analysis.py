@@ -0,0 +1,276 @@
+################################################################################
+# fix_format_analysis.py
+#
+# Derives the minimal lossless product and accumulator formats of the MAC,
+# dot product and matrix vector product entities and checks hand-picked
+# result formats against them: will the accumulator saturate (or wrap), how
+# many bits are wasted and does the MAC fit into a single DSP48. With
+# fix_dsp_mac_packed two products sharing b use one multiplier, which halves
+# the DSP count for narrow formats.
+#
+# Example:
+#   python modules/fix_model/python/fix_format_analysis.py \
+#       --fmt-a "(0,4,12)" --fmt-b "(0,4,12)" --dimension 32 --fmt-result "(0,13,24)"
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+# Import python packages
+import sys
+import os
+import argparse
+
+#Import olo_fix
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../submodules/open-logic/src/fix/python")))
+from olo_fix import olo_fix_utils
+from en_cl_fix_pkg import *
+
+################################################################################
+# Constants
+################################################################################
+# Operand widths of the DSP48E1 multiplier (signed)
+DSP_WIDTH_A = 25
+DSP_WIDTH_B = 18
+
+# Width of the DSP48E1 accumulator (P register)
+DSP_WIDTH_ACC = 48
+
+# Format generics of the testbenches: (a, b, result, dimension, add)
+TB_FORMAT_GENERICS = {
+    "fix_dsp_mac_vunit_tb"               : ("FMT_MULT_A_G", "FMT_MULT_B_G", "FMT_RESULT_G", None, "FMT_ADD_G"),
+    "fix_dot_product_vunit_tb"           : ("FMT_IN_ELEMENT_A_G", "FMT_IN_ELEMENT_B_G", "FMT_OUT_RESULT_G",
+                                            "DIMENSION_WIDTH_G", None),
+    "fix_matrix_vector_product_vunit_tb" : ("FMT_IN_MATRIX_ELEMENT_G", "FMT_IN_VECTOR_ELEMENT_G", "FMT_OUT_RESULT_G",
+                                            "MATRIX_COLUMN_WIDTH_G", None),
+}
+
+################################################################################
+# Functions
+################################################################################
+def product_format(fmt_a : FixFormat, fmt_b : FixFormat) -> FixFormat:
+    """
+    Full precision format of a * b
+    :param fmt_a: Format of a
+    :param fmt_b: Format of b
+    :return:      Product format
+    """
+    return cl_fix_mult_fmt(fmt_a, fmt_b)
+
+def accumulator_format(fmt_a      : FixFormat,
+                       fmt_b      : FixFormat,
+                       dimension  : int = 1,
+                       fmt_add    : FixFormat = None,
+                       frac       : int = None) -> FixFormat:
+    """
+    Minimal format that holds the sum of dimension products (plus an addend
+    for fix_dsp_mac) without saturating or wrapping
+    :param fmt_a:     Format of the a elements
+    :param fmt_b:     Format of the b elements
+    :param dimension: Number of accumulated products
+    :param fmt_add:   Format of the addend of fix_dsp_mac, None for dot products
+    :param frac:      Fractional bits of the accumulator, None for lossless
+    :return:          Accumulator format
+    """
+    low, high, f = _sum_range(fmt_a, fmt_b, dimension, fmt_add)
+    if frac is not None and frac < f:
+        # Truncation rounds towards minus infinity
+        low, high, f = low >> (f - frac), high >> (f - frac), frac
+    return _fit_format(low, high, f)
+
+def dsps_per_mac(fmt_a : FixFormat, fmt_b : FixFormat) -> int:
+    """
+    Number of DSP48E1 slices of one fix_dsp_mac multiplier
+    :param fmt_a: Format of the a elements
+    :param fmt_b: Format of the b elements
+    :return:      Number of cascaded DSP slices
+    """
+    # The DSP multiplier is signed, unsigned operands need one more bit
+    width_a = cl_fix_width(fmt_a) + (0 if fmt_a.S else 1)
+    width_b = cl_fix_width(fmt_b) + (0 if fmt_b.S else 1)
+    return min(-(-width_a // DSP_WIDTH_A) * -(-width_b // DSP_WIDTH_B),
+               -(-width_b // DSP_WIDTH_A) * -(-width_a // DSP_WIDTH_B))
+
+def packed_format(fmt_a : FixFormat, fmt_b : FixFormat) -> FixFormat:
+    """
+    Format of the packed operand a0 * 2**K + a1 of fix_dsp_mac_packed, K is
+    the product width. A signed a1 can borrow from a0, which needs one more bit.
+    :param fmt_a: Format of a0 and a1
+    :param fmt_b: Format of the shared operand b
+    :return:      Packed operand format
+    """
+    shift = cl_fix_width(product_format(fmt_a, fmt_b))
+    return FixFormat(fmt_a.S, fmt_a.I + shift + fmt_a.S, fmt_a.F)
+
+def packed_dsps(fmt_a : FixFormat, fmt_b : FixFormat) -> int:
+    """
+    Number of DSP48E1 slices of one fix_dsp_mac_packed multiplier (two products)
+    :param fmt_a: Format of the a elements
+    :param fmt_b: Format of the b elements
+    :return:      Number of cascaded DSP slices
+    """
+    return dsps_per_mac(packed_format(fmt_a, fmt_b), fmt_b)
+
+def analyze(fmt_a      : FixFormat,
+            fmt_b      : FixFormat,
+            fmt_result : FixFormat = None,
+            dimension  : int = 1,
+            fmt_add    : FixFormat = None) -> dict:
+    """
+    Compare a result format against the lossless accumulator format
+    :param fmt_a:      Format of the a elements
+    :param fmt_b:      Format of the b elements
+    :param fmt_result: Result and accumulator format, None for the lossless one
+    :param dimension:  Number of accumulated products
+    :param fmt_add:    Format of the addend of fix_dsp_mac, None for dot products
+    :return:           Report dict, see the keys below
+    """
+    fmt_product = product_format(fmt_a, fmt_b)
+    fmt_lossless = accumulator_format(fmt_a, fmt_b, dimension, fmt_add)
+    if fmt_result is None:
+        fmt_result = fmt_lossless
+
+    # Integer bits do not depend on the sign bit (width = S + I + F), an
+    # unsigned result only loses the negative sums
+    low, high, f = _sum_range(fmt_a, fmt_b, dimension, fmt_add)
+    sign_lost = low < 0 and not fmt_result.S
+    int_needed = _fit_format(max(low, 0) if sign_lost else low, high, f).I
+
+    return {
+        "fmt_product"      : fmt_product,
+        "fmt_lossless"     : fmt_lossless,
+        "fmt_result"       : fmt_result,
+        # Sums outside the result range saturate (or wrap with Warn_s)
+        "saturates"        : sign_lost or int_needed > fmt_result.I,
+        "sign_lost"        : sign_lost,
+        "int_bits_missing" : max(0, int_needed - fmt_result.I),
+        "int_bits_wasted"  : max(0, fmt_result.I - int_needed),
+        # Fractional bits rounded away (by design in most configs)
+        "frac_bits_lost"   : max(0, fmt_lossless.F - fmt_result.F),
+        "frac_bits_wasted" : max(0, fmt_result.F - fmt_lossless.F),
+        "sign_bit_wasted"  : bool(fmt_result.S and low >= 0),
+        "dsps_per_mac"     : dsps_per_mac(fmt_a, fmt_b),
+        "fits_dsp48"       : dsps_per_mac(fmt_a, fmt_b) == 1 and cl_fix_width(fmt_result) <= DSP_WIDTH_ACC,
+        # Two products per multiplier with fix_dsp_mac_packed (PACKED_G)
+        "packed_dsps"      : packed_dsps(fmt_a, fmt_b),
+        "packing_saves"    : packed_dsps(fmt_a, fmt_b) < 2 * dsps_per_mac(fmt_a, fmt_b),
+    }
+
+def analyze_generics(tb_name : str, generics : dict) -> dict:
+    """
+    Analyze the formats of a testbench configuration
+    :param tb_name:  Name of the VUnit testbench
+    :param generics: Generics of the configuration
+    :return:         Result of analyze(), None for testbenches without formats
+    """
+    if tb_name not in TB_FORMAT_GENERICS:
+        return None
+    name_a, name_b, name_result, name_dimension, name_add = TB_FORMAT_GENERICS[tb_name]
+    fmt = lambda name: olo_fix_utils.fix_format_from_string(generics[name]) if name is not None else None
+    dimension = generics[name_dimension] if name_dimension is not None else 1
+    return analyze(fmt(name_a), fmt(name_b), fmt(name_result), dimension, fmt(name_add))
+
+def issues(report : dict) -> list:
+    """
+    Human readable findings of a report
+    :param report: Result of analyze()
+    :return:       List of strings, empty if the result format is lossless and tight
+    """
+    result = []
+    if report["int_bits_missing"] > 0:
+        result.append(f"saturates/wraps: {report['int_bits_missing']} integer bit(s) missing")
+    if report["sign_lost"]:
+        result.append("saturates/wraps: negative sums in an unsigned format")
+    if report["int_bits_wasted"] > 0:
+        result.append(f"{report['int_bits_wasted']} integer bit(s) never used")
+    if report["frac_bits_wasted"] > 0:
+        result.append(f"{report['frac_bits_wasted']} fractional bit(s) always zero")
+    if report["sign_bit_wasted"]:
+        result.append("sign bit never used")
+    if not report["fits_dsp48"]:
+        result.append(f"does not fit a single DSP48 ({report['dsps_per_mac']} DSP(s) per MAC, "
+                      f"{cl_fix_width(report['fmt_result'])} bit accumulator)")
+    return result
+
+def check_configs(configs) -> int:
+    """
+    Print the findings of testbench configurations
+    :param configs: Iterable of (config name, testbench name, generics)
+    :return:        Number of configurations that saturate
+    """
+    num_saturating = 0
+    for name, tb_name, generics in configs:
+        report = analyze_generics(tb_name, generics)
+        if report is None:
+            continue
+        num_saturating += report["saturates"]
+        found = issues(report)
+        print(f"{name}")
+        print(f"    lossless {format_string(report['fmt_lossless'])}, result {format_string(report['fmt_result'])}"
+              + ("" if found else ", OK"))
+        for issue in found:
+            print(f"    {issue}")
+    return num_saturating
+
+def format_string(fmt : FixFormat) -> str:
+    """
+    Generic string of a format, e.g. "(0,13,24)"
+    """
+    return f"({int(fmt.S)},{fmt.I},{fmt.F})"
+
+################################################################################
+# Helpers
+################################################################################
+def _mantissa_range(fmt : FixFormat):
+    width = cl_fix_width(fmt)
+    low = -(1 << (width - 1)) if fmt.S else 0
+    return low, low + (1 << width) - 1
+
+def _sum_range(fmt_a : FixFormat, fmt_b : FixFormat, dimension : int, fmt_add : FixFormat):
+    # Smallest and largest mantissa of the sum and its fractional bits
+    a_low, a_high = _mantissa_range(fmt_a)
+    b_low, b_high = _mantissa_range(fmt_b)
+    corners = [a_low * b_low, a_low * b_high, a_high * b_low, a_high * b_high]
+    low, high, f = dimension * min(corners), dimension * max(corners), fmt_a.F + fmt_b.F
+    if fmt_add is not None:
+        add_low, add_high = _mantissa_range(fmt_add)
+        frac = max(f, fmt_add.F)
+        low = (low << (frac - f)) + (add_low << (frac - fmt_add.F))
+        high = (high << (frac - f)) + (add_high << (frac - fmt_add.F))
+        f = frac
+    return low, high, f
+
+def _fit_format(low : int, high : int, frac : int) -> FixFormat:
+    # Fewest integer bits that hold [low, high] with frac fractional bits
+    bits = max(high.bit_length(), (-low - 1).bit_length() if low < 0 else 0, 1)
+    return FixFormat(int(low < 0), bits - frac, frac)
+
+################################################################################
+# Main
+################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lossless product and accumulator formats")
+    parser.add_argument("--fmt-a", required=True, help="Format of the a elements, e.g. \"(0,4,12)\"")
+    parser.add_argument("--fmt-b", required=True, help="Format of the b elements")
+    parser.add_argument("--fmt-add", default=None, help="Format of the fix_dsp_mac addend")
+    parser.add_argument("--fmt-result", default=None, help="Result format to check")
+    parser.add_argument("--dimension", type=int, default=1, help="Number of accumulated products")
+    parser.add_argument("--frac", type=int, default=None, help="Fractional bits of the suggested accumulator")
+    args = parser.parse_args()
+
+    parse = lambda s: olo_fix_utils.fix_format_from_string(s) if s is not None else None
+    fmt_a, fmt_b, fmt_add = parse(args.fmt_a), parse(args.fmt_b), parse(args.fmt_add)
+    report = analyze(fmt_a, fmt_b, parse(args.fmt_result), args.dimension, fmt_add)
+
+    print(f"Product format:      {format_string(report['fmt_product'])}")
+    print(f"Lossless format:     {format_string(report['fmt_lossless'])}")
+    if args.frac is not None:
+        print(f"Suggested format:    {format_string(accumulator_format(fmt_a, fmt_b, args.dimension, fmt_add, args.frac))}")
+    print(f"DSPs per MAC:        {report['dsps_per_mac']}")
+    print(f"DSPs per packed MAC: {report['packed_dsps']} (two products"
+          + ("" if report["packing_saves"] else ", no saving") + ")")
+    if args.fmt_result is not None:
+        found = issues(report)
+        print(f"Result format:       {format_string(report['fmt_result'])}" + ("" if found else ", OK"))
+        for issue in found:
+            print(f"    {issue}")
@@ -0,0 +1,679 @@
+################################################################################
+# fix_kernel.py
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+# Import python packages
+import sys
+import os
+import warnings
+import numpy as np
+
+#Import olo_fix
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../submodules/open-logic/src/fix/python")))
+from olo_fix import olo_fix_mult, olo_fix_add
+from en_cl_fix_pkg import *
+
+#Import format analysis
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from fix_format_analysis import packed_format
+
+################################################################################
+# Constants
+################################################################################
+# en_cl_fix represents values of formats up to this width as float64
+FLOAT_MAX_WIDTH = 53
+
+# Intermediate values up to this width are computed in int64
+INT_MAX_WIDTH = 63
+
+# Number of rows processed at once on the wide (Python integer) path
+WIDE_CHUNK_ROWS = 4096
+
+# Set to "1" to self-check every kernel against olo_fix on construction
+SELF_CHECK_ENV = "FIX_KERNEL_SELF_CHECK"
+
+################################################################################
+# Functions
+################################################################################
+def to_mantissa(a, fmt : FixFormat, wide : bool = False):
+    """
+    Convert fixed point values to integer mantissas (value * 2**F)
+    :param a:    Values (real valued array or wide en_cl_fix values)
+    :param fmt:  Format of the values
+    :param wide: Return Python integers (object array) instead of int64
+    :return:     Mantissas
+    """
+    # Wide en_cl_fix values already carry their integer representation,
+    # numpy arrays and scalars have a data buffer as well
+    data = getattr(a, "data", None)
+    if data is not None and not isinstance(a, (np.ndarray, np.generic)):
+        mantissa = np.asarray(data, dtype=object)
+        return mantissa if wide else mantissa.astype(np.int64)
+
+    mantissa = np.rint(np.ldexp(np.asarray(a, dtype=np.float64), fmt.F)).astype(np.int64)
+    return mantissa.astype(object) if wide else mantissa
+
+def from_mantissa(mantissa, fmt : FixFormat):
+    """
+    Convert integer mantissas back to the en_cl_fix value representation
+    :param mantissa: Mantissas (value * 2**F)
+    :param fmt:      Format of the values
+    :return:         Real valued array, or wide en_cl_fix values for wide formats
+    """
+    if cl_fix_width(fmt) > FLOAT_MAX_WIDTH:
+        return WideFix(np.asarray(mantissa, dtype=object), fmt)
+    return np.ldexp(np.asarray(mantissa).astype(np.float64), -fmt.F)
+
+def fix_round(mantissa, f_in : int, f_out : int, round : FixRound = FixRound.Trunc_s):
+    """
+    Round mantissas from f_in to f_out fractional bits
+    :param mantissa: Mantissas with f_in fractional bits
+    :param f_in:     Number of fractional bits of the input
+    :param f_out:    Number of fractional bits of the output
+    :param round:    Rounding mode
+    :return:         Mantissas with f_out fractional bits
+    """
+    shift = f_in - f_out
+    if shift <= 0:
+        return mantissa << -shift
+
+    half = 1 << (shift - 1)
+    if round == FixRound.Trunc_s:
+        offset = 0
+    elif round == FixRound.NonSymPos_s:
+        offset = half
+    elif round == FixRound.NonSymNeg_s:
+        offset = half - 1
+    elif round == FixRound.SymInf_s:
+        offset = half - (mantissa < 0)
+    elif round == FixRound.SymZero_s:
+        offset = half - (mantissa >= 0)
+    elif round == FixRound.ConvEven_s:
+        offset = half - 1 + ((mantissa >> shift) & 1)
+    elif round == FixRound.ConvOdd_s:
+        offset = half - ((mantissa >> shift) & 1)
+    else:
+        raise ValueError(f"Unsupported rounding mode {round}.")
+
+    return (mantissa + offset) >> shift
+
+def _range(fmt : FixFormat):
+    """
+    Smallest and largest mantissa of a format
+    """
+    width = cl_fix_width(fmt)
+    low = -(1 << (width - 1)) if fmt.S else 0
+    return low, low + (1 << width) - 1
+
+def in_range(mantissa, fmt : FixFormat) -> bool:
+    """
+    Check whether all mantissas are representable in a format
+    :param mantissa: Mantissas with fmt.F fractional bits
+    :param fmt:      Format to check against
+    :return:         True if no value over- or underflows
+    """
+    low, high = _range(fmt)
+    return not np.any((mantissa < low) | (mantissa > high))
+
+def fix_saturate(mantissa, fmt : FixFormat, saturate : FixSaturate = FixSaturate.Warn_s):
+    """
+    Saturate or wrap mantissas into a format
+    :param mantissa: Mantissas with fmt.F fractional bits
+    :param fmt:      Target format
+    :param saturate: Saturation mode
+    :return:         Mantissas within the range of fmt
+    """
+    low, high = _range(fmt)
+
+    if saturate in (FixSaturate.Warn_s, FixSaturate.SatWarn_s) and not in_range(mantissa, fmt):
+        warnings.warn("fix_kernel : Saturation warning!", Warning)
+
+    if saturate in (FixSaturate.Sat_s, FixSaturate.SatWarn_s):
+        return np.minimum(np.maximum(mantissa, low), high)
+    return ((mantissa - low) & (high - low)) + low
+
+def fix_resize(mantissa,
+               fmt_in   : FixFormat,
+               fmt_out  : FixFormat,
+               round    : FixRound    = FixRound.Trunc_s,
+               saturate : FixSaturate = FixSaturate.Warn_s):
+    """
+    Round and saturate mantissas from one format into another
+    :param mantissa: Mantissas in fmt_in
+    :param fmt_in:   Input format
+    :param fmt_out:  Output format
+    :param round:    Rounding mode
+    :param saturate: Saturation mode
+    :return:         Mantissas in fmt_out
+    """
+    return fix_saturate(fix_round(mantissa, fmt_in.F, fmt_out.F, round), fmt_out, saturate)
+
+def _apply_mantissa(function, core_dims : int, *operands):
+    """
+    Apply a kernel function to mantissas of the same shape. Python integer
+    mantissas are slow and memory hungry, they are processed in chunks of
+    WIDE_CHUNK_ROWS rows.
+    :param function:  Function of the mantissas, reduces the core dimensions
+    :param core_dims: Number of trailing dimensions reduced by function
+    :param operands:  Mantissas, int64 or object (Python integers)
+    :return:          Result mantissas, shape operands[0].shape[:-core_dims]
+    """
+    if all(op.dtype != object for op in operands):
+        return function(*operands)
+
+    split = operands[0].ndim - core_dims
+    shape, core = operands[0].shape[:split], operands[0].shape[split:]
+    operands = [op.reshape((-1,) + core) for op in operands]
+    result = np.empty(len(operands[0]), dtype=object)
+    for start in range(0, len(result), WIDE_CHUNK_ROWS):
+        sl = slice(start, start + WIDE_CHUNK_ROWS)
+        result[sl] = function(*(op[sl] for op in operands))
+    return result.reshape(shape)
+
+def _sample_inputs(fmt : FixFormat, shape, rng):
+    """
+    Random values of a format including both range limits
+    :param fmt:   Format of the values
+    :param shape: Shape of the returned array
+    :param rng:   numpy Generator
+    :return:      Real valued array
+    """
+    values = rng.uniform(cl_fix_min_value(fmt), cl_fix_max_value(fmt), shape)
+    values.flat[0] = cl_fix_min_value(fmt)
+    values.flat[-1] = cl_fix_max_value(fmt)
+    return cl_fix_from_real(values, fmt)
+
+def _assert_bit_exact(name : str, result, reference, fmt : FixFormat):
+    """
+    Raise if the kernel result differs from the olo_fix reference
+    """
+    if not np.array_equal(to_mantissa(result, fmt, wide=True), to_mantissa(reference, fmt, wide=True)):
+        raise RuntimeError(f"{name} self-check failed: result differs from the olo_fix reference.")
+
+################################################################################
+# Classes
+################################################################################
+class FixMacKernel:
+    """
+    Integer kernel for a * b + c, bit-exact with olo_fix_mult (full precision)
+    followed by olo_fix_add
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self,
+                 fmt_a      : FixFormat,
+                 fmt_b      : FixFormat,
+                 fmt_add    : FixFormat,
+                 fmt_result : FixFormat,
+                 round      : FixRound    = FixRound.Trunc_s,
+                 saturate   : FixSaturate = FixSaturate.Warn_s,
+                 self_check : bool        = False
+        ):
+        """
+        Constructor of the FixMacKernel class
+        :param fmt_a:      Format of the a input
+        :param fmt_b:      Format of the b input
+        :param fmt_add:    Format of the c input
+        :param fmt_result: Format of the result
+        :param round:      Rounding mode
+        :param saturate:   Saturation mode
+        :param self_check: Compare against olo_fix on sampled inputs
+        """
+        self._fmt_a = fmt_a
+        self._fmt_b = fmt_b
+        self._fmt_add = fmt_add
+        self._fmt_result = fmt_result
+        self._round = round
+        self._saturate = saturate
+
+        self._fmt_mult = cl_fix_mult_fmt(fmt_a, fmt_b)
+
+        # The sum is formed with the larger number of fractional bits
+        self._frac = max(self._fmt_mult.F, fmt_add.F)
+        sum_width = max(cl_fix_width(self._fmt_mult) + self._frac - self._fmt_mult.F,
+                        cl_fix_width(fmt_add) + self._frac - fmt_add.F) + 1
+        self.wide = max(sum_width, cl_fix_width(fmt_result)) > INT_MAX_WIDTH
+
+        if self_check or os.environ.get(SELF_CHECK_ENV) == "1":
+            self.self_check()
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def process(self, a, b, c):
+        """
+        Calculate a * b + c
+        :param a: Input a
+        :param b: Input b
+        :param c: Input c
+        :return:  Result
+        """
+        a, b, c = np.broadcast_arrays(to_mantissa(a, self._fmt_a, self.wide),
+                                      to_mantissa(b, self._fmt_b, self.wide),
+                                      to_mantissa(c, self._fmt_add, self.wide))
+        return from_mantissa(_apply_mantissa(self._process_mantissa, 0, a, b, c), self._fmt_result)
+
+    def self_check(self, num_samples : int = 1000, seed : int = 42):
+        """
+        Prove bit-equality with olo_fix_mult/olo_fix_add on sampled inputs
+        :param num_samples: Number of sampled inputs
+        :param seed:        Seed of the sampled inputs
+        """
+        rng = np.random.default_rng(seed)
+        a = _sample_inputs(self._fmt_a, num_samples, rng)
+        b = _sample_inputs(self._fmt_b, num_samples, rng)
+        c = _sample_inputs(self._fmt_add, num_samples, rng)
+
+        mult = olo_fix_mult(self._fmt_a, self._fmt_b, self._fmt_mult, self._round, self._saturate)
+        add = olo_fix_add(self._fmt_mult, self._fmt_add, self._fmt_result, self._round, self._saturate)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            reference = add.process(mult.process(a, b), c)
+            result = self.process(a, b, c)
+
+        _assert_bit_exact("FixMacKernel", result, reference, self._fmt_result)
+
+    # --------------------------------------------------------------------------
+    # Private Methods
+    # --------------------------------------------------------------------------
+    def _process_mantissa(self, a, b, c):
+        mult = (a * b) << (self._frac - self._fmt_mult.F)
+        add = c << (self._frac - self._fmt_add.F)
+        result = fix_round(mult + add, self._frac, self._fmt_result.F, self._round)
+        return fix_saturate(result, self._fmt_result, self._saturate)
+
+class FixPackedMultKernel:
+    """
+    Integer emulation of the packed multiplier of fix_dsp_mac_packed: a0 * b
+    and a1 * b are formed by one multiplication (a0 * 2**K + a1) * b, K is
+    the product width. The low K bits are a1 * b, the high bits are a0 * b
+    after adding back the borrow of a negative a1 * b.
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self,
+                 fmt_a      : FixFormat,
+                 fmt_b      : FixFormat,
+                 self_check : bool = False
+        ):
+        """
+        Constructor of the FixPackedMultKernel class
+        :param fmt_a:      Format of a0 and a1
+        :param fmt_b:      Format of the shared operand b
+        :param self_check: Compare against the separate products on sampled inputs
+        """
+        self._fmt_a = fmt_a
+        self._fmt_b = fmt_b
+
+        self._fmt_mult = cl_fix_mult_fmt(fmt_a, fmt_b)
+        self._shift = cl_fix_width(self._fmt_mult)
+        self._fmt_packed = packed_format(fmt_a, fmt_b)
+        self.wide = cl_fix_width(cl_fix_mult_fmt(self._fmt_packed, fmt_b)) > INT_MAX_WIDTH
+
+        if self_check or os.environ.get(SELF_CHECK_ENV) == "1":
+            self.self_check()
+
+    # --------------------------------------------------------------------------
+    # Properties
+    # --------------------------------------------------------------------------
+    @property
+    def shift(self) -> int:
+        return self._shift
+
+    @property
+    def fmt_packed(self) -> FixFormat:
+        return self._fmt_packed
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def pack(self, a0, a1):
+        """
+        Packed operand a0 * 2**K + a1
+        :param a0: Mantissas of a0
+        :param a1: Mantissas of a1
+        :return:   Mantissas in fmt_packed
+        """
+        return (a0 << self._shift) + a1
+
+    def unpack(self, packed):
+        """
+        Separate a packed product into a0 * b and a1 * b
+        :param packed: Mantissas of (a0 * 2**K + a1) * b
+        :return:       Tuple of the product mantissas (a0 * b, a1 * b)
+        """
+        low = packed & ((1 << self._shift) - 1)
+        high = packed >> self._shift
+        if self._fmt_mult.S:
+            # Correction term: a negative a1 * b borrowed one from a0 * b
+            borrow = low >> (self._shift - 1)
+            low = low - (borrow << self._shift)
+            high = high + borrow
+        return high, low
+
+    def process_mantissa(self, a0, a1, b):
+        """
+        Calculate a0 * b and a1 * b with one multiplication per element pair
+        :param a0: Mantissas of a0, int64 or object (Python integers)
+        :param a1: Mantissas of a1, broadcastable against a0
+        :param b:  Mantissas of b, broadcastable against a0
+        :return:   Tuple of the product mantissas (a0 * b, a1 * b)
+        """
+        a0, a1, b = np.broadcast_arrays(a0, a1, b)
+        narrow = a0.dtype != object and a1.dtype != object and b.dtype != object
+        if narrow and self.wide:
+            # The packed product needs Python integers, the products fit into int64
+            p0, p1 = self.unpack(self.pack(a0.astype(object), a1.astype(object)) * b.astype(object))
+            return p0.astype(np.int64), p1.astype(np.int64)
+        return self.unpack(self.pack(a0, a1) * b)
+
+    def self_check(self, num_samples : int = 1000, seed : int = 42):
+        """
+        Prove that unpacking gives the separate products a0 * b and a1 * b,
+        on sampled inputs and on all combinations of the range limits
+        :param num_samples: Number of sampled inputs
+        :param seed:        Seed of the sampled inputs
+        """
+        rng = np.random.default_rng(seed)
+        a0 = to_mantissa(_sample_inputs(self._fmt_a, num_samples, rng), self._fmt_a, wide=True)
+        a1 = to_mantissa(_sample_inputs(self._fmt_a, num_samples, rng), self._fmt_a, wide=True)
+        b = to_mantissa(_sample_inputs(self._fmt_b, num_samples, rng), self._fmt_b, wide=True)
+
+        limits_a = np.array(list(_range(self._fmt_a)) + [0], dtype=object)
+        limits_b = np.array(list(_range(self._fmt_b)) + [0], dtype=object)
+        corners = np.meshgrid(limits_a, limits_a, limits_b, indexing="ij")
+        a0, a1, b = [np.concatenate([x, c.reshape(-1)]) for x, c in zip((a0, a1, b), corners)]
+
+        p0, p1 = self.process_mantissa(a0, a1, b)
+        if not in_range(self.pack(a0, a1), self._fmt_packed):
+            raise RuntimeError("FixPackedMultKernel self-check failed: packed operand exceeds its format.")
+        if not (np.array_equal(p0, a0 * b) and np.array_equal(p1, a1 * b)):
+            raise RuntimeError("FixPackedMultKernel self-check failed: unpacked products differ from a0 * b and a1 * b.")
+
+class FixDotKernel:
+    """
+    Integer kernel for the dot product along the last axis, bit-exact with an
+    olo_fix_mult into the result format followed by sequential olo_fix_add
+
+    With num_lanes > 1 the kernel mirrors fix_dot_product with NUM_LANES_G:
+    the elements are split into num_lanes consecutive slices that are
+    accumulated separately and combined by a pairwise adder tree. All
+    intermediate values use the result format, so with wrapping (None_s,
+    Warn_s) the result is identical to the single lane kernel.
+
+    With mac_pipeline > 1 (MAC_PIPELINE_G) every lane holds mac_pipeline
+    interleaved partial sums, partial sum k accumulates the lane elements k,
+    k + mac_pipeline, ... The adder tree combines the partial sums of all
+    lanes, lane by lane.
+
+    process_packed_mantissa() forms the products of two a vectors sharing b
+    with the packed multiplier of fix_dsp_mac_packed (PACKED_G).
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self,
+                 fmt_a        : FixFormat,
+                 fmt_b        : FixFormat,
+                 fmt_result   : FixFormat,
+                 round        : FixRound    = FixRound.Trunc_s,
+                 saturate     : FixSaturate = FixSaturate.Warn_s,
+                 self_check   : bool        = False,
+                 num_lanes    : int         = 1,
+                 mac_pipeline : int         = 1
+        ):
+        """
+        Constructor of the FixDotKernel class
+        :param fmt_a:        Format of the a elements
+        :param fmt_b:        Format of the b elements
+        :param fmt_result:   Format of the products, the accumulators and the result
+        :param round:        Rounding mode
+        :param saturate:     Saturation mode
+        :param self_check:   Compare against olo_fix on sampled inputs
+        :param num_lanes:    Number of partial dot products combined by an adder tree
+        :param mac_pipeline: Number of interleaved partial sums per lane
+        """
+        if num_lanes < 1:
+            raise ValueError("num_lanes must be at least 1.")
+        if mac_pipeline < 1:
+            raise ValueError("mac_pipeline must be at least 1.")
+
+        self._fmt_a = fmt_a
+        self._fmt_b = fmt_b
+        self._fmt_result = fmt_result
+        self._round = round
+        self._saturate = saturate
+        self._num_lanes = num_lanes
+        self._mac_pipeline = mac_pipeline
+
+        self._fmt_mult = cl_fix_mult_fmt(fmt_a, fmt_b)
+        self._wrap = saturate in (FixSaturate.None_s, FixSaturate.Warn_s)
+        self._packed = FixPackedMultKernel(fmt_a, fmt_b)
+
+        if self_check or os.environ.get(SELF_CHECK_ENV) == "1":
+            self.self_check()
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def is_wide(self, dimension : int) -> bool:
+        """
+        Check whether the Python integer path is needed
+        :param dimension: Number of elements per dot product
+        :return:          True if intermediate values do not fit into int64
+        """
+        mult_width = cl_fix_width(self._fmt_mult) + max(0, self._fmt_result.F - self._fmt_mult.F)
+        # Wrapping accumulation sums all products before wrapping once
+        growth = int(np.ceil(np.log2(dimension))) if self._wrap and dimension > 1 else 0
+        return max(mult_width, cl_fix_width(self._fmt_result)) + growth + 1 > INT_MAX_WIDTH
+
+    def process(self, vectors_a, vectors_b):
+        """
+        Calculate dot products along the last axis
+        :param vectors_a: Input a, shape [..., dimension]
+        :param vectors_b: Input b, broadcastable against vectors_a
+        :return:          Results, shape [...]
+        """
+        wide = self.is_wide(np.shape(vectors_a)[-1])
+        return from_mantissa(self.process_mantissa(to_mantissa(vectors_a, self._fmt_a, wide),
+                                                   to_mantissa(vectors_b, self._fmt_b, wide)), self._fmt_result)
+
+    def process_mantissa(self, a, b):
+        """
+        Calculate dot products of inputs already converted by to_mantissa(),
+        e.g. to convert a matrix once and reuse it for many vectors. The
+        results are mantissas as well, so results of several calls can be
+        concatenated before a single from_mantissa().
+        :param a: Mantissas of input a, shape [..., dimension], int64 or
+                  object (Python integers) if is_wide(dimension)
+        :param b: Mantissas of input b, broadcastable against a
+        :return:  Result mantissas, shape [...]
+        """
+        a, b = np.broadcast_arrays(a, b)
+        if a.ndim == 0 or a.shape[-1] == 0:
+            raise ValueError("Input vectors cannot be empty.")
+
+        return _apply_mantissa(self._process_mantissa, 1, a, b)
+
+    def process_packed_mantissa(self, a, b, axis : int = -2):
+        """
+        Same as process_mantissa(), but like the fix_dot_product units of
+        PACKED_G the a vectors along axis are multiplied in pairs with the
+        packed multiplier, an odd last vector is paired with itself. b must be
+        the same for both vectors of a pair.
+        :param a:    Mantissas of input a, shape [..., dimension]
+        :param b:    Mantissas of input b, broadcastable against a
+        :param axis: Axis of the paired vectors, not the last one
+        :return:     Result mantissas, shape [...]
+        """
+        a, b = np.broadcast_arrays(a, b)
+        if a.ndim < 2 or a.shape[-1] == 0:
+            raise ValueError("Input vectors cannot be empty.")
+        axis = axis % a.ndim
+        if axis == a.ndim - 1:
+            raise ValueError("The paired vectors cannot be along the last axis.")
+
+        count = a.shape[axis]
+        first = np.arange(0, count, 2)
+        second = np.minimum(first + 1, count - 1)
+        p0, p1 = self._packed.process_mantissa(np.take(a, first, axis), np.take(a, second, axis),
+                                               np.take(b, first, axis))
+        # Interleave the products of the pairs back into the order of a
+        mult = np.stack([p0, p1], axis=axis + 1)
+        mult = mult.reshape(mult.shape[:axis] + (-1,) + mult.shape[axis + 2:])
+        mult = np.take(mult, np.arange(count), axis)
+
+        return _apply_mantissa(self._sum_products, 1, mult)
+
+    def process_lanes_mantissa(self, a, b):
+        """
+        Calculate dot products of inputs already split into lanes, e.g. the
+        nonzero elements of a sparse matrix (see fix_sparse.py). Every lane is
+        accumulated in order, the lanes are combined by the adder tree.
+        :param a: Mantissas of input a, shape [..., lanes, length], int64 or
+                  object (Python integers)
+        :param b: Mantissas of input b, broadcastable against a
+        :return:  Result mantissas, shape [...]
+        """
+        a, b = np.broadcast_arrays(a, b)
+        if a.ndim < 2 or a.shape[-1] == 0:
+            raise ValueError("Input lanes cannot be empty.")
+
+        return _apply_mantissa(self._process_lanes, 2, a, b)
+
+    def self_check(self, num_samples : int = 100, dimension : int = 16, seed : int = 42):
+        """
+        Prove bit-equality with olo_fix_mult/olo_fix_add on sampled inputs
+        :param num_samples: Number of sampled vector pairs
+        :param dimension:   Number of elements per vector
+        :param seed:        Seed of the sampled inputs
+        """
+        rng = np.random.default_rng(seed)
+        a = _sample_inputs(self._fmt_a, (num_samples, dimension), rng)
+        b = _sample_inputs(self._fmt_b, (num_samples, dimension), rng)
+
+        mult = olo_fix_mult(self._fmt_a, self._fmt_b, self._fmt_result, self._round, self._saturate)
+        add = olo_fix_add(self._fmt_result, self._fmt_result, self._fmt_result, self._round, self._saturate)
+        lane_length = -(-dimension // self._num_lanes)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            mult_result = mult.process(a, b)
+            # Sequential sum per lane and partial sum, padding elements are zero
+            lanes = []
+            for start in range(0, self._num_lanes * lane_length, lane_length):
+                for first in range(start, start + self._mac_pipeline):
+                    lane = np.zeros(num_samples)
+                    for idx in range(first, min(start + lane_length, dimension), self._mac_pipeline):
+                        lane = mult_result[:, idx] if idx == first else add.process(lane, mult_result[:, idx])
+                    lanes.append(lane)
+            # Pairwise adder tree, an odd last node passes through
+            while len(lanes) > 1:
+                lanes = [add.process(lanes[idx], lanes[idx + 1]) if idx + 1 < len(lanes) else lanes[idx]
+                         for idx in range(0, len(lanes), 2)]
+            reference = lanes[0]
+            result = self.process(a, b)
+
+            # Packed products, the vectors a and a in reverse order share b
+            wide = self.is_wide(dimension)
+            a = to_mantissa(a, self._fmt_a, wide)
+            pairs = np.stack([a, a[::-1]])
+            b = to_mantissa(b, self._fmt_b, wide)
+            packed = self.process_packed_mantissa(pairs, b, axis=0)
+            unpacked = self.process_mantissa(pairs, b)
+
+        _assert_bit_exact("FixDotKernel", result, reference, self._fmt_result)
+        _assert_bit_exact("FixDotKernel packed", from_mantissa(packed, self._fmt_result),
+                          from_mantissa(unpacked, self._fmt_result), self._fmt_result)
+
+    # --------------------------------------------------------------------------
+    # Private Methods
+    # --------------------------------------------------------------------------
+    def _process_mantissa(self, a, b):
+        return self._sum_products(a * b)
+
+    def _sum_products(self, mult):
+        mult = fix_resize(mult, self._fmt_mult, self._fmt_result, self._round, self._saturate)
+        if self._num_lanes == 1 and self._mac_pipeline == 1:
+            return self._accumulate(mult)
+        return self._adder_tree(self._accumulate(self._interleave(self._split_lanes(mult))))
+
+    def _process_lanes(self, a, b):
+        mult = fix_resize(a * b, self._fmt_mult, self._fmt_result, self._round, self._saturate)
+        return self._adder_tree(self._accumulate(self._interleave(mult)))
+
+    def _split_lanes(self, mult):
+        # Lane k holds the elements [k * lane_length, (k + 1) * lane_length),
+        # the last lanes are padded with zero products
+        dimension = mult.shape[-1]
+        lane_length = -(-dimension // self._num_lanes)
+        padding = self._num_lanes * lane_length - dimension
+        if padding > 0:
+            mult = np.concatenate([mult, np.zeros(mult.shape[:-1] + (padding,), dtype=mult.dtype)], axis=-1)
+        return mult.reshape(mult.shape[:-1] + (self._num_lanes, lane_length))
+
+    def _interleave(self, lanes):
+        # [..., lanes, length] to [..., lanes * mac_pipeline, length / mac_pipeline],
+        # partial sum k of a lane holds the elements k, k + mac_pipeline, ...
+        # Zero products are padded, they do not change a partial sum.
+        if self._mac_pipeline == 1:
+            return lanes
+        length = lanes.shape[-1]
+        padding = -length % self._mac_pipeline
+        if padding > 0:
+            lanes = np.concatenate([lanes, np.zeros(lanes.shape[:-1] + (padding,), dtype=lanes.dtype)], axis=-1)
+        lanes = lanes.reshape(lanes.shape[:-1] + (-1, self._mac_pipeline))
+        lanes = np.swapaxes(lanes, -1, -2)
+        return lanes.reshape(lanes.shape[:-3] + (-1, lanes.shape[-1]))
+
+    def _adder_tree(self, lanes):
+        # Same pairing as the registered adder tree of fix_dot_product
+        while lanes.shape[-1] > 1:
+            pairs = lanes.shape[-1] // 2
+            sums = fix_saturate(lanes[..., 0:2 * pairs:2] + lanes[..., 1:2 * pairs:2], self._fmt_result, self._saturate)
+            lanes = np.concatenate([sums, lanes[..., 2 * pairs:]], axis=-1)
+        return lanes[..., 0]
+
+    def _accumulate(self, mult):
+        if self._wrap:
+            # Wrapping is modular, so wrapping once at the end gives the same
+            # result as wrapping after every addition. The running sums are
+            # only needed to report overflows of intermediate additions.
+            if self._saturate == FixSaturate.Warn_s and not in_range(np.cumsum(mult, axis=-1), self._fmt_result):
+                warnings.warn("fix_kernel : Saturation warning!", Warning)
+            return fix_saturate(np.sum(mult, axis=-1), self._fmt_result, FixSaturate.None_s)
+
+        # Saturation is not associative, add element by element
+        result = mult[..., 0]
+        for idx in range(1, mult.shape[-1]):
+            result = fix_saturate(result + mult[..., idx], self._fmt_result, self._saturate)
+        return result
+
+################################################################################
+# Main
+################################################################################
+if __name__ == "__main__":
+    # Self-check the kernels with formats used by the testbench configurations
+    FixMacKernel(FixFormat(0, 4, 4), FixFormat(0, 4, 4), FixFormat(0, 8, 8), FixFormat(0, 9, 8), self_check=True)
+    FixMacKernel(FixFormat(1, 5, 8), FixFormat(1, 7, 9), FixFormat(1, 13, 17), FixFormat(1, 14, 17), self_check=True)
+    FixMacKernel(FixFormat(0, 11, -4), FixFormat(1, 6, 2), FixFormat(0, 4, 5), FixFormat(1, 17, 5), self_check=True)
+    FixDotKernel(FixFormat(1, 3, 2), FixFormat(1, 5, 8), FixFormat(1, 13, 10), self_check=True)
+    FixDotKernel(FixFormat(1, 7, -2), FixFormat(0, 2, 8), FixFormat(0, 16, 6), self_check=True)
+    FixDotKernel(FixFormat(0, 4, 12), FixFormat(0, 4, 12), FixFormat(0, 13, 24), self_check=True)
+    FixDotKernel(FixFormat(1, 3, 2), FixFormat(1, 5, 8), FixFormat(1, 13, 10), self_check=True, num_lanes=4)
+    FixDotKernel(FixFormat(1, 7, -2), FixFormat(0, 2, 8), FixFormat(0, 16, 6), self_check=True, num_lanes=3)
+    FixDotKernel(FixFormat(1, 3, 2), FixFormat(1, 5, 8), FixFormat(1, 13, 10), self_check=True, mac_pipeline=3)
+    FixDotKernel(FixFormat(1, 3, 2), FixFormat(1, 5, 8), FixFormat(1, 13, 10), self_check=True, num_lanes=3, mac_pipeline=2)
+    FixPackedMultKernel(FixFormat(0, 4, 4), FixFormat(0, 4, 4), self_check=True)
+    FixPackedMultKernel(FixFormat(1, 3, 4), FixFormat(1, 3, 4), self_check=True)
+    FixPackedMultKernel(FixFormat(0, 3, 5), FixFormat(1, 2, 5), self_check=True)
+    FixPackedMultKernel(FixFormat(1, 7, -2), FixFormat(0, 2, 8), self_check=True)
+    FixPackedMultKernel(FixFormat(0, 4, 12), FixFormat(0, 4, 12), self_check=True)
+    print("Self-check passed")
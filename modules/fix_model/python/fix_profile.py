@@ -0,0 +1,254 @@
+################################################################################
+# fix_profile.py
+#
+# Opt-in instrumentation of the cosim functions. Setting FIX_PROFILE_DIR (or
+# running sim/run.py --profile) records per config the wall time of every
+# phase, the peak RSS (its growth during the config and the high-water mark of
+# the process) and the bytes written, one JSON file per config. merge()
+# combines them into a Chrome trace (chrome://tracing, Perfetto) and a summary.
+#
+# Phases are marked inside the cosim functions:
+#   fix_profile.mark("stimuli")      # ends the previous phase, starts a new one
+#   with fix_profile.phase("model"): # nested phase
+#
+# Both return immediately if no profiled config runs in the current thread.
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+# Import python packages
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import argparse
+import contextlib
+from glob import glob
+
+# resource is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+################################################################################
+# Constants
+################################################################################
+PROFILE_DIR_ENV = "FIX_PROFILE_DIR"
+
+# File systems with coarse timestamps may date a file before the call that wrote it
+MTIME_MARGIN_NS = 20 * 10**6
+
+TRACE_FILE = "trace.json"
+SUMMARY_FILE = "summary.json"
+
+################################################################################
+# State
+################################################################################
+# Profiled config of the current thread (VUnit runs configs in threads)
+_local = threading.local()
+
+# Returned by phase() when profiling is off
+_NULL_CONTEXT = contextlib.nullcontext()
+
+################################################################################
+# Functions
+################################################################################
+def enabled() -> bool:
+    """
+    Check whether profiling is switched on
+    """
+    return bool(os.environ.get(PROFILE_DIR_ENV))
+
+
+def mark(name : str):
+    """
+    End the current top level phase of the config and start a new one
+    :param name: Phase name
+    """
+    record = getattr(_local, "record", None)
+    if record is None:
+        return
+    now = time.time_ns()
+    _close(record, now)
+    record["open"] = (name, now)
+
+
+def phase(name : str):
+    """
+    Context manager timing a phase nested in the current one
+    :param name: Phase name
+    """
+    if getattr(_local, "record", None) is None:
+        return _NULL_CONTEXT
+    return _phase(name)
+
+
+@contextlib.contextmanager
+def profiled_config(name : str, output_path : str = None):
+    """
+    Profile everything run inside the context as one config
+    :param name:        Config name
+    :param output_path: Directory of the written files, files linked from the
+                        cosim cache keep their old mtime and do not count
+    """
+    profile_dir = os.environ.get(PROFILE_DIR_ENV)
+    if not profile_dir or getattr(_local, "record", None) is not None:
+        yield
+        return
+
+    record = {"name" : name, "start" : time.time_ns(), "open" : None, "events" : [], "peak_rss_start" : _peak_rss_mb()}
+    _local.record = record
+    try:
+        yield
+    finally:
+        _local.record = None
+        end = time.time_ns()
+        _close(record, end)
+        peak_rss = _peak_rss_mb()
+        _write(profile_dir, record, end, {
+            "bytes_written"       : _bytes_written(output_path, record["start"]),
+            "process_peak_rss_mb" : peak_rss,
+            "peak_rss_growth_mb"  : peak_rss - record["peak_rss_start"],
+        })
+
+
+def profiled(func, name : str):
+    """
+    Wrap a VUnit pre_config, the wrapper keeps the output_path signature
+    :param func: pre_config taking output_path
+    :param name: Config name
+    """
+    def pre_config(output_path):
+        with profiled_config(name, output_path):
+            return func(output_path=output_path)
+    return pre_config
+
+
+def merge(profile_dir : str) -> dict:
+    """
+    Combine the per config records into a Chrome trace and a summary
+    :param profile_dir: Directory of the records
+    :return:            Summary: config name to phase seconds, bytes and RSS
+    """
+    events = []
+    summary = {}
+    for path in sorted(glob(os.path.join(profile_dir, "config_*.json"))):
+        with open(path, "r") as f:
+            record = json.load(f)
+        events += record["events"]
+        # Configs may run more than once (pre-generation and pre_config)
+        config = summary.setdefault(record["name"], {"phases" : {}, "seconds" : 0, "bytes_written" : 0,
+                                                     "process_peak_rss_mb" : 0, "peak_rss_growth_mb" : 0})
+        config["seconds"] += record["metrics"]["seconds"]
+        config["bytes_written"] += record["metrics"]["bytes_written"]
+        for key in ("process_peak_rss_mb", "peak_rss_growth_mb"):
+            config[key] = max(config[key], record["metrics"][key])
+        for event in record["events"]:
+            if event["cat"] == "phase":
+                config["phases"][event["name"]] = config["phases"].get(event["name"], 0) + event["dur"] / 1e6
+
+    _write_json(os.path.join(profile_dir, TRACE_FILE), {"traceEvents" : events, "displayTimeUnit" : "ms"})
+    _write_json(os.path.join(profile_dir, SUMMARY_FILE), summary)
+    return summary
+
+
+def print_summary(summary : dict, num_configs : int = 10):
+    """
+    Print the slowest configs and the total time per phase
+    :param summary:     Result of merge()
+    :param num_configs: Number of configs listed
+    """
+    totals = {}
+    for config in summary.values():
+        for name, seconds in config["phases"].items():
+            totals[name] = totals.get(name, 0) + seconds
+    print(f"{'PHASE':<24} {'SECONDS':>9}")
+    for name, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+        print(f"{name:<24} {seconds:9.2f}")
+    print()
+    print(f"{'SECONDS':>9} {'MB WRITTEN':>10} {'RSS GROWTH MB':>13} {'PROCESS PEAK MB':>15}  CONFIG")
+    for name, config in sorted(summary.items(), key=lambda item: item[1]["seconds"], reverse=True)[:num_configs]:
+        print(f"{config['seconds']:9.2f} {config['bytes_written'] / 2**20:10.1f} {config['peak_rss_growth_mb']:13.0f} "
+              f"{config['process_peak_rss_mb']:15.0f}  {name}")
+
+################################################################################
+# Helpers
+################################################################################
+@contextlib.contextmanager
+def _phase(name : str):
+    start = time.time_ns()
+    try:
+        yield
+    finally:
+        record = _local.record
+        if record is not None:
+            record["events"].append(_event(name, "phase", start, time.time_ns()))
+
+
+def _close(record : dict, now : int):
+    if record["open"] is not None:
+        name, start = record["open"]
+        record["events"].append(_event(name, "phase", start, now))
+        record["open"] = None
+
+
+def _event(name : str, category : str, start : int, end : int, args : dict = None) -> dict:
+    # Chrome trace complete event, times in microseconds
+    event = {"name" : name, "cat" : category, "ph" : "X", "ts" : start / 1e3, "dur" : (end - start) / 1e3,
+             "pid" : os.getpid(), "tid" : threading.get_ident()}
+    if args is not None:
+        event["args"] = args
+    return event
+
+
+def _write(profile_dir : str, record : dict, end : int, metrics : dict):
+    metrics["seconds"] = (end - record["start"]) / 1e9
+    events = [_event(record["name"], "config", record["start"], end, metrics)] + record["events"]
+    os.makedirs(profile_dir, exist_ok=True)
+    # One file per config, parallel threads and processes never share a file
+    path = os.path.join(profile_dir, f"config_{uuid.uuid4().hex}.json")
+    _write_json(path, {"name" : record["name"], "metrics" : metrics, "events" : events})
+
+
+def _write_json(path : str, data):
+    tmp = f"{path}.tmp-{uuid.uuid4().hex}"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _bytes_written(path : str, start : int) -> int:
+    # Size of the files modified since start
+    if path is None or not os.path.isdir(path):
+        return 0
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            stat = os.stat(os.path.join(root, file))
+            if stat.st_mtime_ns >= start - MTIME_MARGIN_NS:
+                total += stat.st_size
+    return total
+
+
+def _peak_rss_mb() -> float:
+    # High-water mark of the whole process, ru_maxrss is in bytes on macOS and
+    # in KiB elsewhere. A config only shows as growth if it raised the mark,
+    # configs running concurrently in other threads share it.
+    if resource is None:
+        return 0.0
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20
+
+################################################################################
+# Main
+################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge cosim profile records into a Chrome trace and a summary")
+    parser.add_argument("profile_dir", help=f"Directory of the records ({PROFILE_DIR_ENV})")
+    parser.add_argument("--top", type=int, default=10, help="Number of configs listed")
+    args = parser.parse_args()
+    print_summary(merge(args.profile_dir), args.top)
@@ -0,0 +1,190 @@
+################################################################################
+# fix_sparse.py
+#
+# Sparse matrices for the matrix vector product model. CsrMatrix stores the
+# nonzero elements row by row (compressed sparse row), lane_gather() turns
+# them into the per-lane layout of fix_dot_product, so the model only
+# multiplies nonzero elements. Zero products do not change a fixed point
+# accumulation (neither wrapping nor saturating), the result is bit-exact with
+# the dense model and with the RTL skipping zero elements (SKIP_ZEROS_G).
+#
+# band_mask() and block_mask() describe the structured matrices of the
+# COSIM_MATRIX_TYPE_G values BANDED and SPARSE.
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+# Import python packages
+import numpy as np
+
+################################################################################
+# Constants
+################################################################################
+# Structure of the testbench matrices, must match support_matrix_generator_pkg
+# usage in fix_matrix_vector_product_vunit_tb
+COSIM_BAND_HALF_WIDTH = 1
+COSIM_BLOCK_SIZE = 4
+COSIM_BLOCK_PERIOD = 4
+
+################################################################################
+# Functions
+################################################################################
+def band_mask(rows : int, cols : int, half_width : int = COSIM_BAND_HALF_WIDTH):
+    """
+    Nonzero mask of a banded matrix, element (row, col) is inside the band if
+    |row - col| <= half_width
+    :param rows:       Number of rows
+    :param cols:       Number of columns
+    :param half_width: Number of diagonals above and below the main diagonal
+    :return:           Boolean array of shape [rows, cols]
+    """
+    row, col = np.indices((rows, cols))
+    return np.abs(row - col) <= half_width
+
+def block_mask(rows : int, cols : int, block_size : int = COSIM_BLOCK_SIZE, period : int = COSIM_BLOCK_PERIOD):
+    """
+    Nonzero mask of a block-sparse matrix: the matrix is tiled into square
+    blocks, block (i, j) is nonzero if (i + j) mod period = 0
+    :param rows:       Number of rows
+    :param cols:       Number of columns
+    :param block_size: Number of rows and columns per block
+    :param period:     Every period-th block anti-diagonal is nonzero
+    :return:           Boolean array of shape [rows, cols]
+    """
+    row, col = np.indices((rows, cols))
+    return (row // block_size + col // block_size) % period == 0
+
+################################################################################
+# Classes
+################################################################################
+class CsrMatrix:
+    """
+    Matrix in compressed sparse row format: the nonzero values of row r are
+    data[indptr[r]:indptr[r + 1]] in the columns indices[indptr[r]:indptr[r + 1]],
+    ascending within a row.
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self, data, indices, indptr, shape : tuple):
+        """
+        Constructor of the CsrMatrix class
+        :param data:    Nonzero values
+        :param indices: Column of every value
+        :param indptr:  Offset of the first value of every row, rows + 1 entries
+        :param shape:   Tuple of (rows, cols)
+        """
+        self._data = np.asarray(data)
+        self._indices = np.asarray(indices, dtype=np.int64)
+        self._indptr = np.asarray(indptr, dtype=np.int64)
+        self._shape = (int(shape[0]), int(shape[1]))
+
+        rows, cols = self._shape
+        if len(self._indptr) != rows + 1 or self._indptr[0] != 0 or np.any(np.diff(self._indptr) < 0):
+            raise ValueError(f"indptr must rise monotonically from 0 with {rows + 1} entries.")
+        if len(self._data) != self._indptr[-1] or len(self._indices) != self._indptr[-1]:
+            raise ValueError(f"data and indices must have {self._indptr[-1]} entries.")
+        if np.any(self._indices < 0) or np.any(self._indices >= cols):
+            raise ValueError(f"Column indices must be within [0, {cols}).")
+        for row in range(rows):
+            if np.any(np.diff(self._indices[self._indptr[row]:self._indptr[row + 1]]) <= 0):
+                raise ValueError(f"Column indices of row {row} must be ascending and unique.")
+
+    @classmethod
+    def from_dense(cls, matrix):
+        """
+        Convert a dense matrix, zero elements are dropped
+        :param matrix: Matrix, shape [rows, cols]
+        :return:       CsrMatrix
+        """
+        matrix = np.asarray(matrix)
+        if matrix.ndim != 2:
+            raise ValueError(f"Matrix must be two-dimensional (got shape {matrix.shape}).")
+        rows, cols = np.nonzero(matrix)
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=matrix.shape[0]))])
+        return cls(matrix[rows, cols], cols, indptr, matrix.shape)
+
+    # --------------------------------------------------------------------------
+    # Properties
+    # --------------------------------------------------------------------------
+    @property
+    def shape(self) -> tuple:
+        return self._shape
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def indices(self):
+        return self._indices
+
+    @property
+    def indptr(self):
+        return self._indptr
+
+    @property
+    def nnz(self) -> int:
+        return len(self._data)
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def row_nonzeros(self):
+        """
+        Number of nonzero elements per row
+        """
+        return np.diff(self._indptr)
+
+    def mask(self):
+        """
+        Nonzero mask, boolean array of shape [rows, cols]
+        """
+        mask = np.zeros(self._shape, dtype=bool)
+        mask[self._row_of_values(), self._indices] = True
+        return mask
+
+    def to_dense(self):
+        """
+        Dense matrix, shape [rows, cols]
+        """
+        dense = np.zeros(self._shape, dtype=self._data.dtype)
+        dense[self._row_of_values(), self._indices] = self._data
+        return dense
+
+    def lane_gather(self, num_lanes : int = 1):
+        """
+        Nonzero elements in the lane layout of fix_dot_product: lane k of a
+        row accumulates the columns [k * lane_length, (k + 1) * lane_length).
+        Lanes are padded with zero values to the largest number of nonzero
+        elements of a lane, their column index is 0.
+        :param num_lanes: NUM_LANES_G
+        :return:          Tuple of (values, columns), shape [rows, num_lanes, width]
+        """
+        rows, cols = self._shape
+        lane_length = -(-cols // num_lanes)
+        row = self._row_of_values()
+        lane = self._indices // lane_length
+
+        # Position of every value within its lane, values are sorted by row and column
+        key = row * num_lanes + lane
+        starts = np.concatenate([[0], np.cumsum(np.bincount(key, minlength=rows * num_lanes))])
+        position = np.arange(self.nnz) - starts[key]
+        width = max(1, int(position.max()) + 1) if self.nnz else 1
+
+        values = np.zeros((rows, num_lanes, width), dtype=self._data.dtype)
+        columns = np.zeros((rows, num_lanes, width), dtype=np.int64)
+        values[row, lane, position] = self._data
+        columns[row, lane, position] = self._indices
+        return values, columns
+
+    def __repr__(self):
+        return f"CsrMatrix(shape={self._shape}, nnz={self.nnz})"
+
+    # --------------------------------------------------------------------------
+    # Private Methods
+    # --------------------------------------------------------------------------
+    def _row_of_values(self):
+        return np.repeat(np.arange(self._shape[0]), self.row_nonzeros())
@@ -0,0 +1,214 @@
+################################################################################
+# fix_stimuli.py
+#
+# Stimuli of the cosim models. Every config draws from its own random streams:
+# the seed sequence is derived from the generics (FixStimuli.for_config()) and
+# every signal gets a child stream keyed by its name, so the data does not
+# depend on the order of the configs, parallel workers reproduce it and no two
+# configs or signals share a stream. All samples of a signal are drawn with
+# whole-array NumPy calls and quantized by a single cl_fix_from_real call.
+#
+# A signal is composed of blocks in a fixed order:
+#   corners    cl_fix_max_value and cl_fix_min_value of the format
+#   ramp       rising from min to max (exclusive)
+#   ramp_down  falling from max to min (inclusive)
+#   uniform    uniform over [min, max]
+#   heavy      heavy-tailed around zero (Student's t), mostly small values
+#              (zeros for coarse formats), rare values up to min and max
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+# Import python packages
+import sys
+import os
+import json
+import zlib
+import hashlib
+import numpy as np
+
+#Import olo_fix
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../submodules/open-logic/src/fix/python")))
+from en_cl_fix_pkg import *
+
+#Import fixed point model
+import fix_profile
+
+################################################################################
+# Constants
+################################################################################
+DEFAULT_SEED = 42
+
+# Student's t degrees of freedom and scale (relative to max - min) of the heavy-tailed block
+HEAVY_TAIL_DF = 2.0
+HEAVY_TAIL_SCALE = 2.0**-6
+
+################################################################################
+# Classes
+################################################################################
+class FixStimuli:
+    """
+    Vectorized stimulus generator with one random stream per signal
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self, seed = DEFAULT_SEED):
+        """
+        Constructor of the FixStimuli class
+        :param seed: Integer seed or np.random.SeedSequence
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self._seed = seed
+
+    @classmethod
+    def for_config(cls, generics : dict, seed : int = DEFAULT_SEED):
+        """
+        Stimuli of a testbench config, the streams are derived from the seed
+        and a digest of the generics
+        :param generics: Generics of the config
+        :param seed:     Seed shared by all configs
+        :return:         FixStimuli
+        """
+        # Python's hash() differs between processes, the digest does not
+        digest = hashlib.sha256(json.dumps(generics, sort_keys=True, default=str).encode()).digest()
+        words = np.frombuffer(digest, dtype=np.uint32).tolist()
+        return cls(np.random.SeedSequence([seed] + words))
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def generator(self, signal : str) -> np.random.Generator:
+        """
+        Random generator of a signal, independent of the other signals and of
+        the order they are drawn in
+        :param signal: Name of the signal
+        :return:       np.random.Generator
+        """
+        key = zlib.crc32(signal.encode())
+        child = np.random.SeedSequence(self._seed.entropy, spawn_key=self._seed.spawn_key + (key,))
+        return np.random.default_rng(child)
+
+    def draw_real(self,
+                  signal    : str,
+                  fmt       : FixFormat,
+                  dim       : int  = None,
+                  corners   : bool = False,
+                  ramp      : int  = 0,
+                  ramp_down : int  = 0,
+                  uniform   : int  = 0,
+                  heavy     : int  = 0):
+        """
+        Real valued samples of a signal within the range of its format
+        :param signal:    Name of the signal, selects the random stream
+        :param fmt:       Format of the samples
+        :param dim:       Number of elements per sample, None for scalar samples
+        :param corners:   Start with a max and a min sample
+        :param ramp:      Number of rising ramp samples
+        :param ramp_down: Number of falling ramp samples
+        :param uniform:   Number of uniformly distributed samples
+        :param heavy:     Number of heavy-tailed samples
+        :return:          Samples, shape [num_samples] or [num_samples, dim]
+        """
+        low, high = cl_fix_min_value(fmt), cl_fix_max_value(fmt)
+        shape = () if dim is None else (dim,)
+        rng = self.generator(signal)
+
+        blocks = []
+        if corners:
+            blocks.append(np.stack([np.full(shape, high), np.full(shape, low)]))
+        if ramp:
+            blocks.append(_broadcast(np.linspace(low, high, ramp, endpoint=False), shape))
+        if ramp_down:
+            blocks.append(_broadcast(np.linspace(high, low, ramp_down), shape))
+        if uniform:
+            blocks.append(rng.uniform(low, high, (uniform,) + shape))
+        if heavy:
+            blocks.append(_heavy_tailed(rng, fmt, (heavy,) + shape))
+        if not blocks:
+            return np.zeros((0,) + shape)
+        return np.concatenate(blocks)
+
+    def draw(self, signal : str, fmt : FixFormat, dim : int = None, **blocks):
+        """
+        Quantized samples of a signal, see draw_real() for the blocks
+        :param signal: Name of the signal, selects the random stream
+        :param fmt:    Format of the samples
+        :param dim:    Number of elements per sample, None for scalar samples
+        :return:       Samples quantized to fmt
+        """
+        return quantize(self.draw_real(signal, fmt, dim, **blocks), fmt)
+
+    def draw_chunks(self,
+                    signal     : str,
+                    fmt        : FixFormat,
+                    count      : int,
+                    dim        : int,
+                    chunk_size : int,
+                    corners    : bool  = True,
+                    heavy      : float = 0.0):
+        """
+        Quantized samples of a signal in chunks, so memory does not grow with
+        count. The data is the same for every chunk_size.
+        :param signal:     Name of the signal, selects the random stream
+        :param fmt:        Format of the samples
+        :param count:      Total number of samples
+        :param dim:        Number of elements per sample
+        :param chunk_size: Maximum number of samples per chunk
+        :param corners:    Start with a max and a min sample
+        :param heavy:      Share of heavy-tailed samples, the others are uniform
+        :return:           Generator of quantized chunks, shape [chunk, dim]
+        """
+        low, high = cl_fix_min_value(fmt), cl_fix_max_value(fmt)
+        rng = self.generator(signal)
+        # Positions and values of the heavy-tailed samples have their own
+        # streams, so the uniform ones do not depend on the share and every
+        # stream is consumed in the same order for every chunk_size
+        mask_rng = self.generator(signal + ".mask")
+        heavy_rng = self.generator(signal + ".heavy")
+
+        corner_samples = np.stack([np.full(dim, high), np.full(dim, low)])[:count if corners else 0]
+        done = 0
+        while done < count:
+            num = min(chunk_size, count - done)
+            num_corners = max(0, min(len(corner_samples) - done, num))
+            chunk = np.concatenate([corner_samples[done:done + num_corners],
+                                    rng.uniform(low, high, (num - num_corners, dim))])
+            # Heavy-tailed samples replace uniform ones at random positions
+            if heavy > 0.0:
+                mask = mask_rng.random(num) < heavy
+                mask[:num_corners] = False
+                chunk[mask] = _heavy_tailed(heavy_rng, fmt, (int(np.count_nonzero(mask)), dim))
+            done += num
+            yield quantize(chunk, fmt)
+
+################################################################################
+# Functions
+################################################################################
+def quantize(values, fmt : FixFormat):
+    """
+    Quantize real values to a format in a single cl_fix_from_real call
+    :param values: Real values
+    :param fmt:    Format
+    :return:       Quantized values
+    """
+    with fix_profile.phase("cl_fix_from_real"):
+        return cl_fix_from_real(values, fmt)
+
+################################################################################
+# Helpers
+################################################################################
+def _broadcast(values, shape : tuple):
+    # Every element of a sample gets the same value
+    return np.broadcast_to(values.reshape((-1,) + (1,) * len(shape)), values.shape + shape)
+
+def _heavy_tailed(rng, fmt : FixFormat, shape : tuple):
+    # Student's t around zero (around min for unsigned formats), clipped to the range
+    low, high = cl_fix_min_value(fmt), cl_fix_max_value(fmt)
+    values = rng.standard_t(HEAVY_TAIL_DF, shape) * (high - low) * HEAVY_TAIL_SCALE
+    if fmt.S == 0:
+        values = low + np.abs(values)
+    return np.clip(values, low, high)
@@ -0,0 +1,707 @@
+################################################################################
+# fix_timing.py
+#
+# Transaction level timing model of the fix_dot_product and
+# fix_matrix_vector_product FSMs. Instead of stepping every clock cycle the
+# handshakes are resolved per transaction, so thousands of products are
+# evaluated in milliseconds. The cycle stepped FSMs below mirror the VHDL
+# two-process records and are only used to self-check the transaction model.
+#
+# Per sample three cycles are traced: offer (in_valid_i rises), accept
+# (in_valid_i and in_ready_o) and out_valid (out_valid_o of its result). The
+# report separates the two delays:
+#   queueing  accept - offer, cycles the source waits for in_ready_o
+#   latency   out_valid - accept, cycles the DUT takes for an accepted input
+#             (the same definition as the latency property of the timings)
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import argparse
+import numpy as np
+
+# Import the testbench matrix structures
+import fix_sparse
+
+################################################################################
+# Constants
+################################################################################
+# Clock of the VUnit testbenches
+DEFAULT_CLK_FREQUENCY = 100.0e6
+
+# Input throttling of the "Throttled" VUnit tests
+TB_STALL_PROBABILITY = 0.5
+TB_STALL_MAX_CYCLES = 10
+
+# Reported latency and queueing percentiles
+LATENCY_PERCENTILES = (50, 90, 99, 100)
+
+################################################################################
+# Functions
+################################################################################
+def stimuli_stalls(num_samples : int,
+                   stall_probability : float = 0.0,
+                   stall_max_cycles : int = 0,
+                   seed : int = 42):
+    """
+    Idle cycles the olo_test_fix_stimuli VC inserts before every sample. With
+    stall_probability a sample is delayed by 1 to stall_max_cycles cycles.
+    :param num_samples:       Number of samples played
+    :param stall_probability: Probability of a stall before a sample
+    :param stall_max_cycles:  Maximum length of a stall
+    :param seed:              Seed of the random generator
+    :return:                  Stall cycles per sample (int64 array)
+    """
+    if stall_probability <= 0.0 or stall_max_cycles <= 0:
+        return np.zeros(num_samples, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    stall = rng.random(num_samples) < stall_probability
+    return np.where(stall, rng.integers(1, stall_max_cycles + 1, num_samples), 0).astype(np.int64)
+
+def handshake(stalls, period : int, latency : int):
+    """
+    Resolve the in_valid_i/in_ready_o handshakes of a DUT that accepts a new
+    input every period cycles. The source presents sample k stalls[k] cycles
+    after sample k-1 was accepted, the DUT raises in_ready_o period cycles
+    after the last accept.
+    :param stalls:  Stall cycles of the source per sample
+    :param period:  Cycles between two accepts at full speed
+    :param latency: Cycles from accept to out_valid_o
+    :return:        Tuple of (offer, accept, out_valid) cycles per sample
+    """
+    stalls = np.asarray(stalls, dtype=np.int64)
+    # accept[k] = max(accept[k-1] + 1 + stalls[k], accept[k-1] + period)
+    step = np.maximum(1 + stalls, period)
+    step[0] = stalls[0]
+    accept = np.cumsum(step)
+    offer = accept.copy()
+    offer[1:] = accept[:-1] + 1 + stalls[1:]
+    offer[0] = stalls[0]
+    return offer, accept, accept + latency
+
+def streaming_handshake(stalls, num_stages : int, stage_cycles : int, output_delay : int = 0):
+    """
+    Resolve the handshakes of fix_matrix_vector_product with STREAMING_G. A
+    new input is accepted one cycle after the last stage of the previous one
+    was fed, its first stage is fed once the fix_dot_product units are free.
+    :param stalls:       Stall cycles of the source per sample
+    :param num_stages:   NUM_STAGES_C
+    :param stage_cycles: Cycles per element of a lane (LANE_LENGTH_C)
+    :param output_delay: Register levels of the fix_dot_product adder tree and MAC pipeline
+    :return:             Tuple of (offer, accept, out_valid) cycles per sample
+    """
+    stalls = np.asarray(stalls, dtype=np.int64)
+    offer = np.empty_like(stalls)
+    accept = np.empty_like(stalls)
+    out = np.empty_like(stalls)
+
+    # The feed of a stage depends on the previous input, plain Python is
+    # fastest for this recurrence
+    product_cycles = num_stages * stage_cycles
+    feed, ready = None, 0
+    for idx, stall in enumerate(stalls.tolist()):
+        offer[idx] = stall if feed is None else accept[idx - 1] + 1 + stall
+        accept[idx] = max(offer[idx], ready)
+        feed = accept[idx] + 1 if feed is None else max(accept[idx] + 1, feed + product_cycles)
+        ready = feed + product_cycles - stage_cycles + 1
+        out[idx] = feed + product_cycles + 2 + output_delay
+    return offer, accept, out
+
+def batch_handshake(stalls, batch_size : int, latency : int):
+    """
+    Resolve the handshakes of fix_matrix_vector_product with BATCH_SIZE_G. The
+    vectors of a batch are accepted back to back, the last one starts the
+    computation. The results leave one per cycle, in_ready_o rises together
+    with the last one.
+    :param stalls:     Stall cycles of the source per sample, a multiple of batch_size
+    :param batch_size: BATCH_SIZE_G
+    :param latency:    Cycles from the accept of the last vector to the first out_valid_o
+    :return:           Tuple of (offer, accept, out_valid) cycles per sample
+    """
+    stalls = np.asarray(stalls, dtype=np.int64)
+    if len(stalls) % batch_size != 0:
+        raise ValueError(f"The number of samples must be a multiple of the batch size {batch_size}.")
+    offer = np.empty_like(stalls)
+    accept = np.empty_like(stalls)
+
+    ready = 0
+    for idx, stall in enumerate(stalls.tolist()):
+        offer[idx] = stall if idx == 0 else accept[idx - 1] + 1 + stall
+        accept[idx] = max(offer[idx], ready)
+        if idx % batch_size == batch_size - 1:
+            ready = accept[idx] + latency + batch_size - 1
+        else:
+            ready = accept[idx] + 1
+
+    # Every result of a batch follows the accept of its last vector
+    last = accept.reshape(-1, batch_size)[:, -1:]
+    out = (last + latency + np.arange(batch_size)).reshape(-1)
+    return offer, accept, out
+
+def skip_zeros_lane_lengths(matrix_mask, num_dot_products : int, num_lanes : int = 1):
+    """
+    Effective LANE_LENGTH_C of every stage with SKIP_ZEROS_G. A fix_dot_product
+    unit always multiplies lane element 0 and skips the elements 1 to
+    LANE_LENGTH_C - 1 that are zero in all lanes. The units of a stage are
+    collected together, so the slowest row of a stage sets its length.
+    :param matrix_mask:      Nonzero mask of the matrix, shape [rows, cols]
+    :param num_dot_products: NUM_DOT_PRODUCTS_G
+    :param num_lanes:        NUM_LANES_G
+    :return:                 Lane length per stage (int64 array)
+    """
+    mask = np.asarray(matrix_mask, dtype=bool)
+    rows, cols = mask.shape
+    lane_length = -(-cols // num_lanes)
+    num_stages = -(-rows // num_dot_products)
+
+    # Padding columns and the padding rows of the last stage are zero
+    padded = np.zeros((num_stages * num_dot_products, num_lanes * lane_length), dtype=bool)
+    padded[:rows, :cols] = mask
+    used = padded.reshape(-1, num_lanes, lane_length).any(axis=1)
+    lengths = 1 + np.sum(used[:, 1:], axis=1)
+    return lengths.reshape(num_stages, num_dot_products).max(axis=1).astype(np.int64)
+
+################################################################################
+# Classes
+################################################################################
+class DotProductTiming:
+    """
+    Timing of fix_dot_product: one cycle in IDLE_S, LANE_LENGTH_C - 1 cycles
+    in CALCULATE_S and one in FINISHED_S, where LANE_LENGTH_C is
+    DIMENSION_WIDTH_G / NUM_LANES_G rounded up. in_ready_o rises together with
+    the last MAC result, so the period is LANE_LENGTH_C + 1. The adder tree
+    adds one cycle per level to the latency. With STREAMING_G the next vectors
+    are accepted in FINISHED_S, which shortens the period to LANE_LENGTH_C.
+
+    With MAC_PIPELINE_G > 1 the period does not change, but the registered
+    multiplier and the MAC_PIPELINE_G accumulator registers add
+    MAC_PIPELINE_G cycles to the latency and the adder tree combines
+    NUM_LANES_G * MAC_PIPELINE_G partial sums.
+
+    With DOUBLE_PUMP_G two lanes share a MAC on the doubled clock, which
+    halves the DSP count. The clock domain crossings add three cycles to the
+    latency, the period does not change.
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self, dimension, streaming : bool = False, num_lanes = 1, mac_pipeline = 1, double_pump : bool = False):
+        """
+        Constructor of the DotProductTiming class
+        :param dimension:    DIMENSION_WIDTH_G (scalar or array)
+        :param streaming:    STREAMING_G
+        :param num_lanes:    NUM_LANES_G (scalar or array)
+        :param mac_pipeline: MAC_PIPELINE_G (scalar or array)
+        :param double_pump:  DOUBLE_PUMP_G
+        """
+        if double_pump and np.any(np.asarray(mac_pipeline) > 1):
+            raise ValueError("MAC_PIPELINE_G > 1 is not supported with DOUBLE_PUMP_G.")
+        self.dimension = dimension
+        self.streaming = streaming
+        self.num_lanes = num_lanes
+        self.mac_pipeline = mac_pipeline
+        self.double_pump = double_pump
+
+    # --------------------------------------------------------------------------
+    # Properties
+    # --------------------------------------------------------------------------
+    @property
+    def lane_length(self):
+        # LANE_LENGTH_C = ceil(DIMENSION_WIDTH_G / NUM_LANES_G)
+        return -(-np.asarray(self.dimension) // np.asarray(self.num_lanes))
+
+    @property
+    def tree_levels(self):
+        # TREE_LEVELS_C = log2ceil(NUM_LANES_G * MAC_PIPELINE_G)
+        return np.ceil(np.log2(np.asarray(self.num_lanes) * np.asarray(self.mac_pipeline))).astype(np.int64)
+
+    @property
+    def mac_delay(self):
+        # MAC_DELAY_C, the multiplier output is only registered with MAC_PIPELINE_G > 1
+        mac_pipeline = np.asarray(self.mac_pipeline)
+        return np.where(mac_pipeline > 1, mac_pipeline, 0).astype(np.int64) + 3 * int(self.double_pump)
+
+    @property
+    def output_delay(self):
+        # Cycles from the last MAC feed + 1 to out_valid_o
+        return self.tree_levels + self.mac_delay
+
+    @property
+    def latency(self):
+        return self.lane_length + 1 + self.output_delay
+
+    @property
+    def period(self):
+        if self.streaming:
+            return self.lane_length
+        return self.lane_length + 1
+
+    @property
+    def num_macs(self):
+        # NUM_MACS_C with DOUBLE_PUMP_G
+        if self.double_pump:
+            return -(-np.asarray(self.num_lanes) // 2)
+        return self.num_lanes
+
+    @property
+    def mac_slots(self):
+        # Multiplications per clock cycle the MACs can do
+        return self.num_macs * (2 if self.double_pump else 1)
+
+    @property
+    def useful_macs(self):
+        return self.dimension
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def schedule(self, stalls):
+        return handshake(stalls, int(self.period), int(self.latency))
+
+    def cycle_model(self):
+        return _DotProductFsm(int(self.lane_length), self.streaming, int(self.output_delay))
+
+class MatrixVectorProductTiming:
+    """
+    Timing of fix_matrix_vector_product: after the IDLE_S accept every one of
+    the NUM_STAGES_C stages takes one FEED_DOT_PRODUCT_S cycle, the latency of
+    the fix_dot_product units and one COLLECT_DOT_PRODUCT_S cycle.
+
+    With STREAMING_G feeding and collecting overlap: a stage is fed every
+    LANE_LENGTH_C cycles and the next input is accepted while the last stage
+    of the current one is computed.
+
+    With SKIP_ZEROS_G every stage has its own lane length, which depends on
+    the zeros of the matrix (see skip_zeros_lane_lengths()).
+
+    With BATCH_SIZE_G the vectors of a batch are buffered and every stage
+    feeds them back to back with the same matrix rows, the fix_dot_product
+    units accept the next vector in FINISHED_S. A stage takes
+    (BATCH_SIZE_G - 1) * LANE_LENGTH_C cycles more, but only once per batch.
+
+    MAC_PIPELINE_G only changes the fix_dot_product latency, it is not
+    supported with SKIP_ZEROS_G. DOUBLE_PUMP_G changes the latency and the
+    number of MACs of the units. PACKED_G does not change the timing, every
+    MAC computes the products of two rows.
+
+    OUT_STREAM_G does not change the timing either while out_stream_ready_i
+    is high, but the rows of the first stage leave after
+    first_stage_latency cycles instead of the whole vector after latency.
+    """
+
+    # --------------------------------------------------------------------------
+    # Constructor
+    # --------------------------------------------------------------------------
+    def __init__(self, num_dot_products, rows, cols, streaming : bool = False, num_lanes = 1, matrix_mask = None,
+                 batch_size : int = 1, mac_pipeline = 1, double_pump : bool = False, packed : bool = False):
+        """
+        Constructor of the MatrixVectorProductTiming class, works element-wise
+        on arrays of generics unless matrix_mask is given
+        :param num_dot_products: NUM_DOT_PRODUCTS_G
+        :param rows:             MATRIX_ROW_WIDTH_G
+        :param cols:             MATRIX_COLUMN_WIDTH_G
+        :param streaming:        STREAMING_G
+        :param num_lanes:        NUM_LANES_G
+        :param matrix_mask:      Nonzero mask of the matrix with SKIP_ZEROS_G, None without
+        :param batch_size:       BATCH_SIZE_G
+        :param mac_pipeline:     MAC_PIPELINE_G
+        :param double_pump:      DOUBLE_PUMP_G
+        :param packed:           PACKED_G
+        """
+        if matrix_mask is not None and streaming:
+            raise ValueError("SKIP_ZEROS_G is not supported with STREAMING_G.")
+        if batch_size > 1 and (streaming or matrix_mask is not None):
+            raise ValueError("BATCH_SIZE_G > 1 is not supported with STREAMING_G or SKIP_ZEROS_G.")
+        if np.any(np.asarray(mac_pipeline) > 1) and matrix_mask is not None:
+            raise ValueError("MAC_PIPELINE_G > 1 is not supported with SKIP_ZEROS_G.")
+        if packed and (double_pump or matrix_mask is not None):
+            raise ValueError("PACKED_G is not supported with DOUBLE_PUMP_G or SKIP_ZEROS_G.")
+        self.num_dot_products = num_dot_products
+        self.rows = rows
+        self.cols = cols
+        self.streaming = streaming
+        self.num_lanes = num_lanes
+        self.matrix_mask = matrix_mask
+        self.batch_size = batch_size
+        self.packed = packed
+        self.lane_lengths = None
+        if matrix_mask is not None:
+            self.lane_lengths = skip_zeros_lane_lengths(matrix_mask, num_dot_products, num_lanes)
+        self.dot_product = DotProductTiming(cols, streaming or batch_size > 1, num_lanes, mac_pipeline, double_pump)
+
+    @classmethod
+    def from_generics(cls, generics : dict):
+        return cls(generics["NUM_DOT_PRODUCTS_G"], generics["MATRIX_ROW_WIDTH_G"], generics["MATRIX_COLUMN_WIDTH_G"],
+                   generics.get("STREAMING_G", False), generics.get("NUM_LANES_G", 1),
+                   batch_size=generics.get("BATCH_SIZE_G", 1), mac_pipeline=generics.get("MAC_PIPELINE_G", 1),
+                   double_pump=generics.get("DOUBLE_PUMP_G", False), packed=generics.get("PACKED_G", False))
+
+    # --------------------------------------------------------------------------
+    # Properties
+    # --------------------------------------------------------------------------
+    @property
+    def num_stages(self):
+        # NUM_STAGES_C = ceil(MATRIX_ROW_WIDTH_G / NUM_DOT_PRODUCTS_G)
+        return -(-np.asarray(self.rows) // np.asarray(self.num_dot_products))
+
+    @property
+    def stage_cycles(self):
+        if self.streaming:
+            return self.dot_product.period
+        # The vectors of a batch follow each other every LANE_LENGTH_C cycles
+        return (self.batch_size - 1) * self.dot_product.lane_length + self.dot_product.latency + 1
+
+    @property
+    def latency(self):
+        if self.streaming:
+            # Accept, feed the first stage, collect the last one
+            return self.num_stages * self.stage_cycles + 3 + self.dot_product.output_delay
+        if self.lane_lengths is not None:
+            # Every stage takes its lane length instead of LANE_LENGTH_C
+            return int(np.sum(self.lane_lengths + 2 + self.dot_product.output_delay)) + 1
+        return self.num_stages * self.stage_cycles + 1
+
+    @property
+    def first_stage_latency(self):
+        # Cycles from the accept to the first stage of OUT_STREAM_G
+        if self.streaming:
+            return self.stage_cycles + 3 + self.dot_product.output_delay
+        if self.lane_lengths is not None:
+            return int(self.lane_lengths[0] + 2 + self.dot_product.output_delay) + 1
+        return self.stage_cycles + 1
+
+    @property
+    def period(self):
+        if self.streaming:
+            # Sustained rate with back-to-back inputs
+            return self.num_stages * self.stage_cycles
+        if self.batch_size > 1:
+            # Average per vector: accept the batch, compute, output all but
+            # the last result before in_ready_o rises
+            return (self.latency + 2 * (self.batch_size - 1)) / self.batch_size
+        # in_ready_o rises together with out_valid_o
+        return self.latency
+
+    @property
+    def num_units(self):
+        # NUM_UNITS_C, with PACKED_G a fix_dot_product unit computes two rows
+        if self.packed:
+            return -(-np.asarray(self.num_dot_products) // 2)
+        return np.asarray(self.num_dot_products)
+
+    @property
+    def num_macs(self):
+        return self.num_units * self.dot_product.num_macs
+
+    @property
+    def mac_slots(self):
+        return self.num_units * self.dot_product.mac_slots * (2 if self.packed else 1)
+
+    @property
+    def useful_macs(self):
+        if self.matrix_mask is not None:
+            # Skipped elements are not computed
+            return int(np.count_nonzero(self.matrix_mask))
+        return np.asarray(self.rows) * np.asarray(self.cols)
+
+    # --------------------------------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------------------------------
+    def schedule(self, stalls):
+        if self.streaming:
+            return streaming_handshake(stalls, int(self.num_stages), int(self.dot_product.lane_length),
+                                       int(self.dot_product.output_delay))
+        if self.batch_size > 1:
+            return batch_handshake(stalls, self.batch_size, int(self.latency))
+        return handshake(stalls, int(self.period), int(self.latency))
+
+    def cycle_model(self):
+        return _MatrixVectorProductFsm(int(self.num_stages), self.dot_product.cycle_model(), self.streaming,
+                                       None if self.lane_lengths is None else self.lane_lengths.tolist(),
+                                       self.batch_size)
+
+################################################################################
+# Simulation
+################################################################################
+def simulate(timing,
+             num_samples       : int = 1000,
+             stall_probability : float = 0.0,
+             stall_max_cycles  : int = 0,
+             clk_frequency     : float = DEFAULT_CLK_FREQUENCY,
+             seed              : int = 42) -> dict:
+    """
+    Simulate a stream of inputs through a DUT
+    :param timing:            DotProductTiming or MatrixVectorProductTiming
+    :param num_samples:       Number of inputs
+    :param stall_probability: Probability of a source stall before an input
+    :param stall_max_cycles:  Maximum length of a source stall
+    :param clk_frequency:     Clock frequency in Hz
+    :param seed:              Seed of the stall generator
+    :return:                  Report dict with cycle traces and statistics
+    """
+    stalls = stimuli_stalls(num_samples, stall_probability, stall_max_cycles, seed)
+    offer, accept, out = timing.schedule(stalls)
+    return _report(timing, offer, accept, out, clk_frequency)
+
+def simulate_cycles(timing,
+                    num_samples       : int = 100,
+                    stall_probability : float = 0.0,
+                    stall_max_cycles  : int = 0,
+                    clk_frequency     : float = DEFAULT_CLK_FREQUENCY,
+                    seed              : int = 42) -> dict:
+    """
+    Same as simulate() but steps the FSMs cycle by cycle, slow
+    """
+    stalls = stimuli_stalls(num_samples, stall_probability, stall_max_cycles, seed)
+    offer, accept, out = _step_cycles(timing.cycle_model(), stalls)
+    return _report(timing, offer, accept, out, clk_frequency)
+
+def self_check(num_samples : int = 50, seed : int = 42):
+    """
+    Compare the transaction model against the cycle stepped FSMs
+    """
+    configs = []
+    for streaming in [False, True]:
+        configs += [DotProductTiming(2, streaming), DotProductTiming(7, streaming), DotProductTiming(30, streaming, 4),
+                    MatrixVectorProductTiming(1, 3, 2, streaming), MatrixVectorProductTiming(11, 32, 32, streaming),
+                    MatrixVectorProductTiming(4, 4, 5, streaming), MatrixVectorProductTiming(5, 17, 4, streaming),
+                    MatrixVectorProductTiming(11, 32, 32, streaming, 4), MatrixVectorProductTiming(5, 17, 9, streaming, 3)]
+    # SKIP_ZEROS_G, all-zero stages skip CALCULATE_S
+    rng = np.random.default_rng(seed)
+    configs += [MatrixVectorProductTiming(2, 5, 8, matrix_mask=rng.random((5, 8)) < 0.2),
+                MatrixVectorProductTiming(3, 7, 9, matrix_mask=np.zeros((7, 9))),
+                MatrixVectorProductTiming(11, 32, 32, matrix_mask=fix_sparse.band_mask(32, 32)),
+                MatrixVectorProductTiming(4, 32, 32, num_lanes=4, matrix_mask=fix_sparse.block_mask(32, 32))]
+    # BATCH_SIZE_G
+    configs += [MatrixVectorProductTiming(1, 3, 2, batch_size=2), MatrixVectorProductTiming(11, 32, 32, batch_size=5),
+                MatrixVectorProductTiming(5, 17, 9, num_lanes=3, batch_size=10), MatrixVectorProductTiming(4, 4, 6, num_lanes=3, batch_size=2)]
+    # MAC_PIPELINE_G
+    for streaming in [False, True]:
+        configs += [DotProductTiming(4, streaming, mac_pipeline=4), DotProductTiming(30, streaming, 4, 3),
+                    MatrixVectorProductTiming(5, 17, 9, streaming, 2, mac_pipeline=3),
+                    MatrixVectorProductTiming(11, 32, 32, streaming, mac_pipeline=4)]
+    configs += [MatrixVectorProductTiming(4, 4, 6, num_lanes=3, batch_size=2, mac_pipeline=2)]
+    # DOUBLE_PUMP_G
+    for streaming in [False, True]:
+        configs += [DotProductTiming(30, streaming, 4, double_pump=True),
+                    MatrixVectorProductTiming(5, 17, 9, streaming, 3, double_pump=True)]
+    configs += [MatrixVectorProductTiming(4, 32, 32, num_lanes=4, matrix_mask=fix_sparse.block_mask(32, 32), double_pump=True),
+                MatrixVectorProductTiming(4, 4, 6, num_lanes=2, batch_size=2, double_pump=True)]
+    # PACKED_G
+    configs += [MatrixVectorProductTiming(5, 17, 9, True, 3, packed=True),
+                MatrixVectorProductTiming(4, 4, 6, num_lanes=3, batch_size=2, mac_pipeline=2, packed=True)]
+    for timing in configs:
+        for stall_probability, stall_max_cycles in [(0.0, 0), (TB_STALL_PROBABILITY, TB_STALL_MAX_CYCLES), (0.9, 200)]:
+            fast = simulate(timing, num_samples, stall_probability, stall_max_cycles, seed=seed)
+            slow = simulate_cycles(timing, num_samples, stall_probability, stall_max_cycles, seed=seed)
+            for key in ("offer", "accept", "out_valid"):
+                if not np.array_equal(fast[key], slow[key]):
+                    raise RuntimeError(f"fix_timing : {type(timing).__name__} {key} cycles differ from the cycle model")
+
+################################################################################
+# Helpers
+################################################################################
+def _report(timing, offer, accept, out, clk_frequency : float) -> dict:
+    latency = out - accept
+    queueing = accept - offer
+    total_cycles = int(out[-1]) + 1
+    num_samples = len(out)
+    return {
+        "offer"                : offer,
+        "accept"               : accept,
+        "out_valid"            : out,
+        "total_cycles"         : total_cycles,
+        "throughput"           : num_samples / total_cycles,
+        "samples_per_second"   : num_samples / total_cycles * clk_frequency,
+        "latency_percentiles"  : dict(zip(LATENCY_PERCENTILES, np.percentile(latency, LATENCY_PERCENTILES))),
+        "queueing_percentiles" : dict(zip(LATENCY_PERCENTILES, np.percentile(queueing, LATENCY_PERCENTILES))),
+        "backpressure_cycles"  : int(np.sum(queueing)),
+        "dsp_utilization"      : float(num_samples * timing.useful_macs / (timing.mac_slots * total_cycles)),
+    }
+
+def _step_cycles(dut, stalls):
+    # olo_test_fix_stimuli VC: idle for stall cycles, then hold valid until ready
+    num_samples = len(stalls)
+    offer, accept, out = [], [], []
+    sample, wait = 0, int(stalls[0])
+    cycle = 0
+    while len(out) < num_samples:
+        valid = sample < num_samples and wait == 0
+        if valid and len(offer) == sample:
+            offer.append(cycle)
+        ready, out_valid = dut.outputs()
+        if out_valid:
+            out.append(cycle)
+        dut.step(valid)
+        if valid and ready:
+            accept.append(cycle)
+            sample += 1
+            wait = int(stalls[sample]) if sample < num_samples else 0
+        elif wait > 0:
+            wait -= 1
+        cycle += 1
+    return np.array(offer), np.array(accept), np.array(out)
+
+class _DotProductFsm:
+    # Mirrors the registers of fix_dot_product, dimension is LANE_LENGTH_C and
+    # the adder tree and the MAC pipeline delay out_valid by output_delay cycles
+
+    def __init__(self, dimension : int, streaming : bool = False, output_delay : int = 0):
+        self.dimension = int(dimension)
+        self.streaming = streaming
+        self.state, self.idx, self.in_ready, self.out_valid = "IDLE_S", 0, 1, 0
+        self.tree_valid = [0] * output_delay
+
+    def outputs(self):
+        return self.in_ready, (self.tree_valid + [self.out_valid])[0]
+
+    def step(self, in_valid : bool):
+        state, idx, in_ready, out_valid = self.state, self.idx, self.in_ready, 0
+        self.tree_valid = self.tree_valid[1:] + [self.out_valid] if self.tree_valid else []
+        if self.state == "IDLE_S":
+            idx, in_ready = 0, 1
+            if in_valid and self.in_ready:
+                in_ready, idx, state = 0, self.idx + 1, "CALCULATE_S"
+                # SKIP_ZEROS_G: nothing to skip to, lane element 0 is multiplied in FINISHED_S
+                if self.dimension == 1:
+                    idx, state = 0, "FINISHED_S"
+                    if self.streaming:
+                        in_ready = 1
+        elif self.state == "CALCULATE_S":
+            idx = self.idx + 1
+            if self.idx == self.dimension - 1:
+                idx, state = 0, "FINISHED_S"
+                if self.streaming:
+                    in_ready = 1
+        else:
+            out_valid, in_ready, state = 1, 1, "IDLE_S"
+            if self.streaming and in_valid and self.in_ready:
+                in_ready, idx, state = 0, 1, "CALCULATE_S"
+        self.state, self.idx, self.in_ready, self.out_valid = state, idx, in_ready, out_valid
+
+class _MatrixVectorProductFsm:
+    # Mirrors the registers of fix_matrix_vector_product, all fix_dot_product
+    # units run in lockstep, so one unit stands for all of them. With
+    # SKIP_ZEROS_G it is the slowest unit of the stage.
+
+    def __init__(self, num_stages : int, dot_product : _DotProductFsm, streaming : bool = False, lane_lengths : list = None,
+                 batch_size : int = 1):
+        self.num_stages = num_stages
+        self.dot_product = dot_product
+        self.streaming = streaming
+        self.lane_lengths = lane_lengths
+        self.batch_size = batch_size
+        self.state, self.stage_idx, self.in_ready, self.out_valid, self.in_dot_valid = "IDLE_S", 0, 1, 0, 0
+        self.collect_idx = 0
+        self.batch_idx, self.collect_batch, self.out_idx = 0, 0, 0
+
+    def outputs(self):
+        return self.in_ready, self.out_valid
+
+    def step(self, in_valid : bool):
+        if self.streaming:
+            return self._step_streaming(in_valid)
+        dot_ready, dot_valid = self.dot_product.outputs()
+        state, stage_idx, in_ready, out_valid, in_dot_valid = self.state, self.stage_idx, self.in_ready, 0, self.in_dot_valid
+        batch_idx, collect_batch, out_idx = self.batch_idx, self.collect_batch, self.out_idx
+        last_vector = self.batch_size - 1
+        if self.state == "IDLE_S":
+            stage_idx, in_ready = 0, 1
+            if in_valid and self.in_ready:
+                if self.batch_idx < last_vector:
+                    batch_idx = self.batch_idx + 1
+                else:
+                    in_ready, batch_idx, in_dot_valid, state = 0, 0, 1, "FEED_DOT_PRODUCT_S"
+        elif self.state == "FEED_DOT_PRODUCT_S":
+            in_dot_valid = 1
+            if self.in_dot_valid and dot_ready:
+                if self.batch_idx < last_vector:
+                    batch_idx = self.batch_idx + 1
+                else:
+                    in_dot_valid, batch_idx, state = 0, 0, "COLLECT_DOT_PRODUCT_S"
+            if dot_valid:
+                collect_batch = self.collect_batch + 1
+        elif self.state == "COLLECT_DOT_PRODUCT_S":
+            if dot_valid:
+                if self.collect_batch < last_vector:
+                    collect_batch = self.collect_batch + 1
+                elif self.stage_idx < self.num_stages - 1:
+                    stage_idx, collect_batch, in_dot_valid, state = self.stage_idx + 1, 0, 1, "FEED_DOT_PRODUCT_S"
+                else:
+                    out_valid, out_idx, stage_idx, collect_batch = 1, 0, 0, 0
+                    if self.batch_size > 1:
+                        state = "OUTPUT_S"
+                    else:
+                        in_ready, state = 1, "IDLE_S"
+        else:
+            out_valid, out_idx = 1, self.out_idx + 1
+            if self.out_idx == self.batch_size - 2:
+                in_ready, state = 1, "IDLE_S"
+        if self.lane_lengths is not None:
+            self.dot_product.dimension = self.lane_lengths[self.stage_idx]
+        self.dot_product.step(self.in_dot_valid)
+        self.state, self.stage_idx, self.in_ready, self.out_valid, self.in_dot_valid = state, stage_idx, in_ready, out_valid, in_dot_valid
+        self.batch_idx, self.collect_batch, self.out_idx = batch_idx, collect_batch, out_idx
+
+    def _step_streaming(self, in_valid : bool):
+        dot_ready, dot_valid = self.dot_product.outputs()
+        stage_idx, collect_idx, in_ready, out_valid, in_dot_valid = self.stage_idx, self.collect_idx, self.in_ready, 0, self.in_dot_valid
+        if in_valid and self.in_ready:
+            in_ready, stage_idx, in_dot_valid = 0, 0, 1
+        if self.in_dot_valid and dot_ready:
+            if self.stage_idx < self.num_stages - 1:
+                stage_idx = self.stage_idx + 1
+            else:
+                in_dot_valid, in_ready = 0, 1
+        if dot_valid:
+            if self.collect_idx < self.num_stages - 1:
+                collect_idx = self.collect_idx + 1
+            else:
+                out_valid, collect_idx = 1, 0
+        self.dot_product.step(self.in_dot_valid)
+        self.stage_idx, self.collect_idx, self.in_ready, self.out_valid, self.in_dot_valid = stage_idx, collect_idx, in_ready, out_valid, in_dot_valid
+
+################################################################################
+# Main
+################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timing model of fix_matrix_vector_product")
+    parser.add_argument("--dot-products", type=int, default=11, help="NUM_DOT_PRODUCTS_G")
+    parser.add_argument("--rows", type=int, default=32, help="MATRIX_ROW_WIDTH_G")
+    parser.add_argument("--cols", type=int, default=32, help="MATRIX_COLUMN_WIDTH_G")
+    parser.add_argument("--streaming", action="store_true", help="STREAMING_G")
+    parser.add_argument("--lanes", type=int, default=1, help="NUM_LANES_G")
+    parser.add_argument("--skip-zeros", choices=["BANDED", "SPARSE"], help="SKIP_ZEROS_G with a testbench matrix structure")
+    parser.add_argument("--batch-size", type=int, default=1, help="BATCH_SIZE_G")
+    parser.add_argument("--mac-pipeline", type=int, default=1, help="MAC_PIPELINE_G")
+    parser.add_argument("--double-pump", action="store_true", help="DOUBLE_PUMP_G")
+    parser.add_argument("--packed", action="store_true", help="PACKED_G")
+    parser.add_argument("--samples", type=int, default=1000, help="Number of matrix vector products")
+    parser.add_argument("--stall-probability", type=float, default=0.0, help="Source stall probability")
+    parser.add_argument("--stall-max-cycles", type=int, default=0, help="Maximum source stall length")
+    parser.add_argument("--clk-frequency", type=float, default=DEFAULT_CLK_FREQUENCY, help="Clock frequency in Hz")
+    parser.add_argument("--self-check", action="store_true", help="Compare against the cycle stepped FSMs")
+    args = parser.parse_args()
+
+    if args.self_check:
+        self_check()
+        print("Self-check passed")
+
+    matrix_mask = None
+    if args.skip_zeros:
+        mask = fix_sparse.band_mask if args.skip_zeros == "BANDED" else fix_sparse.block_mask
+        matrix_mask = mask(args.rows, args.cols)
+    timing = MatrixVectorProductTiming(args.dot_products, args.rows, args.cols, args.streaming, args.lanes, matrix_mask,
+                                       args.batch_size, args.mac_pipeline, args.double_pump, args.packed)
+    report = simulate(timing, args.samples, args.stall_probability, args.stall_max_cycles, args.clk_frequency)
+    print(f"Period / latency:    {float(timing.period):g} / {int(timing.latency)} cycles")
+    print(f"First stage latency: {int(timing.first_stage_latency)} cycles (OUT_STREAM_G)")
+    print(f"Throughput:          {report['throughput']:.6f} products/cycle ({report['samples_per_second']:.1f} products/s)")
+    print(f"Backpressure:        {report['backpressure_cycles']} cycles")
+    print(f"DSP utilization:     {100 * report['dsp_utilization']:.1f} %")
+    for percentile, latency in report["latency_percentiles"].items():
+        print(f"Latency p{percentile:<3}:       {latency:.0f} cycles (accept to out_valid_o)")
+    for percentile, queueing in report["queueing_percentiles"].items():
+        print(f"Queueing p{percentile:<3}:      {queueing:.0f} cycles (in_valid_i to accept)")
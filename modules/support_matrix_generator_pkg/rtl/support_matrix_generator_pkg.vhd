@@ -32,6 +32,24 @@ package support_matrix_generator_pkg is
             constant MATRIX_COLUMN_WIDTH : integer;
             constant ELEMENT_WIDTH       : integer
         ) return StlvVectorArray_t;
+
+    -- Ascending elements for |row - col| <= BAND_HALF_WIDTH, zero elsewhere
+    function banded_matrix(
+            constant MATRIX_ROW_WIDTH    : integer;
+            constant MATRIX_COLUMN_WIDTH : integer;
+            constant ELEMENT_WIDTH       : integer;
+            constant BAND_HALF_WIDTH     : integer
+        ) return StlvVectorArray_t;
+
+    -- Ascending elements in the blocks (row / BLOCK_SIZE, col / BLOCK_SIZE)
+    -- on every BLOCK_PERIOD-th block anti-diagonal, zero elsewhere
+    function block_sparse_matrix(
+            constant MATRIX_ROW_WIDTH    : integer;
+            constant MATRIX_COLUMN_WIDTH : integer;
+            constant ELEMENT_WIDTH       : integer;
+            constant BLOCK_SIZE          : integer;
+            constant BLOCK_PERIOD        : integer
+        ) return StlvVectorArray_t;
 end package;
 
 ---------------------------------------------------------------------------------------------------
@@ -72,4 +90,45 @@ package body support_matrix_generator_pkg is
         return result_v;
     end function descending_matrix;
 
+    function banded_matrix(
+            constant MATRIX_ROW_WIDTH    : integer;
+            constant MATRIX_COLUMN_WIDTH : integer;
+            constant ELEMENT_WIDTH       : integer;
+            constant BAND_HALF_WIDTH     : integer
+        ) return StlvVectorArray_t is
+        variable result_v : StlvVectorArray_t(MATRIX_ROW_WIDTH - 1 downto 0)(MATRIX_COLUMN_WIDTH - 1 downto 0)(ELEMENT_WIDTH - 1 downto 0);
+    begin
+        result_v := ascending_matrix(MATRIX_ROW_WIDTH, MATRIX_COLUMN_WIDTH, ELEMENT_WIDTH);
+        for row in 0 to MATRIX_ROW_WIDTH - 1 loop
+            for col in 0 to MATRIX_COLUMN_WIDTH - 1 loop
+                if abs(row - col) > BAND_HALF_WIDTH then
+                    result_v(row)(col) := (others => '0');
+                end if;
+            end loop;
+        end loop;
+
+        return result_v;
+    end function banded_matrix;
+
+    function block_sparse_matrix(
+            constant MATRIX_ROW_WIDTH    : integer;
+            constant MATRIX_COLUMN_WIDTH : integer;
+            constant ELEMENT_WIDTH       : integer;
+            constant BLOCK_SIZE          : integer;
+            constant BLOCK_PERIOD        : integer
+        ) return StlvVectorArray_t is
+        variable result_v : StlvVectorArray_t(MATRIX_ROW_WIDTH - 1 downto 0)(MATRIX_COLUMN_WIDTH - 1 downto 0)(ELEMENT_WIDTH - 1 downto 0);
+    begin
+        result_v := ascending_matrix(MATRIX_ROW_WIDTH, MATRIX_COLUMN_WIDTH, ELEMENT_WIDTH);
+        for row in 0 to MATRIX_ROW_WIDTH - 1 loop
+            for col in 0 to MATRIX_COLUMN_WIDTH - 1 loop
+                if (row / BLOCK_SIZE + col / BLOCK_SIZE) mod BLOCK_PERIOD /= 0 then
+                    result_v(row)(col) := (others => '0');
+                end if;
+            end loop;
+        end loop;
+
+        return result_v;
+    end function block_sparse_matrix;
+
 end package body;
\ No newline at end of file
@@ -0,0 +1,285 @@
+################################################################################
+# benchmark.py
+#
+# Timing benchmark of the golden models and the cosim file writers. Results
+# are written as JSON and compared against a stored baseline, the script
+# exits with an error if a case got slower than the tolerance allows or if
+# there is no baseline to compare against (unless --save-baseline is given).
+#
+# Example:
+#   python scripts/benchmark.py --grid quick --save-baseline
+#   python scripts/benchmark.py --grid quick
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import numpy as np
+
+# Import the golden models
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, "modules/fix_model/python"))
+import modules
+from modules.fix_matrix_vector_product.vunit_tb import fix_matrix_vector_product as mvp
+from fix_cosim_stream import FixCosimStreamWriter
+from olo_fix import olo_fix_cosim, olo_fix_utils
+from en_cl_fix_pkg import *
+
+################################################################################
+# Constants
+################################################################################
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Size grids, rows and columns are swept together
+GRIDS = {
+    "quick" : {"sizes" : [4, 64, 256],             "vectors" : [1, 100, 1000]},
+    "full"  : {"sizes" : [4, 64, 256, 1024, 4096], "vectors" : [1, 100, 10000, 100000]},
+}
+
+# Cases above these element counts are skipped, they would run for minutes
+MAX_ELEMENTS_SCALAR = 2**14  # MatrixVectorProduct.calc: rows * cols * vectors
+MAX_ELEMENTS_BATCH = 2**30   # MatrixVectorProduct.calc_batch: rows * cols * vectors
+MAX_ELEMENTS_FILE = 2**24    # Cosim files: elements written
+
+# Formats of the benchmarked models
+FMT_MATRIX_G = "(0,4,12)"
+FMT_VECTOR_G = "(0,4,12)"
+FMT_RESULT_G = "(0,13,24)"
+
+FMT_MATRIX = olo_fix_utils.fix_format_from_string(FMT_MATRIX_G)
+FMT_VECTOR = olo_fix_utils.fix_format_from_string(FMT_VECTOR_G)
+FMT_RESULT = olo_fix_utils.fix_format_from_string(FMT_RESULT_G)
+
+MAC_GENERICS = {
+    "FMT_MULT_A_G" : "(1,5,8)",
+    "FMT_MULT_B_G" : "(1,7,9)",
+    "FMT_ADD_G"    : "(1,13,17)",
+    "FMT_RESULT_G" : "(1,14,17)",
+}
+
+################################################################################
+# Cases
+################################################################################
+def build_cases(grid : dict, tmp_dir : str) -> list:
+    """
+    Create the benchmark cases of a grid
+    :param grid:    Entry of GRIDS
+    :param tmp_dir: Directory for cosim files
+    :return:        List of (case id, setup function returning the timed function)
+    """
+    cases = []
+    rng = np.random.default_rng(42)
+
+    def random_fix(fmt, shape):
+        return cl_fix_from_real(rng.uniform(cl_fix_min_value(fmt), cl_fix_max_value(fmt), shape), fmt)
+
+    def cosim_case(tb_name, generics):
+        cosim = modules.cosim(tb_name)
+        output_path = os.path.join(tmp_dir, tb_name)
+        os.makedirs(output_path, exist_ok=True)
+        def run():
+            # The cosims print their generics
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                cosim(output_path=output_path, generics=generics)
+        return run
+
+    # fix_dsp_mac cosim, fixed size
+    cases.append(("fix_dsp_mac.cosim", lambda: cosim_case("fix_dsp_mac_vunit_tb", MAC_GENERICS)))
+
+    # fix_dot_product cosim
+    for size in grid["sizes"]:
+        generics = {
+            "DIMENSION_WIDTH_G"  : size,
+            "FMT_IN_ELEMENT_A_G" : FMT_MATRIX_G,
+            "FMT_IN_ELEMENT_B_G" : FMT_VECTOR_G,
+            "FMT_OUT_RESULT_G"   : FMT_RESULT_G,
+        }
+        cases.append((f"fix_dot_product.cosim[dim={size}]",
+                      lambda generics=generics: cosim_case("fix_dot_product_vunit_tb", generics)))
+
+    for size in grid["sizes"]:
+        for num_vectors in grid["vectors"]:
+            elements = size * size * num_vectors
+            params = f"rows={size},cols={size},vectors={num_vectors}"
+
+            def setup_model(size=size, num_vectors=num_vectors):
+                model = mvp.MatrixVectorProduct(FMT_MATRIX, FMT_VECTOR, FMT_RESULT)
+                return model, random_fix(FMT_MATRIX, (size, size)), random_fix(FMT_VECTOR, (num_vectors, size))
+
+            if elements <= MAX_ELEMENTS_SCALAR:
+                def setup_scalar(setup_model=setup_model):
+                    model, matrix, vectors = setup_model()
+                    return lambda: [model.calc(matrix, vector) for vector in vectors]
+                cases.append((f"MatrixVectorProduct.calc[{params}]", setup_scalar))
+
+            if elements <= MAX_ELEMENTS_BATCH:
+                def setup_batch(setup_model=setup_model):
+                    model, matrix, vectors = setup_model()
+                    _check_bit_exact(model, matrix, vectors)
+                    return lambda: model.calc_batch(matrix, vectors)
+                cases.append((f"MatrixVectorProduct.calc_batch[{params}]", setup_batch))
+
+                generics = {
+                    "COSIM_NUM_TEST_VECTORS_G" : num_vectors,
+                    "COSIM_MATRIX_TYPE_G"      : "ASCENDING",
+                    "NUM_DOT_PRODUCTS_G"       : 1,
+                    "MATRIX_ROW_WIDTH_G"       : size,
+                    "MATRIX_COLUMN_WIDTH_G"    : size,
+                    "FMT_IN_MATRIX_ELEMENT_G"  : FMT_MATRIX_G,
+                    "FMT_IN_VECTOR_ELEMENT_G"  : FMT_VECTOR_G,
+                    "FMT_OUT_RESULT_G"         : FMT_RESULT_G,
+                }
+                cases.append((f"fix_matrix_vector_product.cosim[{params}]",
+                              lambda generics=generics: cosim_case("fix_matrix_vector_product_vunit_tb", generics)))
+
+            if size * num_vectors <= MAX_ELEMENTS_FILE:
+                def setup_writer(size=size, num_vectors=num_vectors):
+                    data = random_fix(FMT_VECTOR, (num_vectors, size))
+                    writer = olo_fix_cosim(tmp_dir)
+                    return lambda: writer.write_cosim_file(data, FMT_VECTOR, "bench.fix", dim=size)
+                cases.append((f"olo_fix_cosim.write_cosim_file[cols={size},vectors={num_vectors}]", setup_writer))
+
+                def setup_stream_writer(size=size, num_vectors=num_vectors):
+                    data = random_fix(FMT_VECTOR, (num_vectors, size))
+                    chunk = max(1, mvp.COSIM_CHUNK_ELEMENTS // size)
+                    def run():
+                        with FixCosimStreamWriter(tmp_dir, FMT_VECTOR, "bench_stream.fix", dim=size) as writer:
+                            for start in range(0, num_vectors, chunk):
+                                writer.append(data[start:start + chunk])
+                    return run
+                cases.append((f"FixCosimStreamWriter.append[cols={size},vectors={num_vectors}]", setup_stream_writer))
+
+    return cases
+
+################################################################################
+# Functionality
+################################################################################
+def run_cases(cases : list, repeats : int, pattern : str = None) -> dict:
+    """
+    Time all cases
+    :param cases:   Result of build_cases()
+    :param repeats: Number of timed runs per case, the fastest one counts
+    :param pattern: Only run cases containing this string
+    :return:        Dict of case id to {"seconds", "repeats"}
+    """
+    results = {}
+    for case_id, setup in cases:
+        if pattern is not None and pattern not in case_id:
+            continue
+        run = setup()
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        results[case_id] = {"seconds" : min(times), "repeats" : repeats}
+        print(f"{min(times):10.4f} s  {case_id}", flush=True)
+    return results
+
+
+def compare(results : dict, baseline : dict, tolerance : float, min_delta : float) -> list:
+    """
+    Find regressions against a baseline
+    :param results:   Result of run_cases()
+    :param baseline:  Stored results
+    :param tolerance: Allowed relative slowdown (0.2 = 20 %)
+    :param min_delta: Slowdowns below this many seconds are treated as noise
+    :return:          List of (case id, baseline seconds, seconds)
+    """
+    regressions = []
+    for case_id, result in results.items():
+        if case_id not in baseline:
+            continue
+        reference = baseline[case_id]["seconds"]
+        seconds = result["seconds"]
+        if seconds > reference * (1 + tolerance) and seconds - reference > min_delta:
+            regressions.append((case_id, reference, seconds))
+    return regressions
+
+################################################################################
+# Helpers
+################################################################################
+def _check_bit_exact(model, matrix, vectors, num_vectors : int = 2):
+    # The batched path must match the olo_fix based reference
+    batch = np.asarray(model.calc_batch(matrix, vectors[:num_vectors]), dtype=float)
+    reference = np.asarray([model.calc(matrix, vector) for vector in vectors[:num_vectors]], dtype=float)
+    if not np.array_equal(batch, reference):
+        raise RuntimeError("benchmark : calc_batch is not bit-exact with calc")
+
+
+def _metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit"   : commit,
+        "python"   : platform.python_version(),
+        "numpy"    : np.__version__,
+        "platform" : platform.platform(),
+        "machine"  : platform.node(),
+    }
+
+################################################################################
+# Main
+################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the golden models and cosim file writers")
+    parser.add_argument("--grid", choices=GRIDS.keys(), default="quick", help="Size grid")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--filter", default=None, help="Only run cases containing this string")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Slowdowns below this many seconds are ignored")
+    args = parser.parse_args()
+
+    # Fail before running the cases, a missing baseline must not pass silently
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one")
+        sys.exit(1)
+
+    tmp_dir = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        results = run_cases(build_cases(GRIDS[args.grid], tmp_dir), args.repeats, args.filter)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {"meta" : _metadata(), "grid" : args.grid, "results" : results}
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.save_baseline:
+        # Keep the cases of other grids or filters
+        baseline = {"results" : {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        baseline["meta"] = report["meta"]
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.tolerance, args.min_delta)
+    for case_id, reference, seconds in regressions:
+        print(f"REGRESSION {case_id}: {reference:.4f} s -> {seconds:.4f} s")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
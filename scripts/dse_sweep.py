@@ -0,0 +1,198 @@
+################################################################################
+# dse_sweep.py
+#
+# Design space exploration of NUM_DOT_PRODUCTS_G and NUM_LANES_G for
+# fix_matrix_vector_product.
+# Lists the Pareto-optimal DSP counts and their cycles per matrix vector
+# product, optionally confirming the picks with VUnit. With --double-pump two
+# lanes share a DSP (DOUBLE_PUMP_G), with --packed two rows share a multiplier
+# (PACKED_G).
+#
+# Example:
+#   python scripts/dse_sweep.py --rows 1024 --cols 1024 --budget 50000 \
+#       --fmt-matrix "(0,4,12)" --fmt-vector "(0,4,12)" --fmt-result "(0,13,24)"
+#   python scripts/dse_sweep.py --rows 64 --cols 4096 --lanes 1 2 4 8 16 --budget 2000
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import os
+import sys
+import json
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+
+# Import the golden model
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT_DIR)
+from modules.fix_matrix_vector_product.vunit_tb import fix_matrix_vector_product as mvp
+sys.path.append(os.path.join(ROOT_DIR, "sim"))
+from test_configs.modules import MVP_GENERIC_ALIASES
+from test_configs.utils import make_short_name, limit_name
+from olo_fix import olo_fix_utils
+
+################################################################################
+# Functionality
+################################################################################
+
+def sweep(rows, cols, dsps_per_mac : int = 1, streaming : bool = False, lanes = 1, double_pump : bool = False,
+          packed : bool = False):
+    """
+    Evaluate every NUM_DOT_PRODUCTS_G for all row/column/lane combinations
+    :param rows:         MATRIX_ROW_WIDTH_G values
+    :param cols:         MATRIX_COLUMN_WIDTH_G values
+    :param dsps_per_mac: DSP slices per fix_dsp_mac, per fix_dsp_mac_packed with packed
+    :param streaming:    STREAMING_G
+    :param lanes:        NUM_LANES_G values
+    :param double_pump:  DOUBLE_PUMP_G
+    :param packed:       PACKED_G
+    :return:             Dict of flat arrays "rows", "cols", "dot_products", "lanes", "dsps", "cycles"
+    """
+    rows = np.atleast_1d(rows)
+    cols = np.atleast_1d(cols)
+    lanes = np.atleast_1d(lanes)
+
+    # Broadcast [rows, cols, dot_products, lanes], dot products beyond the row
+    # count are pointless and every lane needs at least two columns
+    dot_products = np.arange(1, rows.max() + 1)
+    r, c, n, k = np.meshgrid(rows, cols, dot_products, lanes, indexing="ij")
+    valid = (n <= r) & (-(-c // k) >= 2)
+    r, c, n, k = r[valid], c[valid], n[valid], k[valid]
+
+    # With DOUBLE_PUMP_G every pair of lanes shares a MAC, with PACKED_G
+    # every pair of rows
+    macs = -(-k // 2) if double_pump else k
+    units = -(-n // 2) if packed else n
+
+    return {
+        "rows"         : r,
+        "cols"         : c,
+        "dot_products" : n,
+        "lanes"        : k,
+        "dsps"         : units * macs * dsps_per_mac,
+        "cycles"       : mvp.cycles_per_product(r, c, n, streaming, k, double_pump=double_pump),
+    }
+
+
+def pareto(points : dict, budget : int = None) -> list:
+    """
+    Pareto-optimal design points per row/column combination
+    :param points: Result of sweep()
+    :param budget: Maximum cycles per matrix vector product
+    :return:       List of dicts sorted by rows, cols and DSP count
+    """
+    result = []
+    keys = np.stack([points["rows"], points["cols"]], axis=1)
+    for rows, cols in np.unique(keys, axis=0):
+        sel = (points["rows"] == rows) & (points["cols"] == cols)
+        if budget is not None:
+            sel &= points["cycles"] <= budget
+        dsps = points["dsps"][sel]
+        cycles = points["cycles"][sel]
+        dot_products = points["dot_products"][sel]
+        lanes = points["lanes"][sel]
+
+        # Walk by increasing DSP count, keep points that are faster than all cheaper ones
+        best = None
+        for idx in np.lexsort((cycles, dsps)):
+            if best is None or cycles[idx] < best:
+                best = cycles[idx]
+                result.append({
+                    "rows"         : int(rows),
+                    "cols"         : int(cols),
+                    "dot_products" : int(dot_products[idx]),
+                    "lanes"        : int(lanes[idx]),
+                    "dsps"         : int(dsps[idx]),
+                    "cycles"       : int(cycles[idx]),
+                })
+    return result
+
+
+def verify(picks : list, args) -> int:
+    """
+    Run the VUnit configs matching the picks
+    :param picks: Pareto points to verify
+    :param args:  Parsed command line arguments
+    :return:      Exit code of sim/run.py
+    """
+    configs = []
+    for pick in picks:
+        generics = {
+            "COSIM_NUM_TEST_VECTORS_G" : args.num_vectors,
+            "COSIM_MATRIX_TYPE_G"      : "ASCENDING",
+            "NUM_DOT_PRODUCTS_G"       : pick["dot_products"],
+            "STREAMING_G"              : args.streaming,
+            "NUM_LANES_G"              : pick["lanes"],
+            "DOUBLE_PUMP_G"            : args.double_pump,
+            "PACKED_G"                 : args.packed,
+            "MATRIX_ROW_WIDTH_G"       : pick["rows"],
+            "MATRIX_COLUMN_WIDTH_G"    : pick["cols"],
+            "FMT_IN_MATRIX_ELEMENT_G"  : args.fmt_matrix,
+            "FMT_IN_VECTOR_ELEMENT_G"  : args.fmt_vector,
+            "FMT_OUT_RESULT_G"         : args.fmt_result,
+        }
+        # The explicit name is the registered one, long names are shortened
+        configs.append({
+            "tb"       : "fix_matrix_vector_product_vunit_tb",
+            "name"     : limit_name(make_short_name(generics, MVP_GENERIC_ALIASES)),
+            "generics" : generics,
+        })
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(configs, f, indent=4)
+        config_file = f.name
+
+    # Only run the added configs
+    patterns = [f"lib.{config['tb']}.{config['name']}.*" for config in configs]
+    cmd = [sys.executable, os.path.join(ROOT_DIR, "sim", "run.py"),
+           "--extra-configs", config_file,
+           "-p", str(args.jobs)] + patterns
+    try:
+        return subprocess.call(cmd + args.vunit_args)
+    finally:
+        os.remove(config_file)
+
+################################################################################
+# Main
+################################################################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Design space exploration of NUM_DOT_PRODUCTS_G and NUM_LANES_G")
+    parser.add_argument("--rows", type=int, nargs="+", required=True, help="MATRIX_ROW_WIDTH_G values")
+    parser.add_argument("--cols", type=int, nargs="+", required=True, help="MATRIX_COLUMN_WIDTH_G values")
+    parser.add_argument("--streaming", action="store_true", help="STREAMING_G")
+    parser.add_argument("--lanes", type=int, nargs="+", default=[1], help="NUM_LANES_G values")
+    parser.add_argument("--double-pump", action="store_true", help="DOUBLE_PUMP_G, two lanes share a DSP")
+    parser.add_argument("--packed", action="store_true", help="PACKED_G, two rows share a multiplier")
+    parser.add_argument("--budget", type=int, default=None, help="Maximum cycles per matrix vector product")
+    parser.add_argument("--fmt-matrix", default="(0,4,12)", help="FMT_IN_MATRIX_ELEMENT_G")
+    parser.add_argument("--fmt-vector", default="(0,4,12)", help="FMT_IN_VECTOR_ELEMENT_G")
+    parser.add_argument("--fmt-result", default="(0,13,24)", help="FMT_OUT_RESULT_G")
+    parser.add_argument("--json", default=None, help="Write the Pareto points to this file")
+    parser.add_argument("--verify", action="store_true", help="Confirm the picks with VUnit")
+    parser.add_argument("--num-vectors", type=int, default=4, help="COSIM_NUM_TEST_VECTORS_G for --verify")
+    parser.add_argument("-p", "--jobs", type=int, default=os.cpu_count(), help="Parallel VUnit simulations for --verify")
+    parser.add_argument("vunit_args", nargs="*", help="Additional arguments passed to sim/run.py")
+    args = parser.parse_args()
+    if args.packed and args.double_pump:
+        parser.error("--packed is not supported with --double-pump")
+
+    fmt_matrix = olo_fix_utils.fix_format_from_string(args.fmt_matrix)
+    fmt_vector = olo_fix_utils.fix_format_from_string(args.fmt_vector)
+    dsps_per_mac = mvp.packed_dsps(fmt_matrix, fmt_vector) if args.packed else mvp.dsps_per_mac(fmt_matrix, fmt_vector)
+    points = sweep(args.rows, args.cols, dsps_per_mac, args.streaming, args.lanes, args.double_pump, args.packed)
+    picks = pareto(points, args.budget)
+
+    print(f"Evaluated {len(points['dsps'])} design points, {dsps_per_mac} DSP(s) per {'packed ' if args.packed else ''}MAC")
+    print(f"{'ROWS':>6} {'COLS':>6} {'DOT_PRODUCTS':>12} {'LANES':>6} {'DSPS':>6} {'CYCLES':>10}")
+    for pick in picks:
+        print(f"{pick['rows']:>6} {pick['cols']:>6} {pick['dot_products']:>12} {pick['lanes']:>6} {pick['dsps']:>6} {pick['cycles']:>10}")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(picks, f, indent=4)
+
+    if args.verify and picks:
+        sys.exit(verify(picks, args))
@@ -1,15 +1,17 @@
 ################################################################################
 # Imports
 ################################################################################
-from vunit import VUnit
+from vunit import VUnit, VUnitCLI
 from glob import glob
 import os
 import sys
+import shutil
+import subprocess
 from enum import Enum
 from functools import partial
 
 # Import vunit test configurations
-from test_configs import modules
+from test_configs import modules, cosim_cache, pregen, shard, compile_set, random_configs
 
 ################################################################################
 # Setup
@@ -29,6 +31,20 @@ SIMULATOR = Simulator.GHDL
 USE_COVERAGE = False
 GENERATE_VHDL_LS_TOML = False
 GENERATE_COMPILE_LIST = False
+PREGEN_JOBS = 0
+EXTRA_CONFIGS = []
+CHECK_FORMATS = False
+SHARDS = 0
+SHARD_PLAN_ONLY = False
+CORE_DEPS = False
+RANDOM_CONFIGS = 0
+RANDOM_SEED = random_configs.nightly_seed()
+SHRINK_CONFIG = None
+PROFILE = False
+MEMORY_LIMIT_MB = shard.memory_available_mb()
+# Options the shard processes inherit
+SHARD_ARGS = []
+RANDOM_ARGS = []
 
 #Simulator Selection
 #.. The environment variable VUNIT_SIMULATOR has precedence over the commandline options.
@@ -53,6 +69,98 @@ if "--compile_list" in sys.argv:
     GENERATE_COMPILE_LIST = True
     argv.remove("--compile_list")
 
+#Cosim cache handling
+#.. --no-cosim-cache regenerates all cosim files, --clear-cosim-cache empties the cache first.
+if "--no-cosim-cache" in sys.argv:
+    cosim_cache.configure(enabled=False)
+    argv.remove("--no-cosim-cache")
+    SHARD_ARGS.append("--no-cosim-cache")
+if "--clear-cosim-cache" in sys.argv:
+    cosim_cache.clear()
+    argv.remove("--clear-cosim-cache")
+
+#Parallel cosim generation
+#.. --pregen-jobs N generates all cosim files with N processes while VUnit compiles.
+if "--pregen-jobs" in sys.argv:
+    idx = argv.index("--pregen-jobs")
+    PREGEN_JOBS = int(argv[idx + 1])
+    del argv[idx:idx + 2]
+
+#Format analysis
+#.. --check-formats reports configurations whose result formats saturate or waste bits and exits.
+if "--check-formats" in sys.argv:
+    CHECK_FORMATS = True
+    argv.remove("--check-formats")
+
+#Additional configurations
+#.. --extra-configs FILE adds the configurations listed in a JSON file (may be repeated).
+while "--extra-configs" in argv:
+    idx = argv.index("--extra-configs")
+    EXTRA_CONFIGS.append(os.path.abspath(argv[idx + 1]))
+    SHARD_ARGS += ["--extra-configs", EXTRA_CONFIGS[-1]]
+    del argv[idx:idx + 2]
+
+#Random configurations
+#.. --random-configs N adds N random valid configurations drawn with --seed S (default: the date, YYYYMMDD).
+#.. --shrink NAME reduces the failing config NAME to a minimal one that still fails, running one VUnit process per candidate.
+if "--random-configs" in argv:
+    idx = argv.index("--random-configs")
+    RANDOM_CONFIGS = int(argv[idx + 1])
+    del argv[idx:idx + 2]
+if "--seed" in argv:
+    idx = argv.index("--seed")
+    RANDOM_SEED = int(argv[idx + 1])
+    del argv[idx:idx + 2]
+if RANDOM_CONFIGS > 0:
+    RANDOM_ARGS = ["--random-configs", str(RANDOM_CONFIGS), "--seed", str(RANDOM_SEED)]
+if "--shrink" in argv:
+    idx = argv.index("--shrink")
+    SHRINK_CONFIG = argv[idx + 1]
+    del argv[idx:idx + 2]
+
+#Sharding
+#.. --shards N distributes the configs longest first onto N VUnit processes whose estimated peak memory stays
+#.. within --memory-limit MB (default: physical memory) and merges their reports. --shard-plan only prints the plan.
+#.. The memory estimate follows VUNIT_SIMULATOR, only NVC configs are capped at the heap granted below.
+if "--shards" in argv:
+    idx = argv.index("--shards")
+    SHARDS = int(argv[idx + 1])
+    del argv[idx:idx + 2]
+if "--memory-limit" in argv:
+    idx = argv.index("--memory-limit")
+    MEMORY_LIMIT_MB = float(argv[idx + 1])
+    del argv[idx:idx + 2]
+if "--shard-plan" in argv:
+    SHARD_PLAN_ONLY = True
+    argv.remove("--shard-plan")
+
+#Dependency driven compile set
+#.. --core-deps only adds the sources the selected testbenches need according to the .core files (testbench dependencies in
+#.. compile_set.VUNIT_TESTBENCHES) and lets VUnit compile the minimal set within them (--minimal), instead of all open-logic and
+#.. module sources.
+if "--core-deps" in argv:
+    CORE_DEPS = True
+    argv.remove("--core-deps")
+    argv.append("--minimal")
+    SHARD_ARGS.append("--core-deps")
+
+#Cosim profiling
+#.. --profile records phase times, peak RSS and bytes written of every cosim and writes a Chrome trace and a summary
+#.. to <output path>/profile. The environment variable FIX_PROFILE_DIR records into another directory without merging.
+if "--profile" in argv:
+    PROFILE = True
+    argv.remove("--profile")
+
+sys.path.append(os.path.abspath('../modules/fix_model/python'))
+import fix_profile
+if PROFILE:
+    if not os.environ.get(fix_profile.PROFILE_DIR_ENV):
+        os.environ[fix_profile.PROFILE_DIR_ENV] = os.path.abspath(os.path.join(VUnitCLI().parse_args(argv=argv).output_path, "profile"))
+    PROFILE_DIR = os.environ[fix_profile.PROFILE_DIR_ENV]
+    # Records of earlier runs would be merged otherwise, shard processes inherit the directory
+    for record in glob(os.path.join(PROFILE_DIR, "config_*.json")):
+        os.remove(record)
+
 
 # Obviously the simulator must be chosen before sources are added
 if 'VUNIT_SIMULATOR' not in os.environ:
@@ -73,33 +181,90 @@ vu.add_verification_components()
 olo = vu.add_library('olo')
 lib = vu.add_library('lib')
 
-# Add all open-logic VHDL files
-files  = glob('../submodules/open-logic/src/**/*.vhd', recursive=True)
-files += glob('../submodules/open-logic/3rdParty/en_cl_fix/hdl/*.vhd', recursive=True)
-olo.add_source_files(files)
+if CORE_DEPS:
+    # Add the transitive closure of the selected testbenches
+    sources = compile_set.collect(VUnitCLI().parse_args(argv=argv).test_patterns)
+    olo.add_source_files(sources["olo"], allow_empty=True)
+    lib.add_source_files(sources["lib"], allow_empty=True)
+else:
+    # Add all open-logic VHDL files
+    files  = glob('../submodules/open-logic/src/**/*.vhd', recursive=True)
+    files += glob('../submodules/open-logic/3rdParty/en_cl_fix/hdl/*.vhd', recursive=True)
+    olo.add_source_files(files)
 
-# Add all source VHDL files
-files = glob('../modules/**/rtl/*.vhd', recursive=True)
-lib.add_source_files(files)
+    # Add all source VHDL files
+    files = glob('../modules/**/rtl/*.vhd', recursive=True)
+    lib.add_source_files(files)
 
-# Add test helpers
-files = glob('../submodules/open-logic/test/tb/*.vhd', recursive=True)
-lib.add_source_files(files)
+    # Add test helpers
+    files = glob('../submodules/open-logic/test/tb/*.vhd', recursive=True)
+    lib.add_source_files(files)
 
-# Add all vunit tb VHDL files
-files  = glob('../modules/**/vunit_tb/*.vhd', recursive=True)
-lib.add_source_files(files)
+    # Add all vunit tb VHDL files
+    files  = glob('../modules/**/vunit_tb/*.vhd', recursive=True)
+    lib.add_source_files(files)
 
 # Obviously flags must be set after files are imported
 vu.add_compile_option('ghdl.a_flags', ['-frelaxed-rules', '-Wno-hide', '-Wno-shared'])
 vu.add_compile_option('nvc.a_flags', ['--relaxed'])
 
+def merge_profile(results = None):
+    print()
+    fix_profile.print_summary(fix_profile.merge(PROFILE_DIR))
+    print(f"Cosim profile: {os.path.join(PROFILE_DIR, fix_profile.TRACE_FILE)}")
+
 ################################################################################
 # Test bench configurations
 ################################################################################
 
 ## Defined at the top of this file!
 modules.add_configs(lib)
+for extra_configs in EXTRA_CONFIGS:
+    modules.add_extra_configs(lib, extra_configs)
+if RANDOM_CONFIGS > 0:
+    print(f"Adding {RANDOM_CONFIGS} random configurations, seed {RANDOM_SEED}")
+    modules.add_config_list(lib, random_configs.generate(RANDOM_CONFIGS, RANDOM_SEED))
+
+if SHRINK_CONFIG is not None:
+    from test_configs.utils import registered_cosims
+    cli_args = VUnitCLI().parse_args(argv=argv)
+    matches = [(name, generics) for name, _, generics in registered_cosims if name.split(".")[2] == SHRINK_CONFIG]
+    if len(matches) != 1:
+        sys.exit(f"--shrink: {len(matches)} configurations named {SHRINK_CONFIG}")
+    name, generics = matches[0]
+    # The candidates are passed as extra configs, the random ones are not needed
+    command = [sys.executable, os.path.abspath(__file__)] + SHARD_ARGS
+    random_configs.shrink_with_vunit(name.split(".")[1], generics, command + ["-o", cli_args.output_path],
+                                     os.path.join(cli_args.output_path, "shrink"))
+    sys.exit(0)
+
+if CHECK_FORMATS:
+    from fix_format_analysis import check_configs
+    from test_configs.utils import registered_cosims
+    num_saturating = check_configs((name, name.split('.')[1], generics) for name, _, generics in registered_cosims)
+    print(f"{num_saturating} configuration(s) saturate or wrap")
+    sys.exit(0)
+
+if SHARDS > 0:
+    cli_args = VUnitCLI().parse_args(argv=argv)
+    shards = shard.plan(shard.collect(cli_args.test_patterns), SHARDS, MEMORY_LIMIT_MB)
+    shard.print_plan(shards, MEMORY_LIMIT_MB)
+    if SHARD_PLAN_ONLY:
+        sys.exit(0)
+
+    # Compile once, the shards share the up-to-date output path
+    command = [sys.executable, os.path.abspath(__file__)] + SHARD_ARGS + RANDOM_ARGS + ["-o", cli_args.output_path]
+    if subprocess.call(command + ["--compile"]) != 0:
+        sys.exit(1)
+    result = shard.run(shards, command + ["-p", "1"], os.path.join(cli_args.output_path, "shards"))
+    if cli_args.xunit_xml is not None:
+        shutil.copyfile(os.path.join(cli_args.output_path, "shards", "shards.xml"), cli_args.xunit_xml)
+    if PROFILE:
+        merge_profile()
+    sys.exit(result)
+
+if PREGEN_JOBS > 0:
+    pregen.start(PREGEN_JOBS, patterns=VUnitCLI().parse_args(argv=argv).test_patterns)
 
 ################################################################################
 # Execution
@@ -109,4 +274,4 @@ lib.set_sim_option('ghdl.elab_flags', ['-frelaxed'])
 lib.set_sim_option('nvc.heap_size', '5000M')
 
 # Run
-vu.main()
+vu.main(post_run=merge_profile if PROFILE else None)
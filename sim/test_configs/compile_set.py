@@ -0,0 +1,139 @@
+################################################################################
+# compile_set.py
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import os
+from glob import glob
+import yaml
+from .utils import selected
+
+################################################################################
+# Constants
+################################################################################
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+OLO_DIR = os.path.join(ROOT_DIR, "submodules/open-logic")
+
+# Directories searched for .core files and the library of their sources
+CORE_DIRS = [
+    (os.path.join(ROOT_DIR, "modules"), "lib"),
+    (os.path.join(OLO_DIR, "src"), "olo"),
+    (os.path.join(OLO_DIR, "3rdParty/en_cl_fix"), "olo"),
+]
+
+# VUnit testbenches, relative to ROOT_DIR: core under test and the cores the
+# testbench needs besides it. The .core files only describe the RTL and the
+# FuseSoC targets, the testbench dependencies are kept here.
+VUNIT_TESTBENCHES = {
+    "modules/fix_dsp_mac/vunit_tb/fix_dsp_mac_vunit_tb.vhd"
+        : ("rbrglez:dsp-task:fix-dsp-mac", ["open-logic:open-logic-dev:test"]),
+    "modules/fix_dot_product/vunit_tb/fix_dot_product_vunit_tb.vhd"
+        : ("rbrglez:dsp-task:fix-dot-product", ["open-logic:open-logic-dev:test"]),
+    "modules/fix_matrix_vector_product/vunit_tb/fix_matrix_vector_product_vunit_tb.vhd"
+        : ("rbrglez:dsp-task:fix-matrix-vector-product", ["rbrglez:dsp-task:support-matrix-generator-pkg",
+                                                          "open-logic:open-logic-dev:test"]),
+}
+
+# Fallback for cores without a .core file in CORE_DIRS (submodules not
+# checked out or cores not shipped): (library, file globs, dependencies)
+EXTERNAL_CORES = {
+    "open-logic:open-logic-dev:base" : ("olo", [os.path.join(OLO_DIR, "src/base/vhdl/*.vhd")], []),
+    "open-logic:open-logic-dev:fix"  : ("olo", [os.path.join(OLO_DIR, "src/fix/vhdl/*.vhd"),
+                                                os.path.join(OLO_DIR, "3rdParty/en_cl_fix/hdl/*.vhd")],
+                                        ["open-logic:open-logic-dev:base"]),
+    # Verification components of the open-logic testbenches (no FuseSoC core)
+    "open-logic:open-logic-dev:test" : ("lib", [os.path.join(OLO_DIR, "test/tb/*.vhd")],
+                                        ["open-logic:open-logic-dev:fix"]),
+}
+
+################################################################################
+# Functionality
+################################################################################
+
+def find_cores() -> dict:
+    """
+    Parse the FuseSoC .core files of the repository and the submodules
+    :return: Dict of core name (without version) to (core directory, library, parsed core)
+    """
+    cores = {}
+    for core_dir, library in CORE_DIRS:
+        for path in sorted(glob(os.path.join(core_dir, "**/*.core"), recursive=True)):
+            with open(path, "r") as f:
+                core = yaml.safe_load(f)
+            cores.setdefault(_core_name(core["name"]), (os.path.dirname(path), library, core))
+    return cores
+
+
+def collect(patterns : list = None) -> dict:
+    """
+    Sources of the VUnit testbenches selected by the test patterns and the
+    transitive closure of their core dependencies. Cores missing from
+    CORE_DIRS fall back to the directories of EXTERNAL_CORES.
+    :param patterns: VUnit test patterns, None or empty for all testbenches
+    :return:         Dict of library name to list of files
+    """
+    cores = find_cores()
+    files = {"olo" : [], "lib" : []}
+    visited = set()
+
+    def add_core(name : str, filesets : list):
+        if (name, tuple(filesets)) in visited:
+            return
+        visited.add((name, tuple(filesets)))
+        if name not in cores and name in EXTERNAL_CORES:
+            library, globs, depends = EXTERNAL_CORES[name]
+            for depend in depends:
+                add_core(depend, [])
+            for pattern in globs:
+                _extend(files[library], sorted(glob(pattern)))
+            return
+        if name not in cores:
+            raise ValueError(f"compile_set : unknown core {name}")
+        core_dir, library, core = cores[name]
+        for fileset_name in filesets:
+            fileset = core["filesets"][fileset_name]
+            for depend in fileset.get("depend", []):
+                depend_name = _core_name(depend)
+                add_core(depend_name, _default_filesets(cores[depend_name][2]) if depend_name in cores else [])
+            _extend(files[library], [os.path.join(core_dir, file) for file in _vhdl_files(fileset)])
+
+    for tb_file, (core_name, depends) in VUNIT_TESTBENCHES.items():
+        tb_name = os.path.splitext(os.path.basename(tb_file))[0]
+        if not selected(f"lib.{tb_name}", patterns):
+            continue
+        for name in [core_name] + depends:
+            add_core(name, _default_filesets(cores[name][2]) if name in cores else [])
+        _extend(files["lib"], [os.path.join(ROOT_DIR, tb_file)])
+
+    # The other testbenches are added without their dependencies, so that
+    # modules.add_configs() finds them, VUnit --minimal does not compile them
+    _extend(files["lib"], [os.path.join(ROOT_DIR, tb_file) for tb_file in VUNIT_TESTBENCHES])
+    return files
+
+################################################################################
+# Helpers
+################################################################################
+
+def _core_name(vlnv : str) -> str:
+    # "^vendor:library:name:version" -> "vendor:library:name"
+    return vlnv.lstrip("^~=<>").rsplit(":", 1)[0]
+
+
+def _default_filesets(core : dict) -> list:
+    # Conditional filesets ("tool_vivado? (...)") are tool specific
+    return [name for name in core["targets"]["default"]["filesets"] if "?" not in name]
+
+
+def _vhdl_files(fileset : dict) -> list:
+    # Files are plain strings or {name: {attributes}}
+    files = [file if isinstance(file, str) else next(iter(file)) for file in fileset.get("files", [])]
+    return [file for file in files if file.endswith((".vhd", ".vhdl"))]
+
+
+def _extend(files : list, new_files : list):
+    # Keep the first occurrence, dependencies come before their users
+    for file in new_files:
+        if file not in files:
+            files.append(file)
@@ -0,0 +1,251 @@
+################################################################################
+# cosim_cache.py
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import os
+import sys
+import json
+import shutil
+import hashlib
+import uuid
+from functools import lru_cache
+
+################################################################################
+# Constants
+################################################################################
+# Environment variables overriding the defaults below
+CACHE_DIR_ENV = "COSIM_CACHE_DIR"
+CACHE_MAX_SIZE_ENV = "COSIM_CACHE_MAX_SIZE_MB"
+
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../cosim_cache"))
+DEFAULT_MAX_SIZE_MB = 4096
+
+# Python sources every golden model depends on besides its own file
+MODEL_SHARED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../modules/fix_model/python"))
+OLO_PYTHON_DIRS = [
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../submodules/open-logic/src/fix/python")),
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "../../submodules/open-logic/3rdParty/en_cl_fix")),
+]
+
+################################################################################
+# Settings
+################################################################################
+_settings = {
+    "enabled"  : True,
+    "directory": os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR),
+    "max_size" : int(os.environ.get(CACHE_MAX_SIZE_ENV, DEFAULT_MAX_SIZE_MB)) * 1024**2,
+}
+
+# Futures of entries that are being filled in the background, see pregen.py
+_pending = {}
+
+################################################################################
+# Functionality
+################################################################################
+
+def configure(enabled : bool = None, directory : str = None, max_size_mb : int = None):
+    """
+    Change the cache settings, must be called before the simulation starts
+    :param enabled:     Use the cache, otherwise every cosim runs from scratch
+    :param directory:   Cache directory
+    :param max_size_mb: Cache size limit in MiB, least recently used entries are evicted
+    """
+    if enabled is not None:
+        _settings["enabled"] = enabled
+    if directory is not None:
+        _settings["directory"] = os.path.abspath(directory)
+    if max_size_mb is not None:
+        _settings["max_size"] = max_size_mb * 1024**2
+
+
+def enabled() -> bool:
+    """
+    Check whether the cache is used
+    """
+    return _settings["enabled"]
+
+
+def add_pending(entry : str, future):
+    """
+    Register an entry that is being filled in the background
+    :param entry:  Cache entry directory
+    :param future: Future that completes when the entry is filled
+    """
+    _pending[entry] = future
+
+
+def clear():
+    """
+    Remove all cache entries
+    """
+    shutil.rmtree(_settings["directory"], ignore_errors=True)
+
+
+def cache_key(cosim, generics : dict) -> str:
+    """
+    Content hash of a cosim run
+    :param cosim:    Cosim function
+    :param generics: Generics passed to the cosim function
+    :return:         Hex digest over the generics, the model sources and the olo_fix sources
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(generics, sort_keys=True, default=str).encode())
+    h.update(_file_digest(_source_file(cosim)).encode())
+    h.update(_dir_digest(MODEL_SHARED_DIR).encode())
+    for directory in OLO_PYTHON_DIRS:
+        h.update(_dir_digest(directory).encode())
+    return h.hexdigest()
+
+
+def entry_path(cosim, generics : dict) -> str:
+    """
+    Cache entry directory of a cosim run
+    :param cosim:    Cosim function
+    :param generics: Generics passed to the cosim function
+    :return:         Path of the entry (it may not exist yet)
+    """
+    return os.path.join(_settings["directory"], cache_key(cosim, generics))
+
+
+def run_cached(output_path : str, cosim = None, generics : dict = None) -> bool:
+    """
+    VUnit pre_config that serves the cosim files from the cache
+    :param output_path: VUnit output path of the test
+    :param cosim:       Cosim function generating the files
+    :param generics:    Generics passed to the cosim function
+    :return:            Result of the cosim function (True on a cache hit)
+    """
+    # Never write through hard links of an earlier cache hit
+    _unlink_outputs(output_path)
+
+    if not _settings["enabled"]:
+        return cosim(output_path=output_path, generics=generics)
+
+    entry = entry_path(cosim, generics)
+
+    # Wait for a background fill of the same entry instead of repeating it
+    future = _pending.get(entry)
+    if future is not None:
+        future.exception()
+
+    for _ in range(2):
+        if not os.path.isdir(entry):
+            if not fill(entry, cosim, generics):
+                return False
+        try:
+            # Touch the entry for LRU eviction
+            os.utime(entry)
+            _link_files(entry, output_path)
+            return True
+        except FileNotFoundError:
+            # Evicted by another worker between the check and the links, refill it
+            _unlink_outputs(output_path)
+
+    # Evicted again right after the refill, bypass the cache
+    return cosim(output_path=output_path, generics=generics)
+
+
+def fill(entry : str, cosim, generics : dict) -> bool:
+    """
+    Run a cosim function into a cache entry
+    :param entry:    Cache entry directory
+    :param cosim:    Cosim function generating the files
+    :param generics: Generics passed to the cosim function
+    :return:         Result of the cosim function
+    """
+    tmp = f"{entry}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp)
+    try:
+        if not cosim(output_path=tmp, generics=generics):
+            return False
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Another worker filled the same entry in the meantime
+            pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    evict()
+    return True
+
+
+def evict():
+    """
+    Remove least recently used entries until the cache fits its size limit
+    """
+    directory = _settings["directory"]
+    if not os.path.isdir(directory):
+        return
+
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path) and ".tmp-" not in name:
+            entries.append((os.path.getmtime(path), _dir_size(path), path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= _settings["max_size"]:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+################################################################################
+# Helpers
+################################################################################
+
+def _source_file(cosim) -> str:
+    # Lazy cosims know their source without importing the model
+    source_file = getattr(cosim, "source_file", None)
+    if source_file is not None:
+        return os.path.abspath(source_file)
+    func = getattr(cosim, "func", cosim)
+    return os.path.abspath(sys.modules[func.__module__].__file__)
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path : str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _dir_digest(path : str) -> str:
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(".py"):
+                h.update(file.encode())
+                h.update(_file_digest(os.path.join(root, file)).encode())
+    return h.hexdigest()
+
+
+def _dir_size(path : str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def _unlink_outputs(output_path : str):
+    if not os.path.isdir(output_path):
+        return
+    for name in os.listdir(output_path):
+        path = os.path.join(output_path, name)
+        if os.path.isfile(path) and os.stat(path).st_nlink > 1:
+            os.remove(path)
+
+
+def _link_files(entry : str, output_path : str):
+    os.makedirs(output_path, exist_ok=True)
+    for name in os.listdir(entry):
+        src = os.path.join(entry, name)
+        dst = os.path.join(output_path, name)
+        if os.path.exists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
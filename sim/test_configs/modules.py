@@ -8,10 +8,40 @@
 from .utils import named_config, make_short_name
 import sys
 import os
+import json
 
 # Import for fix cosimulations
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
-from modules import *
+import modules
+
+################################################################################
+# Constants
+################################################################################
+## Need to shorten generics, because of file name limit
+MVP_GENERIC_ALIASES = {
+    'COSIM_NUM_TEST_VECTORS_G' : 'NUM_SAMPLES',
+    'COSIM_MATRIX_TYPE_G'      : 'MATRIX_TYPE',
+    'NUM_DOT_PRODUCTS_G'       : 'DSPs',
+    'STREAMING_G'              : 'STREAM',
+    'MATRIX_LOAD_G'            : 'LOAD',
+    'NUM_LANES_G'              : 'LANES',
+    'SKIP_ZEROS_G'             : 'SKIP',
+    'BATCH_SIZE_G'             : 'BATCH',
+    'MAC_PIPELINE_G'           : 'PIPE',
+    'DOUBLE_PUMP_G'            : 'PUMP',
+    'PACKED_G'                 : 'PACK',
+    'OUT_STREAM_G'             : 'OUT_STREAM',
+    'MATRIX_ROW_WIDTH_G'       : 'ROWs',
+    'MATRIX_COLUMN_WIDTH_G'    : 'COLs',
+    'FMT_IN_MATRIX_ELEMENT_G'  : 'FMT_MATRIX',
+    'FMT_IN_VECTOR_ELEMENT_G'  : 'FMT_VECTOR',
+    'FMT_OUT_RESULT_G'         : 'FMT_RESULT',
+}
+
+# Aliases used for short config names, per testbench
+GENERIC_ALIASES = {
+    'fix_matrix_vector_product_vunit_tb' : MVP_GENERIC_ALIASES,
+}
 
 ################################################################################
 # Functionality
@@ -27,7 +57,7 @@ def add_configs(lib):
     # fix_dsp_mac 
     ############################################################################
     tb = lib.test_bench('fix_dsp_mac_vunit_tb')
-    cosim = fix_dsp_mac.vunit_tb.fix_dsp_mac.cosim
+    cosim = modules.cosim('fix_dsp_mac_vunit_tb')
 
     generics = {
         'FMT_MULT_A_G' : '(0,4,4)',
@@ -57,7 +87,7 @@ def add_configs(lib):
     # fix_dot_product
     ############################################################################
     tb = lib.test_bench('fix_dot_product_vunit_tb')
-    cosim = fix_dot_product.vunit_tb.fix_dot_product.cosim
+    cosim = modules.cosim('fix_dot_product_vunit_tb')
 
     generics = {
         'DIMENSION_WIDTH_G' : 4,
@@ -83,23 +113,139 @@ def add_configs(lib):
     }
     named_config(tb, generics, pre_config=cosim)
 
+    generics = {
+        'DIMENSION_WIDTH_G' : 4,
+        'STREAMING_G'       : True,
+        'FMT_IN_ELEMENT_A_G': '(0,4,4)',
+        'FMT_IN_ELEMENT_B_G': '(0,4,4)',
+        'FMT_OUT_RESULT_G'  : '(0,10,8)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    generics = {
+        'DIMENSION_WIDTH_G' : 32,
+        'STREAMING_G'       : True,
+        'FMT_IN_ELEMENT_A_G': '(1,3,2)',
+        'FMT_IN_ELEMENT_B_G': '(1,5,8)',
+        'FMT_OUT_RESULT_G'  : '(1,13,10)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    ## Lanes combined by the adder tree, odd lane counts pad the last lane
+    generics = {
+        'DIMENSION_WIDTH_G' : 32,
+        'NUM_LANES_G'       : 4,
+        'FMT_IN_ELEMENT_A_G': '(1,3,2)',
+        'FMT_IN_ELEMENT_B_G': '(1,5,8)',
+        'FMT_OUT_RESULT_G'  : '(1,13,10)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    generics = {
+        'DIMENSION_WIDTH_G' : 100,
+        'NUM_LANES_G'       : 7,
+        'STREAMING_G'       : True,
+        'FMT_IN_ELEMENT_A_G': '(1,7,-2)',
+        'FMT_IN_ELEMENT_B_G': '(0,2,8)',
+        'FMT_OUT_RESULT_G'  : '(0,16,6)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    ## Zero elements of vector a are skipped, the cosim contains all-zero vectors
+    generics = {
+        'DIMENSION_WIDTH_G' : 32,
+        'SKIP_ZEROS_G'      : True,
+        'FMT_IN_ELEMENT_A_G': '(0,4,4)',
+        'FMT_IN_ELEMENT_B_G': '(0,4,4)',
+        'FMT_OUT_RESULT_G'  : '(0,13,8)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    generics = {
+        'DIMENSION_WIDTH_G' : 30,
+        'NUM_LANES_G'       : 4,
+        'STREAMING_G'       : True,
+        'SKIP_ZEROS_G'      : True,
+        'FMT_IN_ELEMENT_A_G': '(0,4,4)',
+        'FMT_IN_ELEMENT_B_G': '(0,4,4)',
+        'FMT_OUT_RESULT_G'  : '(0,13,8)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    ## Pipelined MAC, every lane interleaves MAC_PIPELINE_G partial sums
+    generics = {
+        'DIMENSION_WIDTH_G' : 4,
+        'MAC_PIPELINE_G'    : 4,
+        'FMT_IN_ELEMENT_A_G': '(0,4,4)',
+        'FMT_IN_ELEMENT_B_G': '(0,4,4)',
+        'FMT_OUT_RESULT_G'  : '(0,10,8)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    generics = {
+        'DIMENSION_WIDTH_G' : 100,
+        'NUM_LANES_G'       : 7,
+        'MAC_PIPELINE_G'    : 3,
+        'STREAMING_G'       : True,
+        'FMT_IN_ELEMENT_A_G': '(1,7,-2)',
+        'FMT_IN_ELEMENT_B_G': '(0,2,8)',
+        'FMT_OUT_RESULT_G'  : '(0,16,6)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    ## Double pumped MACs on clk2x_i, two lanes share a MAC, odd lane counts leave one alone
+    generics = {
+        'DIMENSION_WIDTH_G' : 32,
+        'NUM_LANES_G'       : 4,
+        'DOUBLE_PUMP_G'     : True,
+        'FMT_IN_ELEMENT_A_G': '(1,3,2)',
+        'FMT_IN_ELEMENT_B_G': '(1,5,8)',
+        'FMT_OUT_RESULT_G'  : '(1,13,10)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    generics = {
+        'DIMENSION_WIDTH_G' : 30,
+        'NUM_LANES_G'       : 5,
+        'STREAMING_G'       : True,
+        'SKIP_ZEROS_G'      : True,
+        'DOUBLE_PUMP_G'     : True,
+        'FMT_IN_ELEMENT_A_G': '(0,4,4)',
+        'FMT_IN_ELEMENT_B_G': '(0,4,4)',
+        'FMT_OUT_RESULT_G'  : '(0,13,8)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    ## Packed MACs, a * b and c * b in one multiplier, signed products need the correction term
+    generics = {
+        'DIMENSION_WIDTH_G' : 32,
+        'NUM_LANES_G'       : 3,
+        'MAC_PIPELINE_G'    : 2,
+        'PACKED_G'          : True,
+        'FMT_IN_ELEMENT_A_G': '(0,4,4)',
+        'FMT_IN_ELEMENT_B_G': '(0,4,4)',
+        'FMT_OUT_RESULT_G'  : '(0,13,8)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
+    generics = {
+        'DIMENSION_WIDTH_G' : 30,
+        'NUM_LANES_G'       : 4,
+        'STREAMING_G'       : True,
+        'PACKED_G'          : True,
+        'FMT_IN_ELEMENT_A_G': '(1,3,4)',
+        'FMT_IN_ELEMENT_B_G': '(1,3,4)',
+        'FMT_OUT_RESULT_G'  : '(1,12,8)',
+    }
+    named_config(tb, generics, pre_config=cosim)
+
     ############################################################################
     # fix_matrix_vector_product
     ############################################################################
     tb = lib.test_bench('fix_matrix_vector_product_vunit_tb')
-    cosim = fix_matrix_vector_product.vunit_tb.fix_matrix_vector_product.cosim
+    cosim = modules.cosim('fix_matrix_vector_product_vunit_tb')
 
-    ## Need to shorten generics, because of file name limit
-    generic_aliases = {
-        'COSIM_NUM_TEST_VECTORS_G' : 'NUM_SAMPLES',
-        'COSIM_MATRIX_TYPE_G'      : 'MATRIX_TYPE',
-        'NUM_DOT_PRODUCTS_G'       : 'DSPs',
-        'MATRIX_ROW_WIDTH_G'       : 'ROWs',
-        'MATRIX_COLUMN_WIDTH_G'    : 'COLs',
-        'FMT_IN_MATRIX_ELEMENT_G'  : 'FMT_MATRIX',
-        'FMT_IN_VECTOR_ELEMENT_G'  : 'FMT_VECTOR',
-        'FMT_OUT_RESULT_G'         : 'FMT_RESULT',
-    }
+    generic_aliases = MVP_GENERIC_ALIASES
 
     generics = {
         'COSIM_NUM_TEST_VECTORS_G' : 16,
@@ -138,4 +284,422 @@ def add_configs(lib):
         'FMT_OUT_RESULT_G'         : '(0,13,12)',
     }
     short_name = make_short_name(generics, generic_aliases)
-    named_config(tb, generics, pre_config=cosim, short_name=short_name)
\ No newline at end of file
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Streaming mode, back-to-back vectors overlap the stages
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'STREAMING_G'              : True,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'STREAMING_G'              : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 4,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,3,8)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,8,4)',
+        'FMT_OUT_RESULT_G'         : '(0,13,12)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Matrix loaded once through the load interface
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'MATRIX_LOAD_G'            : True,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'STREAMING_G'              : True,
+        'MATRIX_LOAD_G'            : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 4,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,3,8)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,8,4)',
+        'FMT_OUT_RESULT_G'         : '(0,13,12)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Columns split into lanes combined by an adder tree
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'NUM_LANES_G'              : 4,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'NUM_LANES_G'              : 3,
+        'STREAMING_G'              : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 9,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,3,8)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,8,4)',
+        'FMT_OUT_RESULT_G'         : '(0,15,12)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Banded and block-sparse matrices, with SKIP_ZEROS_G the stages only
+    ## take as many cycles as their rows have nonzero elements
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'BANDED',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'BANDED',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'SKIP_ZEROS_G'             : True,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'SPARSE',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'NUM_LANES_G'              : 4,
+        'SKIP_ZEROS_G'             : True,
+        'MATRIX_LOAD_G'            : True,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'SPARSE',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'SKIP_ZEROS_G'             : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 9,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,3,8)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,8,4)',
+        'FMT_OUT_RESULT_G'         : '(0,15,12)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Batches of vectors, every matrix row is reused for all vectors of a batch
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'BATCH_SIZE_G'             : 4,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'NUM_LANES_G'              : 3,
+        'BATCH_SIZE_G'             : 5,
+        'MATRIX_LOAD_G'            : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 9,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,3,8)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,8,4)',
+        'FMT_OUT_RESULT_G'         : '(0,15,12)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Pipelined MAC in the fix_dot_product units
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'MAC_PIPELINE_G'           : 4,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'NUM_LANES_G'              : 2,
+        'MAC_PIPELINE_G'           : 3,
+        'STREAMING_G'              : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 9,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,3,8)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,8,4)',
+        'FMT_OUT_RESULT_G'         : '(0,15,12)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 8,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 2,
+        'NUM_LANES_G'              : 3,
+        'MAC_PIPELINE_G'           : 2,
+        'BATCH_SIZE_G'             : 2,
+        'MATRIX_ROW_WIDTH_G'       : 4,
+        'MATRIX_COLUMN_WIDTH_G'    : 6,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,8,1)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,3,5)',
+        'FMT_OUT_RESULT_G'         : '(0,13,6)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Double pumped dot-product units, half the DSPs for the same cycle count
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'NUM_LANES_G'              : 2,
+        'DOUBLE_PUMP_G'            : True,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'NUM_LANES_G'              : 3,
+        'STREAMING_G'              : True,
+        'DOUBLE_PUMP_G'            : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 9,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,3,8)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,8,4)',
+        'FMT_OUT_RESULT_G'         : '(0,15,12)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'SPARSE',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'NUM_LANES_G'              : 4,
+        'SKIP_ZEROS_G'             : True,
+        'DOUBLE_PUMP_G'            : True,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+        'FMT_OUT_RESULT_G'         : '(0,13,24)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Packed dot-product units, two rows per multiplier, an odd NUM_DOT_PRODUCTS_G leaves one row alone
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 11,
+        'NUM_LANES_G'              : 2,
+        'PACKED_G'                 : True,
+        'MATRIX_ROW_WIDTH_G'       : 32,
+        'MATRIX_COLUMN_WIDTH_G'    : 32,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,4)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,4)',
+        'FMT_OUT_RESULT_G'         : '(0,13,8)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 10,
+        'COSIM_MATRIX_TYPE_G'      : 'SPARSE',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'NUM_LANES_G'              : 3,
+        'STREAMING_G'              : True,
+        'PACKED_G'                 : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 9,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(1,3,4)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(1,3,4)',
+        'FMT_OUT_RESULT_G'         : '(1,12,8)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 8,
+        'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 4,
+        'NUM_LANES_G'              : 3,
+        'BATCH_SIZE_G'             : 2,
+        'MAC_PIPELINE_G'           : 2,
+        'PACKED_G'                 : True,
+        'MATRIX_ROW_WIDTH_G'       : 4,
+        'MATRIX_COLUMN_WIDTH_G'    : 6,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,8,1)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,3,5)',
+        'FMT_OUT_RESULT_G'         : '(0,13,6)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    ## Stage output stream, the last stage is only partly used
+    for streaming in [False, True]:
+        generics = {
+            'COSIM_NUM_TEST_VECTORS_G' : 16,
+            'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+            'NUM_DOT_PRODUCTS_G'       : 11,
+            'STREAMING_G'              : streaming,
+            'OUT_STREAM_G'             : True,
+            'MATRIX_ROW_WIDTH_G'       : 32,
+            'MATRIX_COLUMN_WIDTH_G'    : 32,
+            'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,12)',
+            'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,12)',
+            'FMT_OUT_RESULT_G'         : '(0,13,24)',
+        }
+        short_name = make_short_name(generics, generic_aliases)
+        named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    # Short lanes and a deep adder tree need the most FIFO entries with STREAMING_G
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'DESCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 2,
+        'STREAMING_G'              : True,
+        'MATRIX_LOAD_G'            : True,
+        'NUM_LANES_G'              : 4,
+        'MAC_PIPELINE_G'           : 2,
+        'OUT_STREAM_G'             : True,
+        'MATRIX_ROW_WIDTH_G'       : 9,
+        'MATRIX_COLUMN_WIDTH_G'    : 8,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(1,3,4)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(1,3,4)',
+        'FMT_OUT_RESULT_G'         : '(1,12,8)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'BANDED',
+        'NUM_DOT_PRODUCTS_G'       : 5,
+        'NUM_LANES_G'              : 2,
+        'SKIP_ZEROS_G'             : True,
+        'OUT_STREAM_G'             : True,
+        'MATRIX_ROW_WIDTH_G'       : 17,
+        'MATRIX_COLUMN_WIDTH_G'    : 9,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,4)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,4)',
+        'FMT_OUT_RESULT_G'         : '(0,13,8)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+    generics = {
+        'COSIM_NUM_TEST_VECTORS_G' : 16,
+        'COSIM_MATRIX_TYPE_G'      : 'ASCENDING',
+        'NUM_DOT_PRODUCTS_G'       : 7,
+        'NUM_LANES_G'              : 2,
+        'PACKED_G'                 : True,
+        'OUT_STREAM_G'             : True,
+        'MATRIX_ROW_WIDTH_G'       : 20,
+        'MATRIX_COLUMN_WIDTH_G'    : 12,
+        'FMT_IN_MATRIX_ELEMENT_G'  : '(0,4,4)',
+        'FMT_IN_VECTOR_ELEMENT_G'  : '(0,4,4)',
+        'FMT_OUT_RESULT_G'         : '(0,13,8)',
+    }
+    short_name = make_short_name(generics, generic_aliases)
+    named_config(tb, generics, pre_config=cosim, short_name=short_name)
+
+
+def add_extra_configs(lib, path : str):
+    """
+    Add configurations from a JSON file (e.g. written by scripts/dse_sweep.py)
+    :param lib:  Testbench library
+    :param path: JSON file with a list of {"tb": <testbench>, "generics": {...}}
+    """
+    with open(path, "r") as f:
+        add_config_list(lib, json.load(f))
+
+
+def add_config_list(lib, configs : list):
+    """
+    Add a list of configurations (e.g. from random_configs.generate)
+    :param lib:     Testbench library
+    :param configs: List of {"tb": <testbench>, "generics": {...}}, an optional
+                    "name" overrides the config name
+    """
+    for config in configs:
+        tb_name = config["tb"]
+        generics = config["generics"]
+        tb = lib.test_bench(tb_name)
+        short_name = config.get("name")
+        if short_name is None and tb_name in GENERIC_ALIASES:
+            short_name = make_short_name(generics, GENERIC_ALIASES[tb_name])
+        named_config(tb, generics, pre_config=modules.cosim(tb_name), short_name=short_name)
@@ -0,0 +1,74 @@
+################################################################################
+# pregen.py
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from . import cosim_cache
+from .utils import registered_cosims, selected, fix_profile
+
+################################################################################
+# Functionality
+################################################################################
+
+def start(jobs : int, patterns : list = None) -> int:
+    """
+    Fill the cosim cache for all registered configs in a process pool. Runs in
+    the background, so the cosims overlap with compilation. The pre_config of a
+    config waits for its pending entry and then only links the files.
+    :param jobs:     Number of worker processes
+    :param patterns: VUnit test patterns, only matching configs are generated
+    :return:         Number of cosim runs started
+    """
+    if not cosim_cache.enabled():
+        print("pregen: cosim cache is disabled, skipping pre-generation")
+        return 0
+
+    # Forked workers inherit the state of this process, spawned workers would re-run run.py instead
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        print("pregen: fork start method not available, skipping pre-generation")
+        return 0
+
+    tasks = {}
+    for name, cosim, generics in registered_cosims:
+        if not selected(name, patterns):
+            continue
+        entry = cosim_cache.entry_path(cosim, generics)
+        if entry not in tasks and not os.path.isdir(entry):
+            tasks[entry] = (name, cosim, generics)
+
+    if not tasks:
+        return 0
+
+    # Cosims are lazy, import their models before forking so the workers inherit them
+    _load_models(cosim for _, cosim, _ in tasks.values())
+
+    executor = ProcessPoolExecutor(max_workers=jobs, mp_context=context)
+    for entry, (name, cosim, generics) in tasks.items():
+        cosim_cache.add_pending(entry, executor.submit(_fill, name, entry, cosim, generics))
+    executor.shutdown(wait=False)
+
+    print(f"pregen: generating {len(tasks)} cosim configs with {jobs} workers")
+    return len(tasks)
+
+
+################################################################################
+# Helpers
+################################################################################
+
+def _fill(name : str, entry : str, cosim, generics : dict) -> bool:
+    # Runs in the worker process, profiled like a pre_config if switched on
+    with fix_profile.profiled_config(f"{name} (pregen)", entry):
+        return cosim_cache.fill(entry, cosim, generics)
+
+
+def _load_models(cosims):
+    for cosim in cosims:
+        if hasattr(cosim, "load"):
+            cosim.load()
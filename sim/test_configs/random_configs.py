@@ -0,0 +1,360 @@
+################################################################################
+# random_configs.py
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import os
+import sys
+import json
+import random
+import datetime
+import subprocess
+from .utils import make_short_name
+from .modules import GENERIC_ALIASES
+
+# Import the format analysis
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../modules/fix_model/python")))
+from fix_format_analysis import accumulator_format, format_string
+from olo_fix import olo_fix_utils
+from en_cl_fix_pkg import *
+
+################################################################################
+# Constants
+################################################################################
+# Ranges of the drawn generics, small enough for hundreds of configs per run
+MAX_ELEMENT_WIDTH = 16
+INT_BITS_RANGE = (-4, 12)
+FRAC_BITS_RANGE = (-4, 12)
+MAX_DIMENSION = 128
+MAX_MATRIX_WIDTH = 32
+MAX_TEST_VECTORS = 16
+MAX_BATCH_SIZE = 4
+MAX_MAC_PIPELINE = 4
+
+# Share of draws taken from the edge values of a range
+EDGE_PROBABILITY = 0.3
+
+# Smallest legal value of the integer generics, the shrinking targets
+MINIMUM = {
+    "COSIM_NUM_TEST_VECTORS_G" : 1,
+    "NUM_DOT_PRODUCTS_G"       : 1,
+    "NUM_LANES_G"              : 1,
+    "BATCH_SIZE_G"             : 1,
+    "MAC_PIPELINE_G"           : 1,
+    "MATRIX_ROW_WIDTH_G"       : 1,
+    "MATRIX_COLUMN_WIDTH_G"    : 2,
+    "DIMENSION_WIDTH_G"        : 2,
+}
+
+# Input formats and (result, dimension, addend) generics of every testbench
+TB_FORMATS = {
+    "fix_dsp_mac_vunit_tb"               : (["FMT_MULT_A_G", "FMT_MULT_B_G", "FMT_ADD_G"],
+                                            ("FMT_RESULT_G", None, "FMT_ADD_G")),
+    "fix_dot_product_vunit_tb"           : (["FMT_IN_ELEMENT_A_G", "FMT_IN_ELEMENT_B_G"],
+                                            ("FMT_OUT_RESULT_G", "DIMENSION_WIDTH_G", None)),
+    "fix_matrix_vector_product_vunit_tb" : (["FMT_IN_MATRIX_ELEMENT_G", "FMT_IN_VECTOR_ELEMENT_G"],
+                                            ("FMT_OUT_RESULT_G", "MATRIX_COLUMN_WIDTH_G", None)),
+}
+
+################################################################################
+# Functionality
+################################################################################
+
+def nightly_seed() -> int:
+    """
+    Seed of the current day (YYYYMMDD), all runs of a night draw the same configs
+    """
+    return int(datetime.date.today().strftime("%Y%m%d"))
+
+
+def generate(count : int, seed : int) -> list:
+    """
+    Draw random valid configurations, evenly spread over the testbenches
+    :param count: Number of configurations
+    :param seed:  Random seed, the same seed yields the same configurations
+    :return:      List of {"tb", "generics", "name"} as accepted by modules.add_config_list
+    """
+    rng = random.Random(seed)
+    draw = {
+        "fix_dsp_mac_vunit_tb"               : _draw_mac,
+        "fix_dot_product_vunit_tb"           : _draw_dot_product,
+        "fix_matrix_vector_product_vunit_tb" : _draw_matrix_vector_product,
+    }
+    tb_names = list(draw.keys())
+    configs = []
+    names = set()
+    while len(configs) < count:
+        tb_name = tb_names[len(configs) % len(tb_names)]
+        generics = draw[tb_name](rng)
+        if not valid(tb_name, generics):
+            continue
+        name = config_name(tb_name, generics)
+        if name in names:
+            continue
+        names.add(name)
+        configs.append({"tb" : tb_name, "generics" : generics, "name" : name})
+    return configs
+
+
+def config_name(tb_name : str, generics : dict) -> str:
+    """
+    Name of a random config, named_config shortens it with a hash if needed
+    """
+    return "rnd_" + make_short_name(generics, GENERIC_ALIASES.get(tb_name, {}))
+
+
+def valid(tb_name : str, generics : dict) -> bool:
+    """
+    Check the constraints of the RTL and the testbenches
+    :param tb_name:  Testbench name
+    :param generics: Generics of the config
+    """
+    for name, minimum in MINIMUM.items():
+        if name in generics and generics[name] < minimum:
+            return False
+    input_generics, (result_generic, dimension_generic, _) = TB_FORMATS[tb_name]
+    for name in input_generics + [result_generic]:
+        fmt = olo_fix_utils.fix_format_from_string(generics[name])
+        if cl_fix_width(fmt) < 1:
+            return False
+    # Results keep all integer bits and only drop fractional bits, so every
+    # mismatch is a bug and not an intended wrap-around
+    fmt_result = olo_fix_utils.fix_format_from_string(generics[result_generic])
+    if fmt_result != olo_fix_utils.fix_format_from_string(_result_format(tb_name, generics, generics[result_generic])):
+        return False
+
+    if tb_name in ("fix_dot_product_vunit_tb", "fix_matrix_vector_product_vunit_tb"):
+        # Every lane holds at least two elements
+        dimension = generics[dimension_generic]
+        lane_length = -(-dimension // generics.get("NUM_LANES_G", 1))
+        if lane_length < 2:
+            return False
+        # Every lane holds at least one element per partial sum, zeros are
+        # only skipped without MAC pipeline
+        mac_pipeline = generics.get("MAC_PIPELINE_G", 1)
+        if lane_length < mac_pipeline:
+            return False
+        if mac_pipeline > 1 and generics.get("SKIP_ZEROS_G", False):
+            return False
+        if mac_pipeline > 1 and generics.get("DOUBLE_PUMP_G", False):
+            return False
+        # Packed MACs neither skip zeros nor double pump
+        if generics.get("PACKED_G", False) and \
+           (generics.get("SKIP_ZEROS_G", False) or generics.get("DOUBLE_PUMP_G", False)):
+            return False
+    if tb_name == "fix_matrix_vector_product_vunit_tb":
+        if generics["NUM_DOT_PRODUCTS_G"] > generics["MATRIX_ROW_WIDTH_G"]:
+            return False
+        if generics.get("SKIP_ZEROS_G", False) and generics.get("STREAMING_G", False):
+            return False
+        # Batches are not combined with streaming or skipping and are always complete
+        batch_size = generics.get("BATCH_SIZE_G", 1)
+        if batch_size > 1 and (generics.get("STREAMING_G", False) or generics.get("SKIP_ZEROS_G", False)):
+            return False
+        # The stage output stream has no batch index
+        if batch_size > 1 and generics.get("OUT_STREAM_G", False):
+            return False
+        if generics["COSIM_NUM_TEST_VECTORS_G"] % batch_size != 0:
+            return False
+        # The test matrices step through rows * cols values of the format
+        fmt_matrix = olo_fix_utils.fix_format_from_string(generics["FMT_IN_MATRIX_ELEMENT_G"])
+        if generics["MATRIX_ROW_WIDTH_G"] * generics["MATRIX_COLUMN_WIDTH_G"] > 2**cl_fix_width(fmt_matrix):
+            return False
+    return True
+
+
+def shrink(tb_name : str, generics : dict, fails) -> dict:
+    """
+    Greedily reduce a failing config until no smaller candidate fails anymore
+    :param tb_name:  Testbench name
+    :param generics: Generics of the failing config
+    :param fails:    Function(generics) -> True if the config still fails
+    :return:         Generics of the minimal failing config
+    """
+    current = dict(generics)
+    progress = True
+    while progress:
+        progress = False
+        for candidate in _candidates(tb_name, current):
+            if valid(tb_name, candidate) and fails(candidate):
+                print(f"shrink : {config_name(tb_name, candidate)} still fails", flush=True)
+                current = candidate
+                progress = True
+                break
+    return current
+
+
+def shrink_with_vunit(tb_name : str, generics : dict, command : list, output_path : str) -> dict:
+    """
+    Shrink a config by running every candidate in its own VUnit process
+    :param tb_name:     Testbench name
+    :param generics:    Generics of the failing config
+    :param command:     run.py command line without test patterns and --extra-configs
+    :param output_path: Directory of the candidate files and the result
+    :return:            Generics of the minimal failing config
+    """
+    os.makedirs(output_path, exist_ok=True)
+    attempts = [0]
+
+    def fails(candidate : dict) -> bool:
+        attempts[0] += 1
+        name = f"shrink_{attempts[0]}"
+        path = os.path.join(output_path, f"{name}.json")
+        with open(path, "w") as f:
+            json.dump([{"tb" : tb_name, "generics" : candidate, "name" : name}], f, indent=4)
+        with open(os.path.join(output_path, f"{name}.log"), "w") as log:
+            result = subprocess.call(command + ["--extra-configs", path, f"lib.{tb_name}.{name}.*"],
+                                     stdout=log, stderr=subprocess.STDOUT)
+        return result != 0
+
+    if not fails(generics):
+        raise RuntimeError(f"random_configs : {config_name(tb_name, generics)} does not fail")
+    minimal = shrink(tb_name, generics, fails)
+    path = os.path.join(output_path, "shrunk.json")
+    with open(path, "w") as f:
+        json.dump([{"tb" : tb_name, "generics" : minimal}], f, indent=4)
+    print(f"Minimal config after {attempts[0]} runs, replay with --extra-configs {path}:")
+    print(json.dumps(minimal, indent=4))
+    return minimal
+
+################################################################################
+# Helpers
+################################################################################
+
+def _draw_int(rng, low : int, high : int) -> int:
+    if rng.random() < EDGE_PROBABILITY:
+        return rng.choice([low, min(low + 1, high), high, max(high - 1, low)])
+    return rng.randint(low, high)
+
+
+def _draw_format(rng) -> str:
+    while True:
+        s = rng.randint(0, 1)
+        i = _draw_int(rng, *INT_BITS_RANGE)
+        f = _draw_int(rng, *FRAC_BITS_RANGE)
+        if 2 <= s + i + f <= MAX_ELEMENT_WIDTH:
+            return format_string(FixFormat(s, i, f))
+
+
+def _result_format(tb_name : str, generics : dict, fmt_result : str = None) -> str:
+    # Lossless integer bits, the fractional bits of fmt_result (lossless if None)
+    input_generics, (_, dimension_generic, add_generic) = TB_FORMATS[tb_name]
+    fmt = lambda name: olo_fix_utils.fix_format_from_string(generics[name]) if name is not None else None
+    dimension = generics[dimension_generic] if dimension_generic is not None else 1
+    frac = olo_fix_utils.fix_format_from_string(fmt_result).F if fmt_result is not None else None
+    return format_string(accumulator_format(fmt(input_generics[0]), fmt(input_generics[1]), dimension,
+                                            fmt(add_generic), frac))
+
+
+def _with_result(rng, tb_name : str, generics : dict) -> dict:
+    # Round away a random number of fractional bits in half of the configs
+    lossless = olo_fix_utils.fix_format_from_string(_result_format(tb_name, generics))
+    drop = rng.randint(0, max(0, lossless.F + FRAC_BITS_RANGE[1])) if rng.random() < 0.5 else 0
+    result_generic = TB_FORMATS[tb_name][1][0]
+    generics[result_generic] = _result_format(tb_name, generics, format_string(FixFormat(0, 0, lossless.F - drop)))
+    return generics
+
+
+def _draw_mac(rng) -> dict:
+    generics = {
+        "FMT_MULT_A_G" : _draw_format(rng),
+        "FMT_MULT_B_G" : _draw_format(rng),
+        "FMT_ADD_G"    : _draw_format(rng),
+    }
+    return _with_result(rng, "fix_dsp_mac_vunit_tb", generics)
+
+
+def _draw_mac_pipeline(rng, cols : int, num_lanes : int, unsupported : bool) -> int:
+    # At most one partial sum per lane element, no MAC pipeline with zero
+    # skipping or double pumping (unsupported)
+    if unsupported:
+        return 1
+    return _draw_int(rng, 1, min(MAX_MAC_PIPELINE, -(-cols // num_lanes)))
+
+
+def _draw_dot_product(rng) -> dict:
+    dimension = _draw_int(rng, MINIMUM["DIMENSION_WIDTH_G"], MAX_DIMENSION)
+    num_lanes = _draw_int(rng, 1, max(1, dimension // 2))
+    skip_zeros = rng.random() < 0.5
+    double_pump = rng.random() < 0.25
+    packed = not (skip_zeros or double_pump) and rng.random() < 0.5
+    generics = {
+        "DIMENSION_WIDTH_G"  : dimension,
+        "STREAMING_G"        : rng.random() < 0.5,
+        "NUM_LANES_G"        : num_lanes,
+        "SKIP_ZEROS_G"       : skip_zeros,
+        "MAC_PIPELINE_G"     : _draw_mac_pipeline(rng, dimension, num_lanes, skip_zeros or double_pump),
+        "DOUBLE_PUMP_G"      : double_pump,
+        "PACKED_G"           : packed,
+        "FMT_IN_ELEMENT_A_G" : _draw_format(rng),
+        "FMT_IN_ELEMENT_B_G" : _draw_format(rng),
+    }
+    return _with_result(rng, "fix_dot_product_vunit_tb", generics)
+
+
+def _draw_matrix_vector_product(rng) -> dict:
+    rows = _draw_int(rng, MINIMUM["MATRIX_ROW_WIDTH_G"], MAX_MATRIX_WIDTH)
+    cols = _draw_int(rng, MINIMUM["MATRIX_COLUMN_WIDTH_G"], MAX_MATRIX_WIDTH)
+    streaming = rng.random() < 0.5
+    skip_zeros = not streaming and rng.random() < 0.5
+    # Batches only without streaming and skipping, the testbench plays complete batches
+    batch_size = 1 if streaming or skip_zeros else _draw_int(rng, 1, MAX_BATCH_SIZE)
+    num_lanes = _draw_int(rng, 1, max(1, cols // 2))
+    double_pump = rng.random() < 0.25
+    packed = not (skip_zeros or double_pump) and rng.random() < 0.5
+    generics = {
+        "COSIM_NUM_TEST_VECTORS_G" : batch_size * _draw_int(rng, 1, MAX_TEST_VECTORS // batch_size),
+        "COSIM_MATRIX_TYPE_G"      : rng.choice(["ASCENDING", "DESCENDING", "BANDED", "SPARSE"]),
+        "NUM_DOT_PRODUCTS_G"       : _draw_int(rng, 1, rows),
+        "STREAMING_G"              : streaming,
+        "MATRIX_LOAD_G"            : rng.random() < 0.5,
+        "NUM_LANES_G"              : num_lanes,
+        # The matrix vector product does not skip zeros in streaming mode
+        "SKIP_ZEROS_G"             : skip_zeros,
+        "BATCH_SIZE_G"             : batch_size,
+        "MAC_PIPELINE_G"           : _draw_mac_pipeline(rng, cols, num_lanes, skip_zeros or double_pump),
+        "DOUBLE_PUMP_G"            : double_pump,
+        "PACKED_G"                 : packed,
+        "OUT_STREAM_G"             : batch_size == 1 and rng.random() < 0.5,
+        "MATRIX_ROW_WIDTH_G"       : rows,
+        "MATRIX_COLUMN_WIDTH_G"    : cols,
+        "FMT_IN_MATRIX_ELEMENT_G"  : _draw_format(rng),
+        "FMT_IN_VECTOR_ELEMENT_G"  : _draw_format(rng),
+    }
+    return _with_result(rng, "fix_matrix_vector_product_vunit_tb", generics)
+
+
+def _candidates(tb_name : str, generics : dict):
+    # Smaller variants of a config, the most aggressive reductions first
+    result_generic = TB_FORMATS[tb_name][1][0]
+
+    def variant(name, value):
+        candidate = dict(generics)
+        candidate[name] = value
+        # Keep the integer bits lossless and the fractional bits of the result
+        candidate[result_generic] = _result_format(tb_name, candidate, generics[result_generic])
+        return candidate
+
+    for name, minimum in MINIMUM.items():
+        if name in generics and generics[name] > minimum:
+            value = generics[name]
+            for smaller in sorted({minimum, (value + minimum) // 2, value - 1}):
+                if smaller < value:
+                    yield variant(name, smaller)
+    for name, value in generics.items():
+        if value is True:
+            yield variant(name, False)
+    for name in TB_FORMATS[tb_name][0]:
+        fmt = olo_fix_utils.fix_format_from_string(generics[name])
+        for smaller in (FixFormat(0, fmt.I, fmt.F), FixFormat(fmt.S, fmt.I - 1, fmt.F),
+                        FixFormat(fmt.S, fmt.I, fmt.F - 1)):
+            if smaller != fmt and cl_fix_width(smaller) >= 2 and \
+               smaller.I >= INT_BITS_RANGE[0] and smaller.F >= FRAC_BITS_RANGE[0]:
+                yield variant(name, format_string(smaller))
+    lossless = _result_format(tb_name, generics)
+    if generics[result_generic] != lossless:
+        candidate = dict(generics)
+        candidate[result_generic] = lossless
+        yield candidate
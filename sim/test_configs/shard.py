@@ -0,0 +1,244 @@
+################################################################################
+# shard.py
+################################################################################
+
+################################################################################
+# Imports
+################################################################################
+import os
+import time
+import subprocess
+import xml.etree.ElementTree as ET
+from .utils import registered_cosims, selected
+
+################################################################################
+# Constants
+################################################################################
+# Cost model in element operations: every simulation pays a fixed start-up
+# (elaboration, cosim file parsing), the rest scales with the simulated data.
+BASE_COST = 50000
+DOT_PRODUCT_VECTORS = 25  # Vector pairs generated by the fix_dot_product cosim
+
+# Memory model in MiB: simulator baseline plus the std_logic copies of the
+# matrix (testbench signal, r, r_next and the process variable of the DUT).
+BASE_MEMORY_MB = 300
+MATRIX_COPIES = 8
+
+# Heap limit per simulator (VUNIT_SIMULATOR), run.py grants NVC a fixed heap
+# (nvc.heap_size). The memory of the other simulators grows with the design.
+HEAP_LIMIT_MB = {"nvc" : 5000}
+
+################################################################################
+# Classes
+################################################################################
+class Config:
+    """
+    Testbench configuration with its estimated cost and memory footprint
+    """
+
+    def __init__(self, name : str, generics : dict):
+        """
+        Constructor of the Config class
+        :param name:     Config name (library.testbench.config)
+        :param generics: Generics of the config
+        """
+        self.name = name
+        self.generics = generics
+        self.cost, self.memory_mb = estimate(name.split(".")[1], generics)
+
+class Shard:
+    """
+    Configs run sequentially by one VUnit process
+    """
+
+    def __init__(self):
+        self.configs = []
+        self.cost = 0
+        self.memory_mb = 0
+
+    def add(self, config : Config):
+        self.configs.append(config)
+        self.cost += config.cost
+        self.memory_mb = max(self.memory_mb, config.memory_mb)
+
+################################################################################
+# Functionality
+################################################################################
+
+def estimate(tb_name : str, generics : dict, simulator : str = None):
+    """
+    Estimate the simulation cost and peak memory of a config from its generics
+    :param tb_name:   Testbench name
+    :param generics:  Generics of the config
+    :param simulator: Simulator the memory is estimated for, VUNIT_SIMULATOR if None
+    :return:          Tuple of (cost in element operations, memory in MiB)
+    """
+    if simulator is None:
+        simulator = os.environ.get("VUNIT_SIMULATOR", "")
+    heap_limit_mb = HEAP_LIMIT_MB.get(simulator.lower(), float("inf"))
+
+    if tb_name == "fix_matrix_vector_product_vunit_tb":
+        rows = generics["MATRIX_ROW_WIDTH_G"]
+        cols = generics["MATRIX_COLUMN_WIDTH_G"]
+        vectors = generics["COSIM_NUM_TEST_VECTORS_G"]
+        width = _format_width(generics["FMT_IN_MATRIX_ELEMENT_G"])
+        memory_mb = BASE_MEMORY_MB + rows * cols * width * MATRIX_COPIES / 2**20
+        return BASE_COST + rows * cols * vectors, min(memory_mb, heap_limit_mb)
+    if tb_name == "fix_dot_product_vunit_tb":
+        return BASE_COST + generics["DIMENSION_WIDTH_G"] * DOT_PRODUCT_VECTORS, BASE_MEMORY_MB
+    return BASE_COST, BASE_MEMORY_MB
+
+
+def collect(patterns : list = None) -> list:
+    """
+    Configs added through named_config that match the VUnit test patterns
+    :param patterns: VUnit test patterns
+    :return:         List of Config
+    """
+    return [Config(name, generics) for name, _, generics in registered_cosims if selected(name, patterns)]
+
+
+def plan(configs : list, workers : int, memory_limit_mb : float) -> list:
+    """
+    Distribute configs onto workers, longest first onto the least loaded worker
+    (LPT). Workers run their configs one after another, so the peak memory is
+    the sum of the largest config of every worker. A config goes to a worker
+    that keeps this sum within memory_limit_mb, if there is none, to the one
+    it increases the least (heavy configs end up serialized on one worker).
+    :param configs:         List of Config
+    :param workers:         Number of parallel VUnit processes
+    :param memory_limit_mb: Memory available for all simulations
+    :return:                List of Shard (some may be empty)
+    """
+    shards = [Shard() for _ in range(workers)]
+    for config in sorted(configs, key=lambda c: c.cost, reverse=True):
+        peak = sum(shard.memory_mb for shard in shards)
+        peak_with = lambda shard: peak - shard.memory_mb + max(shard.memory_mb, config.memory_mb)
+        candidates = [shard for shard in shards if peak_with(shard) <= memory_limit_mb]
+        if not candidates:
+            lowest = min(peak_with(shard) for shard in shards)
+            candidates = [shard for shard in shards if peak_with(shard) == lowest]
+        min(candidates, key=lambda shard: shard.cost).add(config)
+    return shards
+
+
+def run(shards : list, command : list, output_path : str) -> int:
+    """
+    Run every shard in its own VUnit process and merge the xunit reports
+    :param shards:      Result of plan()
+    :param command:     run.py command line without test patterns and -x
+    :param output_path: Directory of the shard logs and reports
+    :return:            0 if all shards passed, 1 otherwise
+    """
+    os.makedirs(output_path, exist_ok=True)
+    running = {}
+    for idx, shard in enumerate(shards):
+        if not shard.configs:
+            continue
+        xml = os.path.join(output_path, f"shard_{idx}.xml")
+        log = open(os.path.join(output_path, f"shard_{idx}.log"), "w")
+        patterns = [f"{config.name}.*" for config in shard.configs]
+        process = subprocess.Popen(command + ["-x", xml] + patterns, stdout=log, stderr=subprocess.STDOUT)
+        running[idx] = (process, log, xml, time.perf_counter())
+
+    # Report shards as they finish
+    results = {}
+    while running:
+        for idx, (process, log, xml, start) in list(running.items()):
+            if process.poll() is None:
+                continue
+            log.close()
+            seconds = time.perf_counter() - start
+            results[idx] = (process.returncode, xml, seconds)
+            del running[idx]
+            print(f"shard {idx}: {'passed' if process.returncode == 0 else 'FAILED'} after {seconds:.1f} s "
+                  f"({len(shards[idx].configs)} configs, log {log.name})", flush=True)
+        time.sleep(0.5)
+
+    # Merge the reports
+    xml_files = [xml for _, xml, _ in results.values() if os.path.exists(xml)]
+    report = merge_reports(xml_files, os.path.join(output_path, "shards.xml"))
+    print_summary(shards, results, report)
+    return 0 if all(code == 0 for code, _, _ in results.values()) else 1
+
+
+def merge_reports(xml_files : list, output_file : str) -> list:
+    """
+    Merge VUnit xunit reports into one
+    :param xml_files:   Reports of the shards
+    :param output_file: Merged report
+    :return:            List of (test name, seconds, status)
+    """
+    suite = ET.Element("testsuite", name="all")
+    tests = []
+    for xml_file in xml_files:
+        for case in ET.parse(xml_file).getroot().iter("testcase"):
+            suite.append(case)
+            status = "passed"
+            if case.find("failure") is not None or case.find("error") is not None:
+                status = "failed"
+            elif case.find("skipped") is not None:
+                status = "skipped"
+            tests.append((f"{case.get('classname')}.{case.get('name')}", float(case.get("time", 0)), status))
+
+    suite.set("tests", str(len(tests)))
+    suite.set("failures", str(sum(status == "failed" for _, _, status in tests)))
+    suite.set("skipped", str(sum(status == "skipped" for _, _, status in tests)))
+    suite.set("errors", "0")
+    suite.set("time", f"{sum(seconds for _, seconds, _ in tests):.3f}")
+    ET.ElementTree(suite).write(output_file, encoding="utf-8", xml_declaration=True)
+    return tests
+
+
+def print_plan(shards : list, memory_limit_mb : float):
+    """
+    Print the distribution of the configs
+    :param shards:          Result of plan()
+    :param memory_limit_mb: Memory limit the plan was made for
+    """
+    peak = sum(shard.memory_mb for shard in shards)
+    print(f"{sum(len(shard.configs) for shard in shards)} configs on {len(shards)} workers, "
+          f"estimated peak memory {peak:.0f} of {memory_limit_mb:.0f} MiB")
+    for idx, shard in enumerate(shards):
+        print(f"shard {idx}: {len(shard.configs):4} configs, cost {shard.cost:12.0f}, memory {shard.memory_mb:6.0f} MiB")
+
+
+def print_summary(shards : list, results : dict, tests : list):
+    """
+    Print the merged results
+    :param shards:  Result of plan()
+    :param results: Dict of shard index to (return code, xunit file, seconds)
+    :param tests:   Result of merge_reports()
+    """
+    print()
+    print(f"{'SHARD':>5} {'CONFIGS':>7} {'COST':>12} {'SECONDS':>9}")
+    for idx, (code, _, seconds) in sorted(results.items()):
+        print(f"{idx:>5} {len(shards[idx].configs):>7} {shards[idx].cost:>12.0f} {seconds:>9.1f}")
+    print()
+    for name, seconds, status in sorted(tests, key=lambda test: test[1], reverse=True):
+        if status != "passed":
+            print(f"{status:>7} {seconds:8.1f} s  {name}")
+    num_failed = sum(status == "failed" for _, _, status in tests)
+    print(f"{len(tests)} tests, {num_failed} failed, "
+          f"{sum(status == 'skipped' for _, _, status in tests)} skipped")
+    if tests:
+        name, seconds, _ = max(tests, key=lambda test: test[1])
+        print(f"Slowest: {seconds:.1f} s {name}")
+
+
+def memory_available_mb() -> float:
+    """
+    Physical memory of the machine in MiB
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+    except (ValueError, OSError, AttributeError):
+        return float("inf")
+
+################################################################################
+# Helpers
+################################################################################
+
+def _format_width(fmt : str) -> int:
+    # "(S,I,F)" -> S + I + F
+    return sum(int(x) for x in fmt.strip().strip("()").split(","))
@@ -5,7 +5,29 @@
 ################################################################################
 # Imports
 ################################################################################
+import os
+import sys
+import hashlib
+from fnmatch import fnmatch
 from functools import partial
+from . import cosim_cache
+
+# Import the cosim instrumentation
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../modules/fix_model/python")))
+import fix_profile
+
+################################################################################
+# Constants
+################################################################################
+# Config names end up in the file names of the simulation output
+MAX_CONFIG_NAME_LENGTH = 160
+
+################################################################################
+# Registry
+################################################################################
+# (test name prefix, cosim function, generics) of every config added through
+# named_config, consumed by pregen.py
+registered_cosims = []
 
 ################################################################################
 # Functionality
@@ -15,8 +37,14 @@ def named_config(tb, map : dict, pre_config = None, short_name = None):
     cfg_name = "-".join([f"{k}={v}" for k, v in map.items()])
     if short_name is not None:
         cfg_name = short_name
+    cfg_name = limit_name(cfg_name)
     if pre_config is not None:
-        pre_config = partial(pre_config, generics=map)
+        library = getattr(getattr(tb, "library", None), "name", "lib")
+        registered_cosims.append((f"{library}.{tb.name}.{cfg_name}", pre_config, map))
+        pre_config = partial(cosim_cache.run_cached, cosim=pre_config, generics=map)
+        # Only wrapped when switched on, so profiling costs nothing otherwise
+        if fix_profile.enabled():
+            pre_config = fix_profile.profiled(pre_config, f"{library}.{tb.name}.{cfg_name}")
     tb.add_config(name=cfg_name, generics = map, pre_config=pre_config)
 
 
@@ -25,4 +53,31 @@ def make_short_name(generics : dict, generic_aliases : dict):
     for k, v in generics.items():
         alias = generic_aliases.get(k, k)  # use alias if defined, else full key
         parts.append(f"{alias}={v}")
-    return "_".join(parts)
\ No newline at end of file
+    return "_".join(parts)
+
+
+def limit_name(name : str, max_length : int = MAX_CONFIG_NAME_LENGTH) -> str:
+    """
+    Shorten a config name that exceeds the file name limit, the hash of the
+    full name keeps shortened names unique
+    :param name:       Config name
+    :param max_length: Maximum length
+    """
+    if len(name) <= max_length:
+        return name
+    digest = hashlib.sha1(name.encode()).hexdigest()[:10]
+    return f"{name[:max_length - len(digest) - 1]}_{digest}"
+
+
+def selected(name : str, patterns : list) -> bool:
+    """
+    Check whether a config may be selected by the VUnit test patterns
+    :param name:     Config name prefix (library.testbench.config)
+    :param patterns: VUnit test patterns
+    """
+    if not patterns:
+        return True
+    for pattern in patterns:
+        if fnmatch(f"{name}.*", pattern) or fnmatch(name, pattern.rsplit(".", 1)[0]):
+            return True
+    return False
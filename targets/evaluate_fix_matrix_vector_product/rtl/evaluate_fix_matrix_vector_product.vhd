@@ -19,6 +19,8 @@ use work.support_matrix_generator_pkg.all;
 entity evaluate_fix_matrix_vector_product is
     generic(
         NUM_DOT_PRODUCTS_G : positive := 11;
+        STREAMING_G        : boolean  := false;
+        NUM_LANES_G        : positive := 1;
 
         MATRIX_ROW_WIDTH_G    : natural := 32;
         MATRIX_COLUMN_WIDTH_G : natural := 32;
@@ -65,7 +67,9 @@ begin
             MATRIX_COLUMN_WIDTH_G   => MATRIX_COLUMN_WIDTH_G,
             FMT_IN_MATRIX_ELEMENT_G => FMT_IN_MATRIX_ELEMENT_G,
             FMT_IN_VECTOR_ELEMENT_G => FMT_IN_VECTOR_ELEMENT_G,
-            FMT_OUT_RESULT_G        => FMT_OUT_RESULT_G
+            FMT_OUT_RESULT_G        => FMT_OUT_RESULT_G,
+            STREAMING_G             => STREAMING_G,
+            NUM_LANES_G             => NUM_LANES_G
         )
         port map (
             clk_i => clk_125_i,